@@ -0,0 +1,38 @@
+"""add system log hourly stats
+
+Revision ID: 3b7e9c1d4f20
+Revises: a64d7efb1234
+Create Date: 2026-10-19 10:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3b7e9c1d4f20'
+down_revision = 'a64d7efb1234'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'system_log_hourly_stats',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('bucket', sa.DateTime(), nullable=False),
+        sa.Column('module', sa.String(), nullable=False),
+        sa.Column('action', sa.String(), nullable=False),
+        sa.Column('level', sa.String(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=True),
+        sa.Column('count', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_system_log_hourly_stats_id'), 'system_log_hourly_stats', ['id'], unique=False)
+    op.create_index('ix_system_log_hourly_stats_key', 'system_log_hourly_stats', ['bucket', 'module', 'action', 'level', 'user_id'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_system_log_hourly_stats_key', table_name='system_log_hourly_stats')
+    op.drop_index(op.f('ix_system_log_hourly_stats_id'), table_name='system_log_hourly_stats')
+    op.drop_table('system_log_hourly_stats')
@@ -0,0 +1,38 @@
+"""add hot query indexes
+
+Revision ID: 7c4d2e8a9b15
+Revises: 3b7e9c1d4f20
+Create Date: 2026-10-19 15:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7c4d2e8a9b15'
+down_revision = '3b7e9c1d4f20'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_ledgers_team_status', 'ledgers', ['team_id', 'status', 'approval_status', 'updated_at'], unique=False)
+    op.create_index('ix_ledgers_template_status', 'ledgers', ['template_id', 'status', 'approval_status', 'updated_at'], unique=False)
+    op.create_index('ix_ledgers_updated_at', 'ledgers', ['updated_at'], unique=False)
+    op.create_index('ix_field_values_ledger_field', 'field_values', ['ledger_id', 'field_id'], unique=False)
+    op.create_index('ix_workflow_nodes_workflow_order', 'workflow_nodes', ['workflow_id', 'order_index'], unique=False)
+    op.create_index('ix_workflow_instance_nodes_instance_status', 'workflow_instance_nodes', ['workflow_instance_id', 'status'], unique=False)
+    op.create_index('ix_audit_logs_ledger_created', 'audit_logs', ['ledger_id', 'created_at'], unique=False)
+    op.create_index(op.f('ix_users_team_id'), 'users', ['team_id'], unique=False)
+
+
+def downgrade():
+    op.drop_index(op.f('ix_users_team_id'), table_name='users')
+    op.drop_index('ix_audit_logs_ledger_created', table_name='audit_logs')
+    op.drop_index('ix_workflow_instance_nodes_instance_status', table_name='workflow_instance_nodes')
+    op.drop_index('ix_workflow_nodes_workflow_order', table_name='workflow_nodes')
+    op.drop_index('ix_field_values_ledger_field', table_name='field_values')
+    op.drop_index('ix_ledgers_updated_at', table_name='ledgers')
+    op.drop_index('ix_ledgers_template_status', table_name='ledgers')
+    op.drop_index('ix_ledgers_team_status', table_name='ledgers')
@@ -1,6 +1,6 @@
 from fastapi import APIRouter
 
-from app.api.api_v1.endpoints import auth, users, teams, roles, ledgers, templates, workflows, workflow_nodes, workflow_instances, approvals, logs, statistics
+from app.api.api_v1.endpoints import auth, users, teams, roles, ledgers, templates, workflows, workflow_nodes, workflow_instances, approvals, logs, statistics, monitoring
 
 api_router = APIRouter()
 api_router.include_router(auth.router, prefix="/auth", tags=["认证"])
@@ -15,6 +15,7 @@ api_router.include_router(workflow_instances.router, prefix="/workflow-instances
 api_router.include_router(approvals.router, prefix="/approvals", tags=["审批管理"])
 api_router.include_router(logs.router, prefix="/logs", tags=["日志管理"])
 api_router.include_router(statistics.router, prefix="/statistics", tags=["统计分析"])
+api_router.include_router(monitoring.router, prefix="/monitoring", tags=["系统监控"])
 
 @api_router.get("/test-token", tags=["test"])
 def test_token():
@@ -6,15 +6,17 @@ from sqlalchemy import and_, or_, desc
 from app.api import deps
 from app.models.workflow import WorkflowInstanceNode, WorkflowNode
 from app import crud, models, schemas
-from app.utils.logger import LoggerService, log_audit
+from app.db.session import commit_or_flush
+from app.services.reference_cache_service import team_refs, template_refs, user_refs
+from app.utils.logger import LoggerService
 
 router = APIRouter()
 
 
 @router.get("/tasks", response_model=List[Dict[str, Any]])
-def get_pending_tasks(
-    db: Session = Depends(deps.get_db),
-    current_user: models.User = Depends(deps.get_current_active_user),
+async def get_pending_tasks(
+    db: Any = Depends(deps.get_async_db),
+    current_user: models.User = Depends(deps.get_current_active_user_async),
 ) -> Any:
     """
     获取当前用户的待办任务
@@ -24,14 +26,14 @@ def get_pending_tasks(
         raise HTTPException(status_code=403, detail="用户未激活")
     
     # 获取待办任务
-    tasks = crud.workflow_instance_node.get_user_pending_tasks(db, user_id=current_user.id)
+    tasks = await deps.run_sync(db, crud.workflow_instance_node.get_user_pending_tasks, user_id=current_user.id)
     
     return tasks
 
 
 @router.get("/ledgers", response_model=List[schemas.Ledger])
 def get_approval_ledgers(
-    db: Session = Depends(deps.get_db),
+    db: Session = Depends(deps.get_read_db),
     skip: int = 0,
     limit: int = 100,
     status: Optional[str] = None,
@@ -75,14 +77,15 @@ def get_approval_ledgers(
     # 合并两种待办任务
     all_pending_nodes = direct_assigned_nodes + multi_approve_nodes
     
-    # 获取对应的台账
+    # 获取对应的台账，所有待办节点的实例一次查询
     ledger_ids = set()
-    for node in all_pending_nodes:
-        instance = db.query(models.WorkflowInstance).filter(
-            models.WorkflowInstance.id == node.workflow_instance_id
-        ).first()
-        if instance:
-            ledger_ids.add(instance.ledger_id)
+    instance_ids = {node.workflow_instance_id for node in all_pending_nodes}
+    if instance_ids:
+        ledger_ids = {
+            ledger_id for ledger_id, in db.query(models.WorkflowInstance.ledger_id).filter(
+                models.WorkflowInstance.id.in_(instance_ids)
+            )
+        }
     
     # 查询台账
     if ledger_ids:
@@ -94,23 +97,22 @@ def get_approval_ledgers(
         
         ledgers = query.offset(skip).limit(limit).all()
         
-        # 添加额外信息
+        # 添加额外信息，模板、创建者和团队从引用缓存批量获取
+        templates = template_refs.get_many(db, (ledger.template_id for ledger in ledgers))
+        creators = user_refs.get_many(db, (ledger.created_by_id for ledger in ledgers))
+        teams = team_refs.get_many(db, (ledger.team_id for ledger in ledgers))
         for ledger in ledgers:
             # 添加模板名称
-            template = db.query(models.Template).filter(models.Template.id == ledger.template_id).first()
-            if template:
-                ledger.template_name = template.name
+            if ledger.template_id in templates:
+                ledger.template_name = templates[ledger.template_id].name
             
             # 添加创建者名称
-            creator = db.query(models.User).filter(models.User.id == ledger.created_by_id).first()
-            if creator:
-                ledger.creator_name = creator.name
+            if ledger.created_by_id in creators:
+                ledger.creator_name = creators[ledger.created_by_id].name
             
             # 添加团队名称
-            if ledger.team_id:
-                team = db.query(models.Team).filter(models.Team.id == ledger.team_id).first()
-                if team:
-                    ledger.team_name = team.name
+            if ledger.team_id in teams:
+                ledger.team_name = teams[ledger.team_id].name
     
     return ledgers
 
@@ -118,7 +120,7 @@ def get_approval_ledgers(
 @router.post("/ledgers/{ledger_id}/submit", response_model=schemas.Ledger)
 def submit_ledger_for_approval(
     *,
-    db: Session = Depends(deps.get_db),
+    db: Session = Depends(deps.get_uow_db),
     ledger_id: int = Path(...),
     submit_data: schemas.LedgerSubmit = Body(...),
     current_user: models.User = Depends(deps.get_current_active_user),
@@ -196,13 +198,12 @@ def submit_ledger_for_approval(
     # ledger.workflow_id = workflow_id
     
     db.add(ledger)
-    db.commit()
-    db.refresh(ledger)
+    commit_or_flush(db, ledger)
     
     # 需要找到工作流实例
 
     # 记录审计日志
-    log_audit(
+    LoggerService.log_audit(
         db=db,
         user_id=current_user.id,
         action="submit",
@@ -219,7 +220,7 @@ def submit_ledger_for_approval(
 @router.post("/ledgers/{ledger_id}/approve", response_model=schemas.Ledger)
 def approve_ledger(
     *,
-    db: Session = Depends(deps.get_db),
+    db: Session = Depends(deps.get_uow_db),
     ledger_id: int = Path(...),
     approval_data: schemas.LedgerApproval = Body(...),
     current_user: models.User = Depends(deps.get_current_active_user),
@@ -305,10 +306,10 @@ def approve_ledger(
             ledger.status = "completed"
             ledger.approved_at = datetime.now()
             db.add(ledger)
-            db.commit()
+            commit_or_flush(db)
             
             # 记录审计日志
-            log_audit(
+            LoggerService.log_audit(
                 db=db,
                 user_id=current_user.id,
                 action="approve",
@@ -320,7 +321,7 @@ def approve_ledger(
             )
         else:
             # 记录审计日志
-            log_audit(
+            LoggerService.log_audit(
                 db=db,
                 user_id=current_user.id,
                 action="approve_node",
@@ -348,10 +349,10 @@ def approve_ledger(
             ledger.approval_status = "rejected"
             ledger.status = "returned"
             db.add(ledger)
-            db.commit()
+            commit_or_flush(db)
             
             # 记录审计日志
-            log_audit(
+            LoggerService.log_audit(
                 db=db,
                 user_id=current_user.id,
                 action="reject",
@@ -363,7 +364,7 @@ def approve_ledger(
             )
         else:
             # 记录审计日志
-            log_audit(
+            LoggerService.log_audit(
                 db=db,
                 user_id=current_user.id,
                 action="reject_node",
@@ -386,7 +387,7 @@ def approve_ledger(
 @router.post("/ledgers/{ledger_id}/cancel", response_model=schemas.Ledger)
 def cancel_approval(
     *,
-    db: Session = Depends(deps.get_db),
+    db: Session = Depends(deps.get_uow_db),
     ledger_id: int = Path(...),
     current_user: models.User = Depends(deps.get_current_active_user),
 ) -> Any:
@@ -433,11 +434,10 @@ def cancel_approval(
     ledger.status = "draft"
     ledger.approval_status = "pending"
     db.add(ledger)
-    db.commit()
-    db.refresh(ledger)
+    commit_or_flush(db, ledger)
     
     # 记录审计日志
-    log_audit(
+    LoggerService.log_audit(
         db=db,
         user_id=current_user.id,
         action="cancel_approval",
@@ -477,10 +477,10 @@ def get_ledger_audit_logs(
     ).order_by(models.AuditLog.created_at.desc()).all()
     
     # 添加用户信息
+    users = user_refs.get_many(db, (log.user_id for log in logs))
     for log in logs:
-        user = db.query(models.User).filter(models.User.id == log.user_id).first()
-        if user:
-            log.user_name = user.name
+        if log.user_id in users:
+            log.user_name = users[log.user_id].name
     
     return logs
 
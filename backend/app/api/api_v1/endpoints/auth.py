@@ -15,14 +15,14 @@ router = APIRouter()
 
 
 @router.post("/login", response_model=schemas.Token)
-def login(
-    db: Session = Depends(deps.get_db),
+async def login(
+    db: Any = Depends(deps.get_async_db),
     form_data: OAuth2PasswordRequestForm = Depends()
 ) -> Any:
     """
     用户登录 (使用EHR号)
     """
-    return auth_service.authenticate_user(db, ehr_id=form_data.username, password=form_data.password)
+    return await auth_service.authenticate_user_async(db, ehr_id=form_data.username, password=form_data.password)
 
 
 @router.post("/register", response_model=schemas.User)
@@ -1,6 +1,7 @@
-from typing import Any, List, Optional
+from typing import Any, Dict, List, Optional, Set
 
 from fastapi import APIRouter, Depends, HTTPException, Query, status, Path, Response
+from fastapi.responses import ORJSONResponse
 from sqlalchemy.orm import Session
 import pandas as pd
 from io import BytesIO
@@ -10,14 +11,34 @@ from urllib.parse import quote
 from app import models, schemas, crud
 from app.api import deps
 from app.utils.logger import LoggerService
+from app.utils.serializer import serialize_list
 from app.services.ledger_service import ledger_service
 
 router = APIRouter()
 
 
+def _list_ledgers(db: Session, current_user: models.User, **filters: Any) -> List[Dict[str, Any]]:
+    """查询台账列表并序列化，在同步会话中执行"""
+    fields = filters.get("fields")
+    ledgers = ledger_service.get_ledgers(db, current_user=current_user, **filters)
+    # 在会话内完成序列化，避免在事件循环中触发延迟加载
+    result = serialize_list(schemas.Ledger, ledgers, fields)
+    
+    # 记录日志
+    LoggerService.log_info(
+        db=db,
+        module="ledger",
+        action="list",
+        message="查询台账列表",
+        user_id=current_user.id,
+    )
+    
+    return result
+
+
 @router.get("/", response_model=List[schemas.Ledger])
-def read_ledgers(
-    db: Session = Depends(deps.get_db),
+async def read_ledgers(
+    db: Any = Depends(deps.get_async_db),
     skip: int = 0,
     limit: int = 100,
     team_id: Optional[int] = None,
@@ -25,18 +46,22 @@ def read_ledgers(
     search: Optional[str] = None,
     status: Optional[str] = None,
     approval_status: Optional[str] = None,
-    current_user: models.User = Depends(deps.get_current_active_user),
+    fields: Optional[Set[str]] = Depends(deps.sparse_fields(schemas.Ledger)),
+    current_user: models.User = Depends(deps.get_current_active_user_async),
 ) -> Any:
     """
     获取台账列表
+    fields指定只返回的字段，如 ?fields=id,name,status,team_name，未请求data和工作流实例时不加载
     """
     # 检查权限
     # if not deps.check_permissions("ledger", "view", current_user):
     #     raise HTTPException(status_code=403, detail="没有足够的权限")
     
-    # 获取台账列表
-    ledgers = ledger_service.get_ledgers(
+    # 获取台账列表，已序列化为字典，直接编码返回，不再经过response_model校验
+    ledgers = await deps.run_sync(
         db,
+        _list_ledgers,
+        current_user,
         skip=skip,
         limit=limit,
         team_id=team_id,
@@ -44,25 +69,15 @@ def read_ledgers(
         search=search,
         status=status,
         approval_status=approval_status,
-        current_user=current_user
-    )
-    
-    # 记录日志
-    LoggerService.log_info(
-        db=db,
-        module="ledger",
-        action="list",
-        message="查询台账列表",
-        user_id=current_user.id,
+        fields=fields,
     )
-    
-    return ledgers
+    return ORJSONResponse(ledgers)
 
 
 @router.post("/", response_model=schemas.Ledger)
 def create_ledger(
     *,
-    db: Session = Depends(deps.get_db),
+    db: Session = Depends(deps.get_uow_db),
     ledger_in: schemas.LedgerCreate,
     current_user: models.User = Depends(deps.get_current_active_user),
 ) -> Any:
@@ -101,7 +116,7 @@ def read_ledger(
 @router.put("/{ledger_id}", response_model=schemas.Ledger)
 def update_ledger(
     *,
-    db: Session = Depends(deps.get_db),
+    db: Session = Depends(deps.get_uow_db),
     ledger_id: int,
     ledger_in: schemas.LedgerUpdate,
     current_user: models.User = Depends(deps.get_current_active_user),
@@ -122,7 +137,7 @@ def update_ledger(
 @router.delete("/{ledger_id}", response_model=schemas.Ledger)
 def delete_ledger(
     *,
-    db: Session = Depends(deps.get_db),
+    db: Session = Depends(deps.get_uow_db),
     ledger_id: int,
     current_user: models.User = Depends(deps.get_current_active_user),
 ) -> Any:
@@ -241,7 +256,7 @@ def update_ledger_field_value(
     ledger_id: int = Path(...),
     field_value_id: int = Path(...),
     field_value_in: schemas.FieldValueUpdate,
-    db: Session = Depends(deps.get_db),
+    db: Session = Depends(deps.get_uow_db),
     current_user: models.User = Depends(deps.get_current_active_user),
 ) -> Any:
     """
@@ -295,7 +310,7 @@ def create_ledger_field_value(
     *,
     ledger_id: int = Path(...),
     field_value_in: schemas.FieldValueCreate,
-    db: Session = Depends(deps.get_db),
+    db: Session = Depends(deps.get_uow_db),
     current_user: models.User = Depends(deps.get_current_active_user),
 ) -> Any:
     """
@@ -358,7 +373,7 @@ def create_ledger_field_value(
 def sync_field_values(
     *,
     ledger_id: int = Path(...),
-    db: Session = Depends(deps.get_db),
+    db: Session = Depends(deps.get_uow_db),
     current_user: models.User = Depends(deps.get_current_active_user),
 ) -> Any:
     """
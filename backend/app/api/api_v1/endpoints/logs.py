@@ -1,32 +1,52 @@
-from typing import Any, List, Optional
+from typing import Any, List, Optional, Set
 
 from fastapi import APIRouter, Depends, HTTPException, Query, Path
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from sqlalchemy.orm import Session
 from datetime import datetime, timedelta
 
 from app.api import deps
 from app import crud, models, schemas
 from app.utils.logger import LoggerService
-from app.services.log_service import log_service
+from app.utils.serializer import serialize_list
+from app.services.log_service import log_service, EXPORT_MEDIA_TYPES
 
 router = APIRouter()
 
 
+def _export_response(stream: Any, name: str, format: str, compress: bool) -> StreamingResponse:
+    """构造日志导出的流式响应"""
+    filename = f"{name}_{datetime.now().strftime('%Y%m%d%H%M%S')}.{format}"
+    media_type = EXPORT_MEDIA_TYPES[format]
+    if compress:
+        filename += ".gz"
+        media_type = "application/gzip"
+    
+    return StreamingResponse(
+        stream,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
 @router.get("/system", response_model=List[schemas.SystemLog])
 def read_system_logs(
     db: Session = Depends(deps.get_db),
     params: schemas.LogQueryParams = Depends(),
+    fields: Optional[Set[str]] = Depends(deps.sparse_fields(schemas.SystemLog)),
     current_user: models.User = Depends(deps.get_current_active_user),
 ) -> Any:
     """
     获取系统日志列表
+    fields指定只返回的字段，如 ?fields=id,module,action,level,created_at
     """
     # 检查权限
     # if not deps.check_permissions("log", "view", current_user):
     #     raise HTTPException(status_code=403, detail="没有足够的权限")
     
-    # 获取日志
-    logs = log_service.get_system_logs(db, params=params)
+    # 获取日志，在记录本次访问日志（可能提交会话）之前完成序列化
+    logs = serialize_list(schemas.SystemLog, log_service.get_system_logs(db, params=params, fields=fields), fields)
     
     # 记录日志
     LoggerService.log_info(
@@ -37,12 +57,12 @@ def read_system_logs(
         user_id=current_user.id,
     )
     
-    return logs
+    return ORJSONResponse(logs)
 
 
 @router.get("/system/count", response_model=int)
 def count_system_logs(
-    db: Session = Depends(deps.get_db),
+    db: Session = Depends(deps.get_read_db),
     params: schemas.LogQueryParams = Depends(),
     current_user: models.User = Depends(deps.get_current_active_user),
 ) -> Any:
@@ -59,9 +79,39 @@ def count_system_logs(
     return count
 
 
+@router.get("/system/export")
+def export_system_logs(
+    db: Session = Depends(deps.get_db),
+    params: schemas.LogQueryParams = Depends(),
+    format: str = Query("ndjson", regex="^(ndjson|csv)$", description="导出格式，支持ndjson、csv"),
+    gzip: bool = Query(False, description="是否使用gzip压缩"),
+    current_user: models.User = Depends(deps.get_current_active_user),
+) -> Any:
+    """
+    流式导出系统日志（使用与列表相同的过滤条件，忽略分页参数）
+    """
+    # 检查权限
+    # if not deps.check_permissions("log", "export", current_user):
+    #     raise HTTPException(status_code=403, detail="没有足够的权限")
+    
+    # 记录日志
+    LoggerService.log_info(
+        db=db,
+        module="log",
+        action="export",
+        message="导出系统日志",
+        user_id=current_user.id,
+        details=jsonable_encoder(params, exclude_none=True, exclude={"page", "page_size"}),
+    )
+    
+    stream = log_service.export_system_logs(params, format=format, compress=gzip)
+    
+    return _export_response(stream, "system_logs", format, gzip)
+
+
 @router.get("/system/recent", response_model=List[schemas.SystemLog])
 def read_recent_system_logs(
-    db: Session = Depends(deps.get_db),
+    db: Session = Depends(deps.get_read_db),
     days: int = Query(7, ge=1, le=30),
     limit: int = Query(100, ge=1, le=1000),
     current_user: models.User = Depends(deps.get_current_active_user),
@@ -81,7 +131,7 @@ def read_recent_system_logs(
 
 @router.get("/system/errors", response_model=List[schemas.SystemLog])
 def read_error_logs(
-    db: Session = Depends(deps.get_db),
+    db: Session = Depends(deps.get_read_db),
     days: int = Query(7, ge=1, le=30),
     limit: int = Query(100, ge=1, le=1000),
     current_user: models.User = Depends(deps.get_current_active_user),
@@ -132,6 +182,65 @@ def read_resource_logs(
     return logs
 
 
+@router.get("/stats/timeline", response_model=List[schemas.LogStatsPoint])
+def read_log_stats_timeline(
+    db: Session = Depends(deps.get_read_db),
+    params: schemas.LogStatsQueryParams = Depends(),
+    interval: str = Query("hour", regex="^(hour|day)$", description="统计粒度，支持hour、day"),
+    current_user: models.User = Depends(deps.get_current_active_user),
+) -> Any:
+    """
+    获取日志数量的时间序列（基于小时汇总）
+    """
+    # 检查权限
+    # if not deps.check_permissions("log", "view", current_user):
+    #     raise HTTPException(status_code=403, detail="没有足够的权限")
+    
+    return log_service.get_log_stats_timeline(db, params=params, interval=interval)
+
+
+@router.get("/stats/summary", response_model=List[schemas.LogStatsGroup])
+def read_log_stats_summary(
+    db: Session = Depends(deps.get_read_db),
+    params: schemas.LogStatsQueryParams = Depends(),
+    group_by: str = Query("module", regex="^(module|action|level|user_id)$", description="分组维度"),
+    current_user: models.User = Depends(deps.get_current_active_user),
+) -> Any:
+    """
+    按维度分组统计日志数量（基于小时汇总）
+    """
+    # 检查权限
+    # if not deps.check_permissions("log", "view", current_user):
+    #     raise HTTPException(status_code=403, detail="没有足够的权限")
+    
+    return log_service.get_log_stats_summary(db, params=params, group_by=group_by)
+
+
+@router.post("/stats/rebuild", response_model=int)
+def rebuild_log_stats(
+    db: Session = Depends(deps.get_db),
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    current_user: models.User = Depends(deps.get_current_active_superuser),
+) -> Any:
+    """
+    根据原始系统日志重建小时汇总，返回写入的分组数量
+    """
+    count = log_service.rebuild_log_stats(db, start_date=start_date, end_date=end_date)
+    
+    # 记录日志
+    LoggerService.log_info(
+        db=db,
+        module="log",
+        action="rebuild_stats",
+        message="重建日志小时汇总",
+        user_id=current_user.id,
+        details={"groups": count},
+    )
+    
+    return count
+
+
 @router.get("/audit", response_model=List[schemas.AuditLog])
 def read_audit_logs(
     db: Session = Depends(deps.get_db),
@@ -139,23 +248,25 @@ def read_audit_logs(
     workflow_instance_id: Optional[int] = None,
     user_id: Optional[int] = None,
     limit: int = Query(100, ge=1, le=1000),
+    fields: Optional[Set[str]] = Depends(deps.sparse_fields(schemas.AuditLog)),
     current_user: models.User = Depends(deps.get_current_active_user),
 ) -> Any:
     """
     获取审计日志
+    fields指定只返回的字段，如 ?fields=id,action,status_after,created_at
     """
     # 检查权限
     # if not deps.check_permissions("log", "view", current_user):
     #     raise HTTPException(status_code=403, detail="没有足够的权限")
     
     # 获取审计日志
-    logs = log_service.get_audit_logs(
+    logs = serialize_list(schemas.AuditLog, log_service.get_audit_logs(
         db, 
         ledger_id=ledger_id, 
         workflow_instance_id=workflow_instance_id, 
         user_id=user_id, 
         limit=limit
-    )
+    ), fields)
     
     # 记录日志
     LoggerService.log_info(
@@ -166,13 +277,51 @@ def read_audit_logs(
         user_id=current_user.id,
     )
     
-    return logs
+    return ORJSONResponse(logs)
+
+
+@router.get("/audit/export")
+def export_audit_logs(
+    db: Session = Depends(deps.get_db),
+    params: schemas.LogQueryParams = Depends(),
+    ledger_id: Optional[int] = None,
+    workflow_instance_id: Optional[int] = None,
+    format: str = Query("ndjson", regex="^(ndjson|csv)$", description="导出格式，支持ndjson、csv"),
+    gzip: bool = Query(False, description="是否使用gzip压缩"),
+    current_user: models.User = Depends(deps.get_current_active_user),
+) -> Any:
+    """
+    流式导出审计日志（使用与列表相同的过滤条件，忽略分页参数）
+    """
+    # 检查权限
+    # if not deps.check_permissions("log", "export", current_user):
+    #     raise HTTPException(status_code=403, detail="没有足够的权限")
+    
+    # 记录日志
+    LoggerService.log_info(
+        db=db,
+        module="log",
+        action="export_audit",
+        message="导出审计日志",
+        user_id=current_user.id,
+        details=jsonable_encoder(params, exclude_none=True, exclude={"page", "page_size"}),
+    )
+    
+    stream = log_service.export_audit_logs(
+        params,
+        ledger_id=ledger_id,
+        workflow_instance_id=workflow_instance_id,
+        format=format,
+        compress=gzip,
+    )
+    
+    return _export_response(stream, "audit_logs", format, gzip)
 
 
 @router.get("/audit/ledger/{ledger_id}", response_model=List[schemas.AuditLog])
 def read_ledger_audit_logs(
     *,
-    db: Session = Depends(deps.get_db),
+    db: Session = Depends(deps.get_read_db),
     ledger_id: int = Path(..., title="台账ID"),
     limit: int = Query(100, ge=1, le=1000),
     current_user: models.User = Depends(deps.get_current_active_user),
@@ -193,7 +342,7 @@ def read_ledger_audit_logs(
 @router.get("/audit/workflow/{workflow_id}", response_model=List[schemas.AuditLog])
 def read_workflow_audit_logs(
     *,
-    db: Session = Depends(deps.get_db),
+    db: Session = Depends(deps.get_read_db),
     workflow_id: int = Path(..., title="工作流ID"),
     limit: int = Query(100, ge=1, le=1000),
     current_user: models.User = Depends(deps.get_current_active_user),
@@ -214,7 +363,7 @@ def read_workflow_audit_logs(
 @router.get("/audit/user/{user_id}", response_model=List[schemas.AuditLog])
 def read_user_audit_logs(
     *,
-    db: Session = Depends(deps.get_db),
+    db: Session = Depends(deps.get_read_db),
     user_id: int = Path(..., title="用户ID"),
     limit: int = Query(100, ge=1, le=1000),
     current_user: models.User = Depends(deps.get_current_active_user),
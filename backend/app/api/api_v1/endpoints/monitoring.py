@@ -0,0 +1,50 @@
+from typing import Any, List
+
+from fastapi import APIRouter, Depends, Query
+
+from app.api import deps
+from app import models, schemas
+from app.db.session import get_pool_status, get_pool_stats
+from app.db.slow_query import slow_query_recorder
+
+router = APIRouter()
+
+
+@router.get("/slow-queries", response_model=List[schemas.SlowQuery])
+def read_slow_queries(
+    limit: int = Query(50, ge=1, le=1000, description="返回的记录数"),
+    current_user: models.User = Depends(deps.get_current_active_superuser),
+) -> Any:
+    """
+    获取最近的慢查询（按时间倒序）
+    需要开启 SLOW_QUERY_LOG_ENABLED，记录只保存在当前进程内
+    """
+    return slow_query_recorder.records(limit=limit)
+
+
+@router.delete("/slow-queries", response_model=int)
+def clear_slow_queries(
+    current_user: models.User = Depends(deps.get_current_active_superuser),
+) -> Any:
+    """
+    清空慢查询记录，返回清除的条数
+    """
+    count = len(slow_query_recorder.records())
+    slow_query_recorder.clear()
+    return count
+
+
+@router.get("/db-pool", response_model=schemas.DBPoolStats)
+def read_db_pool_stats(
+    current_user: models.User = Depends(deps.get_current_active_superuser),
+) -> Any:
+    """
+    获取主库连接池的当前状态和累计统计（签出等待、连接占用时长、溢出连接和超时次数）
+    统计自进程启动起累计，用于调整 DB_POOL_SIZE / DB_MAX_OVERFLOW
+    """
+    try:
+        status = get_pool_status()
+    except AttributeError:
+        # 非QueuePool类型的连接池（如内存库的StaticPool）没有这些状态
+        status = None
+    return {"status": status, **(get_pool_stats() or {})}
@@ -14,7 +14,7 @@ router = APIRouter()
 @router.get("/", response_model=List[schemas.Role])
 def read_roles(
     *,
-    db: Session = Depends(deps.get_db),
+    db: Session = Depends(deps.get_read_db),
     current_user: models.User = Depends(deps.get_current_active_user),
     skip: int = 0,
     limit: int = 100,
@@ -47,7 +47,7 @@ def create_role(
 @router.get("/{role_id}", response_model=schemas.Role)
 def read_role(
     *,
-    db: Session = Depends(deps.get_db),
+    db: Session = Depends(deps.get_read_db),
     role_id: int = Path(..., title="角色ID"),
     current_user: models.User = Depends(deps.get_current_active_user),
 ) -> Any:
@@ -96,7 +96,7 @@ def delete_role(
 @router.get("/user/{user_id}/roles", response_model=List[str])
 def read_user_roles(
     *,
-    db: Session = Depends(deps.get_db),
+    db: Session = Depends(deps.get_read_db),
     user_id: int = Path(..., title="用户ID"),
     current_user: models.User = Depends(deps.get_current_active_user),
 ) -> Any:
@@ -12,7 +12,7 @@ router = APIRouter()
 
 @router.get("/", response_model=schemas.PaginatedResponse[schemas.Team])
 def read_teams(
-    db: Session = Depends(deps.get_db),
+    db: Session = Depends(deps.get_read_db),
     skip: int = 0,
     limit: int = 100,
     current_user: models.User = Depends(deps.get_current_active_user),
@@ -51,7 +51,7 @@ def create_team(
 @router.get("/{team_id}", response_model=schemas.Team)
 def read_team(
     team_id: int,
-    db: Session = Depends(deps.get_db),
+    db: Session = Depends(deps.get_read_db),
     current_user: models.User = Depends(deps.get_current_active_user),
 ) -> Any:
     """获取团队详情"""
@@ -96,7 +96,7 @@ def delete_team(
 @router.get("/{team_id}/members", response_model=List[schemas.User])
 def read_team_members(
     team_id: int,
-    db: Session = Depends(deps.get_db),
+    db: Session = Depends(deps.get_read_db),
     current_user: models.User = Depends(deps.get_current_active_user),
 ) -> Any:
     """获取团队成员列表"""
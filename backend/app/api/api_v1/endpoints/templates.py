@@ -1,36 +1,48 @@
-from typing import Any, List, Optional, Dict
+from typing import Any, List, Optional, Dict, Set
 from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import ORJSONResponse
 from sqlalchemy.orm import Session
 from app import models, schemas
+from app.db.session import commit_or_flush
 from app.api import deps
 from app.services.template_service import template_service
 from app.schemas.field import FieldReorderRequest
+from app.utils.serializer import serialize_list
 
 router = APIRouter()
 
 
+def _list_templates(db: Session, **filters: Any) -> List[Dict[str, Any]]:
+    """查询模板列表并在会话内完成序列化"""
+    templates = template_service.get_templates(db, **filters)
+    return serialize_list(schemas.Template, templates, filters.get("fields"))
+
+
 @router.get("/", response_model=List[schemas.Template])
-def read_templates(
-    db: Session = Depends(deps.get_db),
+async def read_templates(
+    db: Any = Depends(deps.get_async_db),
     skip: int = 0,
     limit: int = 100,
     search: Optional[str] = None,
-    current_user: models.User = Depends(deps.get_current_active_user),
+    fields: Optional[Set[str]] = Depends(deps.sparse_fields(schemas.Template)),
+    current_user: models.User = Depends(deps.get_current_active_user_async),
 ) -> Any:
     """
     获取模板列表
+    fields指定只返回的字段，如 ?fields=id,name,department
     """
     # 检查权限
     # if not deps.check_permissions("template", "view", current_user):
     #     raise HTTPException(status_code=403, detail="没有足够的权限")
     
-    return template_service.get_templates(db, skip=skip, limit=limit, search=search)
+    templates = await deps.run_sync(db, _list_templates, skip=skip, limit=limit, search=search, fields=fields)
+    return ORJSONResponse(templates)
 
 
 @router.post("/", response_model=schemas.Template)
 def create_template(
     *,
-    db: Session = Depends(deps.get_db),
+    db: Session = Depends(deps.get_uow_db),
     template_in: schemas.TemplateCreate,
     current_user: models.User = Depends(deps.get_current_active_user),
 ) -> Any:
@@ -47,7 +59,7 @@ def create_template(
 @router.get("/{template_id}", response_model=schemas.TemplateDetail)
 def read_template(
     template_id: int,
-    db: Session = Depends(deps.get_db),
+    db: Session = Depends(deps.get_read_db),
     current_user: models.User = Depends(deps.get_current_active_user),
 ) -> Any:
     """
@@ -63,7 +75,7 @@ def read_template(
 @router.put("/{template_id}", response_model=schemas.Template)
 def update_template(
     *,
-    db: Session = Depends(deps.get_db),
+    db: Session = Depends(deps.get_uow_db),
     template_id: int,
     template_in: schemas.TemplateUpdate,
     current_user: models.User = Depends(deps.get_current_active_user),
@@ -86,7 +98,7 @@ def update_template(
 @router.delete("/{template_id}", response_model=schemas.Template)
 def delete_template(
     *,
-    db: Session = Depends(deps.get_db),
+    db: Session = Depends(deps.get_uow_db),
     template_id: int,
     current_user: models.User = Depends(deps.get_current_active_user),
 ) -> Any:
@@ -103,7 +115,7 @@ def delete_template(
 @router.get("/{template_id}/fields", response_model=List[schemas.Field])
 def read_template_fields(
     template_id: int,
-    db: Session = Depends(deps.get_db),
+    db: Session = Depends(deps.get_read_db),
     current_user: models.User = Depends(deps.get_current_active_user),
 ) -> Any:
     """
@@ -126,7 +138,7 @@ def read_template_fields(
 @router.post("/{template_id}/fields", response_model=schemas.Field)
 def create_template_field(
     *,
-    db: Session = Depends(deps.get_db),
+    db: Session = Depends(deps.get_uow_db),
     template_id: int,
     field_in: schemas.FieldCreate,
     current_user: models.User = Depends(deps.get_current_active_user),
@@ -175,8 +187,7 @@ def create_template_field(
     template.updated_by_id = current_user.id
     db.add(template)
     
-    db.commit()
-    db.refresh(field)
+    commit_or_flush(db, field)
     
     return field
 
@@ -184,7 +195,7 @@ def create_template_field(
 @router.put("/{template_id}/fields/{field_id}", response_model=schemas.Field)
 def update_template_field(
     *,
-    db: Session = Depends(deps.get_db),
+    db: Session = Depends(deps.get_uow_db),
     template_id: int,
     field_id: int,
     field_in: schemas.FieldUpdate,
@@ -230,8 +241,7 @@ def update_template_field(
     db.add(template)
     
     db.add(field)
-    db.commit()
-    db.refresh(field)
+    commit_or_flush(db, field)
     
     return field
 
@@ -239,7 +249,7 @@ def update_template_field(
 @router.delete("/{template_id}/fields/{field_id}", response_model=schemas.Field)
 def delete_template_field(
     *,
-    db: Session = Depends(deps.get_db),
+    db: Session = Depends(deps.get_uow_db),
     template_id: int,
     field_id: int,
     current_user: models.User = Depends(deps.get_current_active_user),
@@ -273,7 +283,7 @@ def delete_template_field(
     
     # 删除字段
     db.delete(field)
-    db.commit()
+    commit_or_flush(db)
     
     return field
 
@@ -281,7 +291,7 @@ def delete_template_field(
 @router.put("/{template_id}/fields/reorder", response_model=List[schemas.Field])
 def reorder_template_fields(
     *,
-    db: Session = Depends(deps.get_db),
+    db: Session = Depends(deps.get_uow_db),
     template_id: int,
     reorder_request: FieldReorderRequest,
     current_user: models.User = Depends(deps.get_current_active_user),
@@ -347,11 +357,8 @@ def reorder_template_fields(
     template.updated_by_id = current_user.id
     db.add(template)
     
-    db.commit()
-    
     # 刷新字段并重新排序返回
-    for field in updated_fields:
-        db.refresh(field)
+    commit_or_flush(db, *updated_fields)
     
     # 按新的order排序返回
     updated_fields.sort(key=lambda x: x.order)
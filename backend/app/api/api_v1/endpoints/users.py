@@ -1,6 +1,7 @@
-from typing import Any, List, Dict
+from typing import Any, List, Dict, Optional, Set
 
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File
+from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Request, Response
+from fastapi.responses import ORJSONResponse
 from sqlalchemy.orm import Session
 import pandas as pd
 import io
@@ -8,36 +9,59 @@ from datetime import datetime
 
 from app import models, schemas
 from app.api import deps
-from app.core.security import get_password_hash
-from app.services.casbin_service import add_role_for_user, remove_role_for_user, get_roles_for_user, get_permissions_for_role
+from app.core.config import settings
+from app.core.security import hash_passwords
+from app.db.bulk import bulk_insert, chunked
+from app.services.casbin_service import add_role_for_user, add_roles_for_users, remove_role_for_user, get_roles_for_user, get_user_permission_set
+from app.services.statistics_service import invalidate_statistics
 from app.services.user_service import UserService as user_service
+from app.utils.serializer import serialize_list
 
 router = APIRouter()
 
 
+def _import_user_mapping(row: Any, hashed_password: str, valid_team_ids: Set[int], imported_at: datetime) -> Dict[str, Any]:
+    """导入文件中的一行对应的users表记录，团队不存在时不设置团队"""
+    team_id = row["team_id"] if "team_id" in row and not pd.isna(row["team_id"]) else None
+    return {
+        "username": row["username"],
+        "ehr_id": row["ehr_id"],
+        "hashed_password": hashed_password,
+        "name": row["name"],
+        "department": row.get("department", ""),
+        "is_active": True,
+        "is_superuser": False,
+        "team_id": int(team_id) if team_id in valid_team_ids else None,
+        "last_password_change": imported_at,
+    }
+
+
 @router.get("/", response_model=schemas.PaginatedResponse[schemas.User])
 def read_users(
-    db: Session = Depends(deps.get_db),
+    db: Session = Depends(deps.get_read_db),
     skip: int = 0,
     limit: int = 1000,
+    fields: Optional[Set[str]] = Depends(deps.sparse_fields(schemas.User)),
     current_user: models.User = Depends(deps.get_current_active_user),
 ) -> Any:
     """
     获取用户列表
+    fields指定items中只返回的字段，如 ?fields=id,username,name，未请求roles时不查询角色
     """
     users = db.query(models.User).offset(skip).limit(limit).all()
     total = db.query(models.User).count()
     
     # 获取每个用户的角色
-    for user in users:
-        user.roles = get_roles_for_user(str(user.id))
+    if fields is None or "roles" in fields:
+        for user in users:
+            user.roles = get_roles_for_user(str(user.id))
     
-    return {
-        "items": users,
+    return ORJSONResponse({
+        "items": serialize_list(schemas.User, users, fields),
         "total": total,
         "page": skip // limit + 1,
         "size": limit
-    }
+    })
 
 
 @router.post("/", response_model=schemas.User, status_code=201)
@@ -63,7 +87,7 @@ def create_user(
 @router.get("/{user_id}", response_model=schemas.User)
 def read_user(
     user_id: int,
-    db: Session = Depends(deps.get_db),
+    db: Session = Depends(deps.get_read_db),
     current_user: models.User = Depends(deps.get_current_active_user),
 ) -> Any:
     """
@@ -169,12 +193,15 @@ def import_users(
         success_count = 0
         failed_users = []
         
-        # 处理每一行数据
+        # 第一遍：检查用户名和EHR号，收集需要创建的行
+        pending_rows = []
+        seen_usernames = set()
+        seen_ehr_ids = set()
         for index, row in df.iterrows():
             try:
-                # 检查用户名和EHR号是否已存在
-                user_by_username = db.query(models.User).filter(models.User.username == row["username"]).first()
-                user_by_ehr_id = db.query(models.User).filter(models.User.ehr_id == row["ehr_id"]).first()
+                # 检查用户名和EHR号是否已存在（包括文件中前面的行）
+                user_by_username = row["username"] in seen_usernames or db.query(models.User).filter(models.User.username == row["username"]).first()
+                user_by_ehr_id = row["ehr_id"] in seen_ehr_ids or db.query(models.User).filter(models.User.ehr_id == row["ehr_id"]).first()
                 
                 if user_by_username:
                     failed_users.append({
@@ -192,37 +219,9 @@ def import_users(
                     })
                     continue
                 
-                # 创建用户
-                user = models.User(
-                    username=row["username"],
-                    ehr_id=row["ehr_id"],
-                    hashed_password=get_password_hash(row["password"]),
-                    name=row["name"],
-                    department=row.get("department", ""),
-                    is_active=True,
-                    is_superuser=False,
-                    team_id=None,
-                    last_password_change=datetime.now()
-                )
-                
-                # 添加团队（如果提供）
-                if "team_id" in df.columns and not pd.isna(row["team_id"]):
-                    team = db.query(models.Team).filter(models.Team.id == row["team_id"]).first()
-                    if team:
-                        user.team_id = team.id
-                
-                db.add(user)
-                db.commit()
-                db.refresh(user)
-                
-                # 添加角色（如果提供）
-                if "role" in df.columns and not pd.isna(row["role"]):
-                    add_role_for_user(str(user.id), row["role"])
-                else:
-                    # 默认角色为普通用户
-                    add_role_for_user(str(user.id), "user")
-                
-                success_count += 1
+                seen_usernames.add(row["username"])
+                seen_ehr_ids.add(row["ehr_id"])
+                pending_rows.append((index, row))
                 
             except Exception as e:
                 failed_users.append({
@@ -231,6 +230,66 @@ def import_users(
                     "reason": str(e)
                 })
         
+        # 并行计算所有待创建用户的密码哈希（bcrypt是导入的主要耗时）
+        hashed_passwords = hash_passwords([str(row["password"]) for _, row in pending_rows])
+        
+        # 文件中引用的团队一次查出，只为存在的团队设置team_id
+        team_values = set()
+        if "team_id" in df.columns:
+            team_values = {row["team_id"] for _, row in pending_rows if not pd.isna(row["team_id"])}
+        valid_team_ids = set()
+        if team_values:
+            valid_team_ids = {team_id for (team_id,) in db.query(models.Team.id).filter(models.Team.id.in_(team_values))}
+        
+        # 第二遍：按批创建用户，每批一条executemany语句，角色分配在最后一次写入
+        table = models.User.__table__
+        imported_at = datetime.now()
+        role_assignments = []
+        for batch in chunked(zip(pending_rows, hashed_passwords), settings.DB_BULK_BATCH_SIZE):
+            mappings = [
+                _import_user_mapping(row, hashed_password, valid_team_ids, imported_at)
+                for (_, row), hashed_password in batch
+            ]
+            created_rows = []
+            try:
+                bulk_insert(db, table, mappings)
+                db.commit()
+                created_rows = [row for (_, row), _ in batch]
+            except Exception:
+                db.rollback()
+                # 整批失败时逐行插入，找出出错的行
+                for ((index, row), _), mapping in zip(batch, mappings):
+                    try:
+                        bulk_insert(db, table, [mapping])
+                        db.commit()
+                        created_rows.append(row)
+                    except Exception as e:
+                        db.rollback()
+                        failed_users.append({
+                            "row": index + 2,
+                            "username": row["username"] if "username" in row else "未知",
+                            "reason": str(e)
+                        })
+            
+            if not created_rows:
+                continue
+            
+            # 添加角色（如果提供），默认角色为普通用户
+            user_ids = dict(
+                db.query(models.User.username, models.User.id)
+                .filter(models.User.username.in_([row["username"] for row in created_rows]))
+                .all()
+            )
+            for row in created_rows:
+                role = row["role"] if "role" in df.columns and not pd.isna(row["role"]) else "user"
+                role_assignments.append((str(user_ids[row["username"]]), role))
+                success_count += 1
+        
+        # 批量分配角色，权限缓存只失效一次
+        add_roles_for_users(role_assignments)
+        if success_count:
+            invalidate_statistics()
+        
         return {
             "success_count": success_count,
             "failed_count": len(failed_users),
@@ -247,27 +306,21 @@ def import_users(
 
 @router.get("/me/permissions", response_model=List[str])
 def read_user_permissions(
+    request: Request,
+    response: Response,
     current_user: models.User = Depends(deps.get_current_active_user),
 ) -> Any:
     """
     获取当前用户的权限列表
+    响应带ETag，请求头If-None-Match与之相同时返回304
     """
-    # 如果是超级管理员，拥有所有权限
-    if current_user.is_superuser:
-        return ["*:*"]
-    
-    # 获取用户角色
-    roles = get_roles_for_user(str(current_user.id))
+    # 超级管理员拥有所有权限；普通用户合并所有角色的权限
+    permissions, etag = get_user_permission_set(str(current_user.id), current_user.is_superuser)
     
-    # 获取所有角色的权限
-    permissions = []
-    for role in roles:
-        role_permissions = get_permissions_for_role(role)
-        for p in role_permissions:
-            # p格式为 [role, resource, action]
-            if len(p) >= 3:
-                permission = f"{p[1]}:{p[2]}"
-                if permission not in permissions:
-                    permissions.append(permission)
+    # 权限未变化时返回304，客户端继续使用本地缓存
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
     
+    response.headers.update(headers)
     return permissions 
\ No newline at end of file
@@ -11,7 +11,7 @@ router = APIRouter()
 @router.get("/{instance_id}", response_model=schemas.WorkflowInstance)
 def get_workflow_instance(
     *,
-    db: Session = Depends(deps.get_db),
+    db: Session = Depends(deps.get_read_db),
     instance_id: int = Path(...),
     current_user: models.User = Depends(deps.get_current_active_user),
 ) -> Any:
@@ -24,7 +24,7 @@ def get_workflow_instance(
 @router.get("/ledger/{ledger_id}", response_model=schemas.WorkflowInstance)
 def get_workflow_instance_by_ledger(
     *,
-    db: Session = Depends(deps.get_db),
+    db: Session = Depends(deps.get_read_db),
     ledger_id: int = Path(...),
     current_user: models.User = Depends(deps.get_current_active_user),
 ) -> Any:
@@ -37,7 +37,7 @@ def get_workflow_instance_by_ledger(
 @router.get("/{instance_id}/nodes", response_model=List[schemas.WorkflowInstanceNode])
 def get_workflow_instance_nodes(
     *,
-    db: Session = Depends(deps.get_db),
+    db: Session = Depends(deps.get_read_db),
     instance_id: int = Path(...),
     current_user: models.User = Depends(deps.get_current_active_user),
 ) -> Any:
@@ -50,7 +50,7 @@ def get_workflow_instance_nodes(
 @router.post("/{instance_id}/nodes/{node_id}/approve", response_model=Dict[str, Any])
 def approve_workflow_node(
     *,
-    db: Session = Depends(deps.get_db),
+    db: Session = Depends(deps.get_uow_db),
     instance_id: int = Path(...),
     node_id: int = Path(...),
     approval_data: schemas.WorkflowNodeApproval = Body(...),
@@ -65,7 +65,7 @@ def approve_workflow_node(
 @router.post("/{instance_id}/nodes/{node_id}/reject", response_model=Dict[str, Any])
 def reject_workflow_node(
     *,
-    db: Session = Depends(deps.get_db),
+    db: Session = Depends(deps.get_uow_db),
     instance_id: int = Path(...),
     node_id: int = Path(...),
     rejection_data: schemas.WorkflowNodeRejection = Body(...),
@@ -12,7 +12,7 @@ router = APIRouter()
 @router.get("/{node_id}", response_model=Dict[str, Any])
 def get_workflow_node(
     *,
-    db: Session = Depends(deps.get_db),
+    db: Session = Depends(deps.get_read_db),
     node_id: int = Path(..., title="工作流节点ID"),
     current_user: models.User = Depends(deps.get_current_active_user),
 ) -> Any:
@@ -28,7 +28,7 @@ def get_workflow_node(
 @router.get("/{node_id}/approvers", response_model=List[Dict[str, Any]])
 def get_node_approvers(
     *,
-    db: Session = Depends(deps.get_db),
+    db: Session = Depends(deps.get_read_db),
     node_id: int = Path(..., title="工作流节点ID"),
     current_user: models.User = Depends(deps.get_current_active_user),
 ) -> Any:
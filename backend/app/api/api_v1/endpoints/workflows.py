@@ -16,7 +16,7 @@ node_router = APIRouter()
 
 @router.get("/", response_model=schemas.PaginatedResponse[schemas.Workflow])
 def read_workflows(
-    db: Session = Depends(deps.get_db),
+    db: Session = Depends(deps.get_read_db),
     skip: int = 0,
     limit: int = 100,
     current_user: models.User = Depends(deps.get_current_active_user),
@@ -52,7 +52,7 @@ def create_workflow(
 @router.get("/{workflow_id}", response_model=schemas.Workflow)
 def read_workflow(
     *,
-    db: Session = Depends(deps.get_db),
+    db: Session = Depends(deps.get_read_db),
     workflow_id: int = Path(...),
     current_user: models.User = Depends(deps.get_current_active_user),
 ) -> Any:
@@ -1,40 +1,37 @@
-from typing import Generator, Optional, Any
+from typing import Any, Callable, Generator, Optional, Set, Type
 from datetime import datetime, timedelta
 from jose import jwt, JWTError
-from pydantic import ValidationError
-from fastapi import Depends, HTTPException, status
+from pydantic import BaseModel, ValidationError
+from fastapi import Depends, HTTPException, Query, Request, status
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.orm import Session
 
 from app import crud, models, schemas
 from app.core import security
 from app.core.config import settings
-from app.db.session import get_db
+from app.db.session import get_db, get_async_db, get_uow_db, run_sync, create_read_session
 from app.db.session import SessionLocal
 from app.models.user import User
+from app.services import user_cache_service
 from app.services.casbin_service import get_enforcer_instance, get_roles_for_user, get_permissions_for_role, check_permission
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl=f"{settings.API_V1_STR}/auth/login")
 
 
-def get_current_user(
-    db: Session = Depends(get_db), token: str = Depends(oauth2_scheme)
-) -> models.User:
-    """
-    获取当前用户
-    """
+def _decode_token(token: str) -> schemas.TokenPayload:
+    """校验令牌，失败时返回401"""
     try:
-        payload = jwt.decode(
-            token, settings.SECRET_KEY, algorithms=[security.ALGORITHM]
-        )
-        token_data = schemas.TokenPayload(**payload)
+        # 已校验过的令牌直接从缓存取载荷
+        return security.decode_access_token(token)
     except (jwt.JWTError, ValidationError):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="无法验证凭据",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    user = db.query(models.User).filter(models.User.id == token_data.sub).first()
+
+
+def _ensure_user(user: Optional[models.User]) -> models.User:
     if not user:
         raise HTTPException(status_code=404, detail="用户不存在")
     if not user.is_active:
@@ -42,6 +39,32 @@ def get_current_user(
     return user
 
 
+def get_current_user(
+    db: Session = Depends(get_db), token: str = Depends(oauth2_scheme)
+) -> models.User:
+    """
+    获取当前用户
+    """
+    token_data = _decode_token(token)
+    # 认证用户缓存，命中时不查询数据库
+    user = user_cache_service.get_user(db, int(token_data.sub)) if token_data.sub and token_data.sub.isdigit() else None
+    return _ensure_user(user)
+
+
+async def get_current_active_user_async(
+    db: Any = Depends(get_async_db), token: str = Depends(oauth2_scheme)
+) -> models.User:
+    """
+    获取当前激活用户（异步接口使用）
+    与接口共用同一个异步会话，返回的用户对象属于该会话
+    """
+    token_data = _decode_token(token)
+    user = None
+    if token_data.sub and token_data.sub.isdigit():
+        user = await run_sync(db, user_cache_service.get_user, int(token_data.sub))
+    return _ensure_user(user)
+
+
 def get_current_active_user(
     current_user: models.User = Depends(get_current_user),
 ) -> models.User:
@@ -87,4 +110,38 @@ def get_db() -> Generator:
         db = SessionLocal()
         yield db
     finally:
-        db.close() 
\ No newline at end of file
+        db.close()
+
+
+def get_read_db(request: Request) -> Generator:
+    """
+    只读接口使用的数据库会话
+    配置了只读副本时优先使用副本；副本不可用或当前用户刚执行过写操作时使用主库
+    会写入数据（包括记录操作日志）的接口不能使用该会话，应使用 get_db
+    """
+    user_id = security.get_token_subject(request.headers.get("Authorization"))
+    db = create_read_session(user_id)
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+
+def sparse_fields(schema: Type[BaseModel]) -> Callable[..., Optional[Set[str]]]:
+    """
+    列表接口的稀疏字段集参数，如 ?fields=id,name,status
+    返回请求的字段集合（总是包含id），未指定时返回None表示全部字段；包含schema中不存在的字段时返回400
+    """
+    def dependency(
+        fields: Optional[str] = Query(None, description="只返回的字段，逗号分隔，如 id,name,status"),
+    ) -> Optional[Set[str]]:
+        if not fields:
+            return None
+        requested = {name.strip() for name in fields.split(",") if name.strip()}
+        unknown = requested - set(schema.model_fields)
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"未知字段: {', '.join(sorted(unknown))}")
+        return requested | {"id"}
+
+    return dependency
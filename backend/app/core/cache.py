@@ -0,0 +1,529 @@
+"""
+可插拔的缓存后端
+
+业务代码通过 Cache（带命名空间的缓存）读写，后端由 CACHE_BACKEND_URL 决定：
+- memory://：进程内LRU缓存，每个命名空间一个，单worker部署时使用
+- unix:///path/to/redis.sock 或 redis://[:password@]host:port/db：Redis协议的共享缓存，
+  多个worker（以及多台机器）读写同一份缓存，一个worker清除缓存后其他worker立即可见
+
+版本标签：每个条目写入时记下所属标签（命名空间本身和构造时指定的标签）的版本号，
+读取时与当前版本号比较，不一致视为未命中。递增标签版本号即可让一批条目同时失效，
+不需要遍历或删除键；旧条目在TTL到期后由后端淘汰。读取时条目和标签版本号在一次往返中取回。
+每个键另有自己的版本号（键标签），delete时递增，条目同时记下读取时键标签的版本号。
+先读取、未命中时加载再写入（get_or_set、get_many_or_set）的条目使用读取时的版本号，
+加载期间发生的整体失效或单个键的删除都不会被写入的旧数据掩盖
+
+共享后端中的值用pickle序列化，并附带以SECRET_KEY计算的HMAC签名，签名不符的值视为未命中、不会反序列化
+"""
+import hashlib
+import hmac
+import logging
+import pickle
+import queue
+import socket
+import threading
+import time
+from typing import Any, Dict, Hashable, Iterable, List, Optional, Sequence, Tuple
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from app.core.config import settings
+from app.utils.cache import MISSING, LRUCache
+
+logger = logging.getLogger(__name__)
+
+
+class CacheBackend:
+    """缓存后端接口，键为字符串，值为可pickle的对象"""
+
+    def read(
+        self, namespace: str, keys: Sequence[str], tags: Sequence[str]
+    ) -> Tuple[List[Any], List[Optional[int]]]:
+        """读取多个键和标签版本号，未命中的键为MISSING，没有版本号的标签为None"""
+        raise NotImplementedError
+
+    def write(self, namespace: str, items: Dict[str, Any], ttl: Optional[float] = None) -> None:
+        """写入多个键，ttl为有效期（秒）"""
+        raise NotImplementedError
+
+    def delete(self, namespace: str, keys: Sequence[str]) -> None:
+        """删除多个键"""
+        raise NotImplementedError
+
+    def bump(self, tag: str, ttl: Optional[float] = None) -> None:
+        """递增标签的版本号，ttl为版本号的有效期（秒），过期后视为没有版本号"""
+        raise NotImplementedError
+
+    def configure(self, namespace: str, maxsize: int) -> None:
+        """设置命名空间的容量，共享后端由服务端的淘汰策略控制容量，忽略该设置"""
+
+    def size(self, namespace: str) -> Optional[int]:
+        """命名空间的条目数，无法统计时返回None"""
+        return None
+
+    def close(self) -> None:
+        """释放连接"""
+
+
+class MemoryBackend(CacheBackend):
+    """进程内缓存后端，每个命名空间一个LRU缓存，标签版本号保存在字典中不会被淘汰"""
+
+    def __init__(self, maxsize: int = 10000):
+        self.maxsize = maxsize
+        self._caches: Dict[str, LRUCache] = {}
+        self._versions: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def _cache(self, namespace: str) -> LRUCache:
+        cache = self._caches.get(namespace)
+        if cache is None:
+            with self._lock:
+                cache = self._caches.setdefault(namespace, LRUCache(maxsize=self.maxsize))
+        return cache
+
+    def configure(self, namespace: str, maxsize: int) -> None:
+        self._cache(namespace).maxsize = maxsize
+
+    def read(self, namespace, keys, tags):
+        cache = self._cache(namespace)
+        return [cache.get(key) for key in keys], [self._versions.get(tag) for tag in tags]
+
+    def write(self, namespace, items, ttl=None):
+        cache = self._cache(namespace)
+        for key, value in items.items():
+            cache.set(key, value, ttl=ttl)
+
+    def delete(self, namespace, keys):
+        cache = self._cache(namespace)
+        for key in keys:
+            cache.delete(key)
+
+    def bump(self, tag, ttl=None):
+        with self._lock:
+            self._versions[tag] = self._versions.get(tag, 0) + 1
+
+    def size(self, namespace):
+        return len(self._cache(namespace))
+
+
+class CacheUnavailable(Exception):
+    """共享缓存服务不可用"""
+
+
+class _RespConnection:
+    """一个Redis协议（RESP2）连接，支持流水线：一次发送多条命令，再按顺序读取回复"""
+
+    def __init__(self, sock: socket.socket):
+        self.sock = sock
+        self.reader = sock.makefile("rb")
+
+    @staticmethod
+    def _encode(command: Sequence[Any]) -> bytes:
+        parts = [b"*%d\r\n" % len(command)]
+        for arg in command:
+            if isinstance(arg, str):
+                arg = arg.encode("utf-8")
+            elif isinstance(arg, int):
+                arg = str(arg).encode("ascii")
+            parts.append(b"$%d\r\n%s\r\n" % (len(arg), arg))
+        return b"".join(parts)
+
+    def _read_reply(self) -> Any:
+        line = self.reader.readline()
+        if not line.endswith(b"\r\n"):
+            raise ConnectionError("缓存服务连接已断开")
+        kind, payload = line[:1], line[1:-2]
+        if kind == b"+":
+            return payload.decode("utf-8")
+        if kind == b"-":
+            raise CacheUnavailable(payload.decode("utf-8", "replace"))
+        if kind == b":":
+            return int(payload)
+        if kind == b"$":
+            length = int(payload)
+            if length < 0:
+                return None
+            data = self.reader.read(length + 2)
+            if len(data) != length + 2:
+                raise ConnectionError("缓存服务连接已断开")
+            return data[:-2]
+        if kind == b"*":
+            length = int(payload)
+            return None if length < 0 else [self._read_reply() for _ in range(length)]
+        raise ConnectionError(f"无法解析的缓存服务回复: {line[:32]!r}")
+
+    def execute(self, commands: Sequence[Sequence[Any]]) -> List[Any]:
+        self.sock.sendall(b"".join(self._encode(command) for command in commands))
+        return [self._read_reply() for _ in commands]
+
+    def close(self) -> None:
+        try:
+            self.reader.close()
+            self.sock.close()
+        except OSError:
+            pass
+
+
+# HMAC-SHA256签名的长度
+_SIGNATURE_SIZE = 32
+
+
+class RedisBackend(CacheBackend):
+    """
+    Redis协议的共享缓存后端，通过Unix socket或TCP连接Redis（或兼容Redis协议的服务）
+    值使用pickle序列化，并在前面加上HMAC-SHA256签名（所有worker需配置相同的secret）；
+    读取时先校验签名，能写入缓存服务但不知道secret的一方无法让worker反序列化任意数据。
+    缓存服务不可用时读取视为未命中、写入被忽略，并在 retry_interval 秒内不再尝试连接，
+    请求照常访问数据库
+    """
+
+    def __init__(
+        self,
+        url: str,
+        prefix: str = "",
+        timeout: float = 0.5,
+        retry_interval: float = 5.0,
+        max_idle: int = 16,
+        secret: Optional[str] = None,
+    ):
+        parts = urlsplit(url)
+        query = parse_qs(parts.query)
+        if parts.scheme == "unix":
+            self.address: Any = parts.path
+            self.family = socket.AF_UNIX
+            db = query.get("db", ["0"])[0]
+        elif parts.scheme == "redis":
+            self.address = (parts.hostname or "localhost", parts.port or 6379)
+            self.family = socket.AF_INET
+            db = parts.path.lstrip("/") or query.get("db", ["0"])[0]
+        else:
+            raise ValueError(f"不支持的缓存后端地址: {url}")
+        self.db = int(db)
+        self.password = unquote(parts.password) if parts.password else query.get("password", [None])[0]
+        self.prefix = prefix
+        self.timeout = timeout
+        self.retry_interval = retry_interval
+        self._idle: "queue.LifoQueue[_RespConnection]" = queue.LifoQueue(maxsize=max_idle)
+        self._down_until = 0.0
+        self._signing_key = hashlib.sha256(b"cache:" + (secret or settings.SECRET_KEY).encode("utf-8")).digest()
+
+    def _sign(self, data: bytes) -> bytes:
+        return hmac.new(self._signing_key, data, hashlib.sha256).digest()
+
+    def _dumps(self, value: Any) -> bytes:
+        data = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        return self._sign(data) + data
+
+    def _loads(self, raw: bytes) -> Any:
+        """校验签名后反序列化，签名不符时返回MISSING"""
+        signature, data = raw[:_SIGNATURE_SIZE], raw[_SIGNATURE_SIZE:]
+        if not hmac.compare_digest(signature, self._sign(data)):
+            logger.warning("共享缓存中的值签名不符，已忽略")
+            return MISSING
+        return pickle.loads(data)
+
+    def _connect(self) -> _RespConnection:
+        sock = socket.socket(self.family, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        try:
+            sock.connect(self.address)
+            conn = _RespConnection(sock)
+            setup = []
+            if self.password:
+                setup.append(("AUTH", self.password))
+            if self.db:
+                setup.append(("SELECT", self.db))
+            if setup:
+                conn.execute(setup)
+            return conn
+        except Exception:
+            sock.close()
+            raise
+
+    def _execute(self, commands: Sequence[Sequence[Any]]) -> List[Any]:
+        if time.monotonic() < self._down_until:
+            raise CacheUnavailable("缓存服务暂不可用")
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            conn = None
+        try:
+            if conn is None:
+                conn = self._connect()
+            replies = conn.execute(commands)
+        except (OSError, ConnectionError, CacheUnavailable) as e:
+            if conn is not None:
+                conn.close()
+            self._down_until = time.monotonic() + self.retry_interval
+            logger.warning(f"访问缓存服务失败，{self.retry_interval}秒内不再使用共享缓存: {str(e)}")
+            raise CacheUnavailable(str(e)) from e
+        try:
+            self._idle.put_nowait(conn)
+        except queue.Full:
+            conn.close()
+        return replies
+
+    def _key(self, namespace: str, key: str) -> str:
+        return f"{self.prefix}{namespace}:{key}"
+
+    def _tag_key(self, tag: str) -> str:
+        return f"{self.prefix}tag:{tag}"
+
+    def read(self, namespace, keys, tags):
+        names = [self._tag_key(tag) for tag in tags] + [self._key(namespace, key) for key in keys]
+        try:
+            (reply,) = self._execute([("MGET", *names)])
+        except CacheUnavailable:
+            return [MISSING] * len(keys), [None] * len(tags)
+        versions = [int(v) if v is not None else None for v in reply[: len(tags)]]
+        values = []
+        for raw in reply[len(tags):]:
+            if raw is None:
+                values.append(MISSING)
+                continue
+            try:
+                values.append(self._loads(raw))
+            except Exception:
+                values.append(MISSING)
+        return values, versions
+
+    def write(self, namespace, items, ttl=None):
+        commands = []
+        for key, value in items.items():
+            command = ["SET", self._key(namespace, key), self._dumps(value)]
+            if ttl:
+                command += ["PX", max(1, int(ttl * 1000))]
+            commands.append(command)
+        if commands:
+            try:
+                self._execute(commands)
+            except CacheUnavailable:
+                pass
+
+    def delete(self, namespace, keys):
+        if keys:
+            try:
+                self._execute([("DEL", *(self._key(namespace, key) for key in keys))])
+            except CacheUnavailable:
+                logger.error(f"清除共享缓存失败，其他worker可能在TTL内读到旧数据: {namespace}")
+
+    def bump(self, tag, ttl=None):
+        commands = [("INCR", self._tag_key(tag))]
+        if ttl:
+            commands.append(("PEXPIRE", self._tag_key(tag), max(1, int(ttl * 1000))))
+        try:
+            self._execute(commands)
+        except CacheUnavailable:
+            logger.error(f"递增缓存标签版本失败，其他worker可能在TTL内读到旧数据: {tag}")
+
+    def close(self):
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+
+
+def create_cache_backend(url: str) -> CacheBackend:
+    """根据地址创建缓存后端"""
+    if not url or url.startswith("memory:"):
+        return MemoryBackend()
+    return RedisBackend(
+        url,
+        prefix=settings.CACHE_KEY_PREFIX,
+        timeout=settings.CACHE_SOCKET_TIMEOUT,
+        retry_interval=settings.CACHE_RETRY_INTERVAL,
+    )
+
+
+_backend: Optional[CacheBackend] = None
+_backend_lock = threading.Lock()
+
+
+def get_cache_backend() -> CacheBackend:
+    """获取全局缓存后端，首次使用时按配置创建"""
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                _backend = create_cache_backend(settings.CACHE_BACKEND_URL)
+    return _backend
+
+
+def set_cache_backend(backend: CacheBackend) -> CacheBackend:
+    """替换全局缓存后端（测试或启动时使用），返回原后端"""
+    global _backend
+    previous = get_cache_backend()
+    _backend = backend
+    for cache in _caches:
+        backend.configure(cache.namespace, cache.maxsize)
+    return previous
+
+
+def invalidate_tag(tag: str) -> None:
+    """使带有该标签的所有缓存条目失效"""
+    get_cache_backend().bump(tag)
+
+
+_caches: List["Cache"] = []
+
+
+class Cache:
+    """
+    带命名空间的缓存
+    键可以是任意可哈希对象，转换为字符串后存入后端；ttl为默认有效期（秒），
+    maxsize只对进程内后端生效，maxsize或ttl为0时不缓存（get总是未命中，set被忽略）
+    """
+
+    def __init__(self, namespace: str, maxsize: int = 10000, ttl: Optional[float] = None, tags: Sequence[str] = ()):
+        self.namespace = namespace
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.tags = (namespace,) + tuple(tags)
+        self.enabled = maxsize > 0 and (ttl is None or ttl > 0)
+        self.hits = 0
+        self.misses = 0
+        _caches.append(self)
+        if _backend is not None:
+            _backend.configure(namespace, maxsize)
+
+    @property
+    def backend(self) -> CacheBackend:
+        backend = _backend
+        if backend is None:
+            backend = get_cache_backend()
+            backend.configure(self.namespace, self.maxsize)
+        return backend
+
+    @staticmethod
+    def _key(key: Hashable) -> str:
+        if isinstance(key, tuple):
+            return ":".join(str(part) for part in key)
+        return str(key)
+
+    def _key_tag(self, key: str) -> str:
+        """单个键的标签，delete时递增"""
+        return f"{self.namespace}#{key}"
+
+    def _read_versions(
+        self, keys: Sequence[Hashable], read_entries: bool = True
+    ) -> Tuple[List[Any], List[Tuple[Optional[int], ...]]]:
+        """
+        在一次往返中读取多个键的条目和版本号（标签版本号加上键自身的版本号）
+        read_entries为False时只读取版本号，条目均为MISSING
+        """
+        names = [self._key(key) for key in keys]
+        entries, versions = self.backend.read(
+            self.namespace, names if read_entries else [], self.tags + tuple(self._key_tag(name) for name in names)
+        )
+        shared = tuple(versions[: len(self.tags)])
+        if not read_entries:
+            entries = [MISSING] * len(keys)
+        return entries, [shared + (version,) for version in versions[len(self.tags):]]
+
+    def _read(self, keys: Sequence[Hashable]) -> Tuple[List[Any], Dict[Hashable, Tuple[Optional[int], ...]]]:
+        """读取多个键，返回值（未命中或版本过期为MISSING）和各键读取时的版本号"""
+        if not self.enabled:
+            self.misses += len(keys)
+            return [MISSING] * len(keys), {}
+        entries, versions = self._read_versions(keys)
+        values = []
+        for entry, version in zip(entries, versions):
+            if entry is not MISSING and entry[0] == version:
+                self.hits += 1
+                values.append(entry[1])
+            else:
+                self.misses += 1
+                values.append(MISSING)
+        return values, dict(zip(keys, versions))
+
+    def _write(
+        self, items: Dict[Hashable, Any], versions: Dict[Hashable, Tuple[Optional[int], ...]], ttl: Optional[float]
+    ) -> None:
+        if self.enabled and items:
+            self.backend.write(
+                self.namespace,
+                {self._key(key): (versions[key], value) for key, value in items.items()},
+                ttl=ttl if ttl is not None else self.ttl,
+            )
+
+    def get(self, key: Hashable, default: Any = MISSING) -> Any:
+        """获取缓存值，未命中时返回default"""
+        value = self._read([key])[0][0]
+        return default if value is MISSING else value
+
+    def get_many(self, keys: Iterable[Hashable]) -> Dict[Hashable, Any]:
+        """批量获取，只返回命中的键"""
+        keys = list(keys)
+        if not keys:
+            return {}
+        values, _ = self._read(keys)
+        return {key: value for key, value in zip(keys, values) if value is not MISSING}
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        """写入缓存值，ttl未指定时使用默认有效期"""
+        self.set_many({key: value}, ttl=ttl)
+
+    def set_many(self, items: Dict[Hashable, Any], ttl: Optional[float] = None) -> None:
+        """
+        批量写入，条目记下写入时的标签版本号
+        写入的是未命中后从数据库加载的数据时，应使用 get_or_set / get_many_or_set，以读取时的版本号写入
+        """
+        if self.enabled and items:
+            _, versions = self._read_versions(list(items), read_entries=False)
+            self._write(items, dict(zip(items, versions)), ttl)
+
+    def get_or_set(self, key: Hashable, loader, ttl: Optional[float] = None) -> Any:
+        """
+        获取缓存值，未命中时调用loader生成并写入
+        写入的条目使用读取时的标签版本号，loader执行期间标签失效时该条目不会被后续读取采用
+        """
+        values, versions = self._read([key])
+        value = values[0]
+        if value is MISSING:
+            value = loader()
+            self._write({key: value}, versions, ttl)
+        return value
+
+    def get_many_or_set(self, keys: Iterable[Hashable], loader, ttl: Optional[float] = None) -> Dict[Hashable, Any]:
+        """
+        批量获取，未命中的键调用 loader(未命中的键列表) 加载，loader返回 键 -> 值（不存在的键不返回）
+        与get_or_set相同，加载的条目使用读取时的标签版本号写入，只返回命中和加载到的键
+        """
+        keys = list(keys)
+        if not keys:
+            return {}
+        values, versions = self._read(keys)
+        result = {key: value for key, value in zip(keys, values) if value is not MISSING}
+        missing = [key for key in keys if key not in result]
+        if missing:
+            loaded = loader(missing)
+            self._write(loaded, versions, ttl)
+            result.update(loaded)
+        return result
+
+    def delete(self, *keys: Hashable) -> None:
+        """
+        删除缓存值，并递增这些键的版本号：其他请求在删除前读取、删除后写入的旧数据不会被采用
+        键版本号的有效期与条目相同，过期前写入的条目也已过期
+        """
+        if self.enabled and keys:
+            names = [self._key(key) for key in keys]
+            self.backend.delete(self.namespace, names)
+            for name in names:
+                self.backend.bump(self._key_tag(name), ttl=self.ttl)
+
+    def clear(self) -> None:
+        """使命名空间中的所有条目失效（递增命名空间标签的版本号，保留命中统计）"""
+        if self.enabled:
+            self.backend.bump(self.namespace)
+
+    def stats(self) -> Dict[str, Any]:
+        """缓存统计信息，共享后端无法统计条目数，size为None"""
+        total = self.hits + self.misses
+        return {
+            "size": self.backend.size(self.namespace) if self.enabled else 0,
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
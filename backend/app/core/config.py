@@ -11,6 +11,10 @@ class Settings(BaseSettings):
     SECRET_KEY: str = secrets.token_urlsafe(32)
     # 60 minutes * 24 hours * 8 days = 8 days
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 * 24 * 8
+    TOKEN_CACHE_SIZE: int = int(os.getenv("TOKEN_CACHE_SIZE", "10000"))  # 已校验令牌缓存的最大条目数，0表示不缓存
+    # 密码哈希配置
+    BCRYPT_ROUNDS: int = int(os.getenv("BCRYPT_ROUNDS", "12"))  # bcrypt计算轮数（成本因子），测试环境可调低，最小为4
+    PASSWORD_HASH_WORKERS: int = int(os.getenv("PASSWORD_HASH_WORKERS", "0"))  # 密码哈希线程池大小，0表示使用CPU核数
     # CORS配置
     CORS_ORIGINS: List[AnyHttpUrl] = ["http://localhost:3000", "http://localhost:5173"]
 
@@ -44,6 +48,17 @@ class Settings(BaseSettings):
         if self.DATABASE_TYPE == "oracle" and all([self.ORACLE_USER, self.ORACLE_PASSWORD, self.ORACLE_SERVICE]):
             return f"oracle+cx_oracle://{self.ORACLE_USER}:{self.ORACLE_PASSWORD}@{self.ORACLE_HOST}:{self.ORACLE_PORT}/?service_name={self.ORACLE_SERVICE}"
         return self.SQLITE_DATABASE_URI
+
+    @property
+    def ASYNC_SQLALCHEMY_DATABASE_URI(self) -> Optional[str]:
+        """
+        异步引擎使用的数据库URL
+        SQLite使用aiosqlite驱动；SQLAlchemy 1.4没有Oracle的异步方言，返回None时异步接口改用线程池执行
+        """
+        uri = self.SQLALCHEMY_DATABASE_URI
+        if uri.startswith("sqlite://"):
+            return uri.replace("sqlite://", "sqlite+aiosqlite://", 1)
+        return None
     
     # Casbin配置
     CASBIN_MODEL_PATH: str = "app/core/rbac_model.conf"
@@ -54,6 +69,66 @@ class Settings(BaseSettings):
     DB_POOL_TIMEOUT: int = int(os.getenv("DB_POOL_TIMEOUT", "30"))  # 获取连接超时时间（秒），默认30
     DB_POOL_RECYCLE: int = int(os.getenv("DB_POOL_RECYCLE", "3600"))  # 连接回收时间（秒），默认3600（1小时）
     
+    # SQLite连接参数（每个新连接建立时通过PRAGMA设置）
+    SQLITE_PRAGMAS_ENABLED: bool = os.getenv("SQLITE_PRAGMAS_ENABLED", "true").lower() == "true"  # 是否应用下面的PRAGMA配置，默认开启
+    SQLITE_JOURNAL_MODE: str = os.getenv("SQLITE_JOURNAL_MODE", "WAL")  # 日志模式，WAL允许读写并发
+    SQLITE_SYNCHRONOUS: str = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")  # 同步级别，WAL模式下NORMAL不会损坏数据库
+    SQLITE_BUSY_TIMEOUT: int = int(os.getenv("SQLITE_BUSY_TIMEOUT", "5000"))  # 数据库被锁时的等待时间（毫秒），默认5000
+    SQLITE_MMAP_SIZE: int = int(os.getenv("SQLITE_MMAP_SIZE", "268435456"))  # 内存映射读取的大小（字节），默认256MB
+    SQLITE_CACHE_SIZE: int = int(os.getenv("SQLITE_CACHE_SIZE", "-65536"))  # 页缓存大小，负数表示KB，默认64MB
+    SQLITE_TEMP_STORE: str = os.getenv("SQLITE_TEMP_STORE", "MEMORY")  # 临时表和索引的存放位置
+    
+    # Oracle连接参数
+    ORACLE_ARRAYSIZE: int = int(os.getenv("ORACLE_ARRAYSIZE", "500"))  # 每次往返读取的行数，SQLAlchemy默认为50
+    ORACLE_PREFETCHROWS: int = int(os.getenv("ORACLE_PREFETCHROWS", "501"))  # 执行查询时随响应预取的行数，cx_Oracle默认为2
+    ORACLE_STMT_CACHE_SIZE: int = int(os.getenv("ORACLE_STMT_CACHE_SIZE", "100"))  # 每个连接缓存的语句数，cx_Oracle默认为20
+    DB_BULK_BATCH_SIZE: int = int(os.getenv("DB_BULK_BATCH_SIZE", "1000"))  # 批量写入时每条executemany语句的行数，默认1000
+    
+    # 只读副本配置
+    READ_DATABASE_URI: Optional[str] = os.getenv("READ_DATABASE_URI")  # 只读副本（如Oracle备库）的连接URL，未配置时只读接口使用主库
+    READ_REPLICA_RETRY_INTERVAL: int = int(os.getenv("READ_REPLICA_RETRY_INTERVAL", "30"))  # 副本连接失败后改用主库的时间（秒），默认30
+    READ_YOUR_WRITES_WINDOW: int = int(os.getenv("READ_YOUR_WRITES_WINDOW", "5"))  # 用户写操作后其读请求继续使用主库的时间（秒），默认5
+    
+    # 日志配置
+    LOG_LEVEL: str = os.getenv("LOG_LEVEL", "INFO")  # 根日志级别
+    LOG_FILE: str = os.getenv("LOG_FILE", os.path.abspath(os.path.join(BASE_DIR, "..", "..", "backend.log")))  # 日志文件路径
+    LOG_MAX_BYTES: int = int(os.getenv("LOG_MAX_BYTES", "10485760"))  # 单个日志文件大小上限，默认10MB
+    LOG_BACKUP_COUNT: int = int(os.getenv("LOG_BACKUP_COUNT", "5"))  # 保留的历史日志文件数，默认5
+    LOG_QUEUE_ENABLED: bool = os.getenv("LOG_QUEUE_ENABLED", "true").lower() == "true"  # 是否通过队列异步写日志，默认开启
+    LOG_JSON_FORMAT: bool = os.getenv("LOG_JSON_FORMAT", "false").lower() == "true"  # 是否输出JSON行格式，默认关闭
+    
+    # 缓存后端配置
+    CACHE_BACKEND_URL: str = os.getenv("CACHE_BACKEND_URL", "memory://")  # memory://为进程内缓存；多worker部署时使用unix:///path/redis.sock或redis://host:6379/0共享缓存，值以SECRET_KEY签名，各worker需配置相同的SECRET_KEY
+    CACHE_KEY_PREFIX: str = os.getenv("CACHE_KEY_PREFIX", "taizhang:")  # 共享缓存中键的前缀，多个系统共用一个缓存服务时区分
+    CACHE_SOCKET_TIMEOUT: float = float(os.getenv("CACHE_SOCKET_TIMEOUT", "0.5"))  # 访问共享缓存的超时时间（秒），默认0.5
+    CACHE_RETRY_INTERVAL: float = float(os.getenv("CACHE_RETRY_INTERVAL", "5"))  # 共享缓存访问失败后直接查库的时间（秒），默认5
+    
+    # 权限缓存配置
+    CASBIN_CACHE_SIZE: int = int(os.getenv("CASBIN_CACHE_SIZE", "10000"))  # 权限判定缓存的最大条目数，0表示不缓存
+    CASBIN_CACHE_TTL: int = int(os.getenv("CASBIN_CACHE_TTL", "600"))  # 权限缓存的有效期（秒），策略变更后旧版本的条目在此时间后由共享缓存淘汰，0表示不缓存
+    CASBIN_WATCHER_ENABLED: bool = os.getenv("CASBIN_WATCHER_ENABLED", "true").lower() == "true"  # 是否在多个worker间同步权限策略，默认开启
+    CASBIN_POLICY_SYNC_INTERVAL: float = float(os.getenv("CASBIN_POLICY_SYNC_INTERVAL", "2"))  # 检查策略版本的间隔（秒），默认2
+    
+    # 当前用户缓存配置
+    USER_CACHE_TTL: int = int(os.getenv("USER_CACHE_TTL", "30"))  # 认证用户缓存的有效期（秒），0表示不缓存
+    
+    # 引用实体缓存配置（用户、团队、模板、工作流、角色的显示名）
+    REFERENCE_CACHE_TTL: int = int(os.getenv("REFERENCE_CACHE_TTL", "300"))  # 引用实体缓存的有效期（秒），0表示不缓存
+    REFERENCE_CACHE_SIZE: int = int(os.getenv("REFERENCE_CACHE_SIZE", "10000"))  # 每类实体缓存的最大条目数
+    
+    # 统计数据缓存配置
+    STATISTICS_CACHE_TTL: int = int(os.getenv("STATISTICS_CACHE_TTL", "60"))  # 系统概览计数的缓存有效期（秒），0表示不缓存
+    
+    # 监控指标配置
+    METRICS_ENABLED: bool = os.getenv("METRICS_ENABLED", "true").lower() == "true"  # 是否采集请求指标并开放/metrics，默认开启
+    DB_QUERY_STATS_ENABLED: bool = os.getenv("DB_QUERY_STATS_ENABLED", "true").lower() == "true"  # 是否在响应头中返回SQL语句数和数据库耗时，默认开启
+    
+    # 慢查询记录配置
+    SLOW_QUERY_LOG_ENABLED: bool = os.getenv("SLOW_QUERY_LOG_ENABLED", "false").lower() == "true"  # 是否记录慢查询，默认关闭
+    SLOW_QUERY_THRESHOLD_MS: int = int(os.getenv("SLOW_QUERY_THRESHOLD_MS", "500"))  # 超过该耗时（毫秒）的语句视为慢查询，默认500
+    SLOW_QUERY_BUFFER_SIZE: int = int(os.getenv("SLOW_QUERY_BUFFER_SIZE", "200"))  # 保留的最近慢查询条数，默认200
+    SLOW_QUERY_EXPLAIN: bool = os.getenv("SLOW_QUERY_EXPLAIN", "true").lower() == "true"  # 是否为慢SELECT语句抓取执行计划，默认开启
+    
     class Config:
         case_sensitive = True
         env_file = ".env"
@@ -10,6 +10,7 @@ from app import models, schemas
 from app.core import security
 from app.core.config import settings
 from app.db.session import get_db
+from app.services import user_cache_service
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl=f"{settings.API_V1_STR}/auth/login")
 
@@ -21,17 +22,16 @@ def get_current_user(
     获取当前用户
     """
     try:
-        payload = jwt.decode(
-            token, settings.SECRET_KEY, algorithms=[security.ALGORITHM]
-        )
-        token_data = schemas.TokenPayload(**payload)
+        # 已校验过的令牌直接从缓存取载荷
+        token_data = security.decode_access_token(token)
     except (jwt.JWTError, ValidationError):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="无法验证凭据",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    user = db.query(models.User).filter(models.User.id == token_data.sub).first()
+    # 认证用户缓存，命中时不查询数据库
+    user = user_cache_service.get_user(db, int(token_data.sub)) if token_data.sub and token_data.sub.isdigit() else None
     if not user:
         raise HTTPException(status_code=404, detail="用户不存在")
     if not user.is_active:
@@ -69,11 +69,11 @@ def check_permissions(
     """
     检查用户是否有权限执行操作
     """
-    from app.services.casbin_service import enforcer
+    from app.services.casbin_service import check_permission
     
     # 超级管理员拥有所有权限
     if current_user.is_superuser:
         return True
     
-    # 使用Casbin检查权限
-    return enforcer.enforce(str(current_user.id), resource, action) 
\ No newline at end of file
+    # 使用Casbin检查权限，判定结果走权限缓存
+    return check_permission(str(current_user.id), resource, action) 
\ No newline at end of file
@@ -0,0 +1,125 @@
+import atexit
+import json
+import logging
+import os
+import queue
+import sys
+from datetime import datetime
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from typing import List, Optional
+
+from app.core.config import settings
+
+# 文本日志格式
+LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+LOG_DATE_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+# 当前运行的队列监听器，用于重复初始化和关闭时停止
+_listener: Optional[QueueListener] = None
+
+
+class JsonFormatter(logging.Formatter):
+    """将日志记录格式化为单行JSON"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": datetime.fromtimestamp(record.created).strftime(LOG_DATE_FORMAT),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "process": record.process,
+            "thread": record.threadName,
+        }
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False)
+
+
+def _build_handlers(log_file: str, json_format: bool) -> List[logging.Handler]:
+    """创建控制台和文件处理程序"""
+    if json_format:
+        formatter = JsonFormatter()
+    else:
+        formatter = logging.Formatter(LOG_FORMAT, datefmt=LOG_DATE_FORMAT)
+    
+    # 控制台处理程序
+    console_handler = logging.StreamHandler(sys.stdout)
+    console_handler.setFormatter(formatter)
+    
+    # 文件处理程序
+    file_handler = RotatingFileHandler(
+        log_file,
+        maxBytes=settings.LOG_MAX_BYTES,
+        backupCount=settings.LOG_BACKUP_COUNT,
+        encoding="utf-8",
+    )
+    file_handler.setFormatter(formatter)
+    
+    return [console_handler, file_handler]
+
+
+def stop_logging() -> None:
+    """
+    停止队列监听器，并写出队列中剩余的日志
+    之后的日志改为由处理程序直接同步写出，避免停止后记录的日志丢失
+    """
+    global _listener
+    if _listener is None:
+        return
+    
+    _listener.stop()
+    logger = logging.getLogger()
+    for handler in logger.handlers[:]:
+        if isinstance(handler, QueueHandler):
+            logger.removeHandler(handler)
+    for handler in _listener.handlers:
+        logger.addHandler(handler)
+    _listener = None
+
+
+def setup_logging(
+    log_file: Optional[str] = None,
+    use_queue: Optional[bool] = None,
+    json_format: Optional[bool] = None,
+) -> None:
+    """
+    配置根日志记录器
+    队列模式下请求线程只把日志记录放入内存队列，
+    由后台监听线程负责格式化、写文件和日志轮转
+    """
+    log_file = log_file or settings.LOG_FILE
+    use_queue = settings.LOG_QUEUE_ENABLED if use_queue is None else use_queue
+    json_format = settings.LOG_JSON_FORMAT if json_format is None else json_format
+    
+    # 获取根目录的日志记录器
+    logger = logging.getLogger()
+    logger.setLevel(settings.LOG_LEVEL)
+    
+    # 清除现有的处理程序
+    stop_logging()
+    for handler in logger.handlers[:]:
+        logger.removeHandler(handler)
+        handler.close()
+    
+    handlers = _build_handlers(log_file, json_format)
+    
+    if use_queue:
+        global _listener
+        log_queue = queue.SimpleQueue()
+        logger.addHandler(QueueHandler(log_queue))
+        _listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+        _listener.start()
+    else:
+        for handler in handlers:
+            logger.addHandler(handler)
+    
+    # 配置第三方库的日志级别
+    logging.getLogger('uvicorn').setLevel(logging.INFO)
+    logging.getLogger('uvicorn.access').setLevel(logging.INFO)
+    logging.getLogger('sqlalchemy.engine').setLevel(logging.WARNING)
+    
+    logging.info("日志系统已初始化，日志文件路径: %s，队列模式: %s", os.path.abspath(log_file), use_queue)
+
+
+# 进程退出时写出队列中剩余的日志
+atexit.register(stop_logging)
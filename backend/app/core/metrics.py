@@ -0,0 +1,168 @@
+import bisect
+import logging
+import threading
+from typing import Callable, Dict, Iterable, List, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 请求耗时直方图的默认分桶（秒）
+DEFAULT_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# 采集器返回的指标: (名称, 类型, 说明, [(标签, 值)])
+Sample = Tuple[Dict[str, str], float]
+MetricFamily = Tuple[str, str, str, List[Sample]]
+
+
+class Histogram:
+    """
+    固定分桶的直方图
+    只保存各分桶的计数、总和与总数，观测操作为O(log n)
+    """
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * (len(self.buckets) + 1)  # 最后一个分桶为+Inf
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        """记录一个观测值"""
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+            self.count += 1
+
+    def snapshot(self) -> Tuple[List[Tuple[str, int]], float, int]:
+        """返回累计分桶计数、总和与总数"""
+        with self._lock:
+            counts = list(self.counts)
+            total_sum = self.sum
+            total_count = self.count
+
+        cumulative = []
+        running = 0
+        for bound, count in zip(self.buckets, counts):
+            running += count
+            cumulative.append((_format_number(bound), running))
+        cumulative.append(("+Inf", running + counts[-1]))
+        return cumulative, total_sum, total_count
+
+
+def _format_number(value: float) -> str:
+    """按Prometheus文本格式输出数字"""
+    return repr(float(value))
+
+
+def _escape_label(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    items = ",".join(f'{key}="{_escape_label(value)}"' for key, value in labels.items())
+    return "{" + items + "}"
+
+
+class MetricsRegistry:
+    """
+    进程内的HTTP请求指标注册表
+    按路由模板（而不是实际路径）聚合，避免路径参数导致标签数量无限增长
+    """
+
+    def __init__(self, latency_buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS):
+        self.latency_buckets = latency_buckets
+        self.latency: Dict[Tuple[str, str], Histogram] = {}
+        self.status_counts: Dict[Tuple[str, str, str], int] = {}
+        self.in_flight = 0
+        self._lock = threading.Lock()
+        self._collectors: List[Callable[[], Iterable[MetricFamily]]] = []
+
+    def register_collector(self, collector: Callable[[], Iterable[MetricFamily]]) -> None:
+        """注册在输出时调用的指标采集器（用于连接池等瞬时状态）"""
+        self._collectors.append(collector)
+
+    def request_started(self) -> None:
+        with self._lock:
+            self.in_flight += 1
+
+    def request_finished(self, method: str, route: str, status: int, duration: float) -> None:
+        """记录一次请求的耗时和状态码"""
+        key = (method, route)
+        histogram = self.latency.get(key)
+        with self._lock:
+            self.in_flight -= 1
+            if histogram is None:
+                histogram = self.latency.setdefault(key, Histogram(self.latency_buckets))
+            status_key = (method, route, str(status))
+            self.status_counts[status_key] = self.status_counts.get(status_key, 0) + 1
+        histogram.observe(duration)
+
+    def reset(self) -> None:
+        """清空已记录的请求指标"""
+        with self._lock:
+            self.latency.clear()
+            self.status_counts.clear()
+
+    def render(self) -> str:
+        """输出Prometheus文本格式的指标"""
+        lines: List[str] = []
+
+        lines.append("# HELP http_request_duration_seconds HTTP请求耗时")
+        lines.append("# TYPE http_request_duration_seconds histogram")
+        for (method, route), histogram in sorted(self.latency.items()):
+            buckets, total_sum, total_count = histogram.snapshot()
+            labels = {"method": method, "route": route}
+            for bound, count in buckets:
+                lines.append(
+                    f"http_request_duration_seconds_bucket{_format_labels({**labels, 'le': bound})} {count}"
+                )
+            lines.append(f"http_request_duration_seconds_sum{_format_labels(labels)} {total_sum}")
+            lines.append(f"http_request_duration_seconds_count{_format_labels(labels)} {total_count}")
+
+        lines.append("# HELP http_requests_total HTTP请求总数")
+        lines.append("# TYPE http_requests_total counter")
+        for (method, route, status), count in sorted(self.status_counts.items()):
+            labels = {"method": method, "route": route, "status": status}
+            lines.append(f"http_requests_total{_format_labels(labels)} {count}")
+
+        lines.append("# HELP http_requests_in_flight 正在处理的HTTP请求数")
+        lines.append("# TYPE http_requests_in_flight gauge")
+        lines.append(f"http_requests_in_flight {self.in_flight}")
+
+        for collector in self._collectors:
+            try:
+                families = list(collector())
+            except Exception as e:
+                logger.warning(f"指标采集失败: {str(e)}")
+                continue
+            for name, metric_type, help_text, samples in families:
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} {metric_type}")
+                for labels, value in samples:
+                    lines.append(f"{name}{_format_labels(labels)} {value}")
+
+        return "\n".join(lines) + "\n"
+
+
+def collect_db_pool() -> List[MetricFamily]:
+    """采集数据库连接池状态"""
+    from app.db.session import get_pool_status
+
+    try:
+        status = get_pool_status()
+    except AttributeError:
+        # 非QueuePool类型的连接池（如NullPool）没有这些状态
+        return []
+
+    return [
+        (f"db_pool_{name}", "gauge", f"数据库连接池状态: {name}", [({}, value)])
+        for name, value in status.items()
+    ]
+
+
+# 全局指标注册表
+metrics_registry = MetricsRegistry()
+metrics_registry.register_collector(collect_db_pool)
@@ -1,15 +1,43 @@
+import asyncio
+import hashlib
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Any, Optional, Union, Dict
+from typing import Any, Optional, Union, Dict, List
 
-from jose import jwt
+from jose import JWTError, jwt
 from passlib.context import CryptContext
+from pydantic import ValidationError
 
 from app.core.config import settings
+from app.schemas.token import TokenPayload
+from app.utils.cache import MISSING, LRUCache
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=settings.BCRYPT_ROUNDS)
 
 ALGORITHM = "HS256"
 
+# 已校验的令牌缓存，键为令牌的SHA-256摘要，条目在令牌过期时失效
+_token_cache = LRUCache(maxsize=settings.TOKEN_CACHE_SIZE)
+
+# bcrypt计算期间会释放GIL，使用线程池即可利用多核；
+# 线程数有上限，避免大量并发登录占满CPU影响其他请求
+_hash_executor: Optional[ThreadPoolExecutor] = None
+_hash_executor_lock = threading.Lock()
+
+
+def _get_hash_executor() -> ThreadPoolExecutor:
+    """获取密码哈希线程池（首次使用时创建）"""
+    global _hash_executor
+    if _hash_executor is None:
+        with _hash_executor_lock:
+            if _hash_executor is None:
+                workers = settings.PASSWORD_HASH_WORKERS or os.cpu_count() or 1
+                _hash_executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="password-hash")
+    return _hash_executor
+
 
 def create_access_token(
     data: Dict[str, Any], expires_delta: Optional[timedelta] = None
@@ -29,15 +57,66 @@ def create_access_token(
     return encoded_jwt
 
 
+def decode_access_token(token: str) -> TokenPayload:
+    """
+    校验JWT访问令牌并返回载荷
+    校验通过的结果缓存到令牌过期为止，重复使用同一令牌时跳过签名校验、解析和载荷验证；
+    校验失败时抛出 JWTError 或 ValidationError，失败结果不缓存
+    """
+    key = hashlib.sha256(token.encode("utf-8")).digest()
+    token_data = _token_cache.get(key)
+    if token_data is not MISSING:
+        return token_data
+
+    payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[ALGORITHM])
+    token_data = TokenPayload(**payload)
+
+    # 没有过期时间的令牌不缓存
+    exp = payload.get("exp")
+    if exp:
+        ttl = exp - time.time()
+        if ttl > 0:
+            _token_cache.set(key, token_data, ttl=ttl)
+    return token_data
+
+
+def get_token_subject(authorization: Optional[str]) -> Optional[str]:
+    """从Authorization请求头中取出令牌的sub（用户ID），令牌缺失或无效时返回None"""
+    if not authorization:
+        return None
+    scheme, _, token = authorization.partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return None
+    try:
+        return decode_access_token(token).sub
+    except (JWTError, ValidationError):
+        return None
+
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """
-    验证密码
+    验证密码（在密码哈希线程池中计算）
     """
-    return pwd_context.verify(plain_password, hashed_password)
+    return _get_hash_executor().submit(pwd_context.verify, plain_password, hashed_password).result()
 
 
 def get_password_hash(password: str) -> str:
     """
-    获取密码哈希
+    获取密码哈希（在密码哈希线程池中计算）
+    """
+    return _get_hash_executor().submit(pwd_context.hash, password).result()
+
+
+def hash_passwords(passwords: List[str]) -> List[str]:
+    """
+    批量计算密码哈希，按线程池大小并行，结果顺序与输入一致
+    """
+    return list(_get_hash_executor().map(pwd_context.hash, passwords))
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """
+    验证密码，不阻塞事件循环
     """
-    return pwd_context.hash(password) 
\ No newline at end of file
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_get_hash_executor(), pwd_context.verify, plain_password, hashed_password)
@@ -1,5 +1,5 @@
 from app.crud.crud_workflow import workflow, workflow_node, workflow_instance, workflow_instance_node
-from app.crud.crud_log import system_log, audit_log
+from app.crud.crud_log import system_log, audit_log, system_log_hourly_stat
 from app.crud.crud_user import user
 from app.crud.crud_team import team
 from app.crud.crud_role import role
@@ -1,16 +1,26 @@
-from typing import Any, Dict, Generic, List, Optional, Type, TypeVar, Union
+from typing import AbstractSet, Any, Dict, Generic, Iterable, List, Optional, Type, TypeVar, Union
 
 from fastapi.encoders import jsonable_encoder
 from pydantic import BaseModel
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, defer
 
-from app.db.session import Base
+from app.db.session import Base, commit_or_flush
 
 ModelType = TypeVar("ModelType", bound=Base)
 CreateSchemaType = TypeVar("CreateSchemaType", bound=BaseModel)
 UpdateSchemaType = TypeVar("UpdateSchemaType", bound=BaseModel)
 
 
+def defer_unrequested(model: Type[Base], fields: Optional[AbstractSet[str]], columns: Iterable[str]) -> List[Any]:
+    """
+    稀疏字段集查询的加载选项：columns中未被请求的大字段（JSON、长文本）延迟加载，不随列表查询读取
+    fields为None（请求全部字段）时返回空列表
+    """
+    if fields is None:
+        return []
+    return [defer(getattr(model, column)) for column in columns if column not in fields]
+
+
 class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
     def __init__(self, model: Type[ModelType]):
         """
@@ -30,8 +40,7 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         obj_in_data = jsonable_encoder(obj_in)
         db_obj = self.model(**obj_in_data)
         db.add(db_obj)
-        db.commit()
-        db.refresh(db_obj)
+        commit_or_flush(db, db_obj)
         return db_obj
 
     def update(
@@ -50,12 +59,11 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
             if field in update_data:
                 setattr(db_obj, field, update_data[field])
         db.add(db_obj)
-        db.commit()
-        db.refresh(db_obj)
+        commit_or_flush(db, db_obj)
         return db_obj
 
     def remove(self, db: Session, *, id: int) -> ModelType:
         obj = db.query(self.model).get(id)
         db.delete(obj)
-        db.commit()
+        commit_or_flush(db)
         return obj 
\ No newline at end of file
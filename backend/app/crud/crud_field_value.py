@@ -1,7 +1,9 @@
-from typing import List, Union, Dict, Any
+from typing import List, Union, Dict, Any, Optional
 from sqlalchemy.orm import Session
 from fastapi.encoders import jsonable_encoder
 from app.crud.base import CRUDBase
+from app.db.bulk import bulk_insert
+from app.db.session import commit_or_flush
 from app.models.field_value import FieldValue
 from app.schemas.field_value import FieldValueCreate, FieldValueUpdate
 
@@ -38,10 +40,24 @@ class CRUDFieldValue(CRUDBase[FieldValue, FieldValueCreate, FieldValueUpdate]):
             
         db_obj = self.model(**obj_in_data)
         db.add(db_obj)
-        db.commit()
-        db.refresh(db_obj)
+        commit_or_flush(db, db_obj)
         return db_obj
 
+    def create_multi(self, db: Session, *, ledger_id: int, values: Dict[int, Optional[str]]) -> List[FieldValue]:
+        """
+        批量创建台账的字段值，values为 字段ID -> 值
+        使用executemany一次写入，返回创建的字段值
+        """
+        if not values:
+            return []
+        bulk_insert(db, self.model.__table__, [
+            {"ledger_id": ledger_id, "field_id": field_id, "value": value}
+            for field_id, value in values.items()
+        ])
+        commit_or_flush(db)
+        created = db.query(self.model).filter(self.model.ledger_id == ledger_id).all()
+        return [fv for fv in created if fv.field_id in values]
+
 
 # 创建CRUD实例，可以通过 crud.field_value 访问
 field_value = CRUDFieldValue(FieldValue)
@@ -3,6 +3,7 @@ from sqlalchemy.orm import Session
 from sqlalchemy import or_
 
 from app.crud.base import CRUDBase
+from app.db.session import commit_or_flush
 from app.models.ledger import Ledger
 from app.schemas.ledger import LedgerCreate, LedgerUpdate
 
@@ -16,8 +17,7 @@ class CRUDLedger(CRUDBase[Ledger, LedgerCreate, LedgerUpdate]):
         db_obj.created_by_id = created_by_id
         db_obj.updated_by_id = updated_by_id
         db.add(db_obj)
-        db.commit()
-        db.refresh(db_obj)
+        commit_or_flush(db, db_obj)
         return db_obj
     
     def update(
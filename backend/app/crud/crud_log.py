@@ -1,44 +1,57 @@
-from typing import List, Optional, Dict, Any
+from typing import AbstractSet, Iterator, List, Optional, Dict, Any
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_, desc
+from sqlalchemy import and_, or_, desc, select, update, insert, delete, func
 from datetime import datetime, timedelta
 
-from app.crud.base import CRUDBase
-from app.models.log import SystemLog, AuditLog
-from app.schemas.log import SystemLogCreate, AuditLogCreate, LogQueryParams
+from app.crud.base import CRUDBase, defer_unrequested
+from app.db.bulk import bulk_insert
+from app.models.log import SystemLog, AuditLog, SystemLogHourlyStat
+from app.schemas.log import SystemLogCreate, AuditLogCreate, LogQueryParams, LogStatsQueryParams
+
+# 列表接口未请求时延迟加载的大字段
+SYSTEM_LOG_DEFERRABLE_COLUMNS = ("message", "details", "user_agent")
 
 
 class CRUDSystemLog(CRUDBase[SystemLog, SystemLogCreate, SystemLogCreate]):
-    def get_multi_by_filter(
-        self, db: Session, *, params: LogQueryParams
-    ) -> List[SystemLog]:
-        """按条件查询系统日志"""
-        query = db.query(SystemLog)
+    @staticmethod
+    def _filter_conditions(params: LogQueryParams) -> List[Any]:
+        """根据查询参数构建过滤条件"""
+        conditions = []
         
-        # 应用过滤条件
         if params.module:
-            query = query.filter(SystemLog.module == params.module)
+            conditions.append(SystemLog.module == params.module)
         
         if params.action:
-            query = query.filter(SystemLog.action == params.action)
+            conditions.append(SystemLog.action == params.action)
         
         if params.level:
-            query = query.filter(SystemLog.level == params.level)
+            conditions.append(SystemLog.level == params.level)
         
         if params.user_id:
-            query = query.filter(SystemLog.user_id == params.user_id)
+            conditions.append(SystemLog.user_id == params.user_id)
         
         if params.resource_type:
-            query = query.filter(SystemLog.resource_type == params.resource_type)
+            conditions.append(SystemLog.resource_type == params.resource_type)
         
         if params.resource_id:
-            query = query.filter(SystemLog.resource_id == params.resource_id)
+            conditions.append(SystemLog.resource_id == params.resource_id)
         
         if params.start_date:
-            query = query.filter(SystemLog.created_at >= params.start_date)
+            conditions.append(SystemLog.created_at >= params.start_date)
         
         if params.end_date:
-            query = query.filter(SystemLog.created_at <= params.end_date)
+            conditions.append(SystemLog.created_at <= params.end_date)
+        
+        return conditions
+
+    def get_multi_by_filter(
+        self, db: Session, *, params: LogQueryParams, fields: Optional[AbstractSet[str]] = None
+    ) -> List[SystemLog]:
+        """按条件查询系统日志，fields为只返回的字段，其余大字段延迟加载"""
+        query = db.query(SystemLog).options(*defer_unrequested(SystemLog, fields, SYSTEM_LOG_DEFERRABLE_COLUMNS))
+        
+        # 应用过滤条件
+        query = query.filter(*self._filter_conditions(params))
         
         # 排序和分页
         query = query.order_by(desc(SystemLog.created_at))
@@ -53,32 +66,33 @@ class CRUDSystemLog(CRUDBase[SystemLog, SystemLogCreate, SystemLogCreate]):
         query = db.query(SystemLog)
         
         # 应用过滤条件
-        if params.module:
-            query = query.filter(SystemLog.module == params.module)
-        
-        if params.action:
-            query = query.filter(SystemLog.action == params.action)
-        
-        if params.level:
-            query = query.filter(SystemLog.level == params.level)
-        
-        if params.user_id:
-            query = query.filter(SystemLog.user_id == params.user_id)
-        
-        if params.resource_type:
-            query = query.filter(SystemLog.resource_type == params.resource_type)
-        
-        if params.resource_id:
-            query = query.filter(SystemLog.resource_id == params.resource_id)
-        
-        if params.start_date:
-            query = query.filter(SystemLog.created_at >= params.start_date)
-        
-        if params.end_date:
-            query = query.filter(SystemLog.created_at <= params.end_date)
+        query = query.filter(*self._filter_conditions(params))
         
         return query.count()
     
+    def stream_by_filter(
+        self,
+        db: Session,
+        *,
+        params: LogQueryParams,
+        batch_size: int = 1000,
+        created_before: Optional[datetime] = None,
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        按条件流式读取系统日志（忽略分页参数）
+        使用服务端游标分批获取，内存占用与日志总量无关
+        created_before为不含的结束时间，与params.end_date（含）二选一
+        """
+        conditions = self._filter_conditions(params)
+        if created_before:
+            conditions.append(SystemLog.created_at < created_before)
+        stmt = select(SystemLog.__table__).where(*conditions).order_by(SystemLog.id)
+        
+        result = db.execute(stmt.execution_options(stream_results=True))
+        for partition in result.mappings().partitions(batch_size):
+            for row in partition:
+                yield dict(row)
+    
     def get_recent_logs(
         self, db: Session, *, days: int = 7, limit: int = 100
     ) -> List[SystemLog]:
@@ -117,6 +131,46 @@ class CRUDSystemLog(CRUDBase[SystemLog, SystemLogCreate, SystemLogCreate]):
 
 
 class CRUDAuditLog(CRUDBase[AuditLog, AuditLogCreate, AuditLogCreate]):
+    def stream_by_filter(
+        self,
+        db: Session,
+        *,
+        params: LogQueryParams,
+        ledger_id: Optional[int] = None,
+        workflow_instance_id: Optional[int] = None,
+        batch_size: int = 1000
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        按条件流式读取审计日志（忽略分页参数）
+        审计日志没有模块、级别和资源字段，只应用操作、用户和时间条件
+        """
+        stmt = select(AuditLog.__table__)
+        
+        if ledger_id:
+            stmt = stmt.where(AuditLog.ledger_id == ledger_id)
+        
+        if workflow_instance_id:
+            stmt = stmt.where(AuditLog.workflow_instance_id == workflow_instance_id)
+        
+        if params.action:
+            stmt = stmt.where(AuditLog.action == params.action)
+        
+        if params.user_id:
+            stmt = stmt.where(AuditLog.user_id == params.user_id)
+        
+        if params.start_date:
+            stmt = stmt.where(AuditLog.created_at >= params.start_date)
+        
+        if params.end_date:
+            stmt = stmt.where(AuditLog.created_at <= params.end_date)
+        
+        stmt = stmt.order_by(AuditLog.id)
+        
+        result = db.execute(stmt.execution_options(stream_results=True))
+        for partition in result.mappings().partitions(batch_size):
+            for row in partition:
+                yield dict(row)
+    
     def get_by_ledger(
         self, db: Session, *, ledger_id: int, limit: int = 100
     ) -> List[AuditLog]:
@@ -161,5 +215,174 @@ class CRUDAuditLog(CRUDBase[AuditLog, AuditLogCreate, AuditLogCreate]):
         return query.all()
 
 
+class CRUDSystemLogHourlyStat(CRUDBase[SystemLogHourlyStat, SystemLogCreate, SystemLogCreate]):
+    # 支持分组统计的维度
+    GROUP_COLUMNS = ("module", "action", "level", "user_id")
+
+    @staticmethod
+    def truncate_to_hour(value: datetime) -> datetime:
+        """将时间截断到所在小时的起始时间"""
+        return value.replace(minute=0, second=0, microsecond=0)
+
+    @staticmethod
+    def _key_conditions(
+        bucket: datetime, module: str, action: str, level: str, user_id: Optional[int]
+    ) -> List[Any]:
+        """构建定位单个汇总分组的条件"""
+        table = SystemLogHourlyStat.__table__
+        return [
+            table.c.bucket == bucket,
+            table.c.module == module,
+            table.c.action == action,
+            table.c.level == level,
+            table.c.user_id.is_(None) if user_id is None else table.c.user_id == user_id,
+        ]
+
+    def increment(
+        self,
+        db: Session,
+        *,
+        bucket: datetime,
+        module: str,
+        action: str,
+        level: str,
+        user_id: Optional[int] = None,
+        amount: int = 1
+    ) -> None:
+        """
+        累加一个小时分组的日志数量（不提交事务）
+        先尝试原地累加，分组不存在时再插入
+        """
+        table = SystemLogHourlyStat.__table__
+        result = db.execute(
+            update(table)
+            .where(*self._key_conditions(bucket, module, action, level, user_id))
+            .values(count=table.c.count + amount)
+        )
+        if result.rowcount == 0:
+            db.execute(
+                insert(table).values(
+                    bucket=bucket,
+                    module=module,
+                    action=action,
+                    level=level,
+                    user_id=user_id,
+                    count=amount,
+                )
+            )
+
+    @staticmethod
+    def _filter_conditions(params: LogStatsQueryParams) -> List[Any]:
+        """根据统计查询参数构建过滤条件"""
+        conditions = []
+        
+        if params.module:
+            conditions.append(SystemLogHourlyStat.module == params.module)
+        
+        if params.action:
+            conditions.append(SystemLogHourlyStat.action == params.action)
+        
+        if params.level:
+            conditions.append(SystemLogHourlyStat.level == params.level)
+        
+        if params.user_id:
+            conditions.append(SystemLogHourlyStat.user_id == params.user_id)
+        
+        # 起始时间所在的小时也计入统计
+        if params.start_date:
+            conditions.append(SystemLogHourlyStat.bucket >= CRUDSystemLogHourlyStat.truncate_to_hour(params.start_date))
+        
+        if params.end_date:
+            conditions.append(SystemLogHourlyStat.bucket <= params.end_date)
+        
+        return conditions
+
+    def get_time_series(
+        self, db: Session, *, params: LogStatsQueryParams
+    ) -> List[Any]:
+        """按小时返回日志数量的时间序列"""
+        total = func.sum(SystemLogHourlyStat.count)
+        return db.query(
+            SystemLogHourlyStat.bucket, total.label("count")
+        ).filter(
+            *self._filter_conditions(params)
+        ).group_by(
+            SystemLogHourlyStat.bucket
+        ).order_by(
+            SystemLogHourlyStat.bucket
+        ).all()
+
+    def get_grouped(
+        self, db: Session, *, params: LogStatsQueryParams, group_by: str
+    ) -> List[Any]:
+        """按指定维度分组统计日志数量"""
+        if group_by not in self.GROUP_COLUMNS:
+            raise ValueError(f"不支持的分组维度: {group_by}")
+        
+        column = getattr(SystemLogHourlyStat, group_by)
+        total = func.sum(SystemLogHourlyStat.count)
+        return db.query(
+            column.label("key"), total.label("count")
+        ).filter(
+            *self._filter_conditions(params)
+        ).group_by(
+            column
+        ).order_by(
+            desc(total)
+        ).all()
+
+    def rebuild(
+        self, db: Session, *, start_date: Optional[datetime] = None, end_date: Optional[datetime] = None
+    ) -> int:
+        """
+        根据system_logs重建指定时间范围内的小时汇总（不提交事务）
+        用于首次部署或修复数据，返回写入的分组数量
+        范围按整小时计算：[start_date所在小时, end_date所在小时)，删除和重新统计使用相同的边界，
+        避免end_date所在小时的汇总被删除后只统计到部分日志
+        """
+        start_bucket = self.truncate_to_hour(start_date) if start_date else None
+        end_bucket = self.truncate_to_hour(end_date) if end_date else None
+        
+        # 删除范围内的旧汇总
+        table = SystemLogHourlyStat.__table__
+        stmt = delete(table)
+        if start_bucket:
+            stmt = stmt.where(table.c.bucket >= start_bucket)
+        if end_bucket:
+            stmt = stmt.where(table.c.bucket < end_bucket)
+        db.execute(stmt)
+        
+        # 流式读取原始日志并在内存中按分组累加
+        counts: Dict[tuple, int] = {}
+        params = LogQueryParams(start_date=start_bucket)
+        for row in system_log.stream_by_filter(db, params=params, created_before=end_bucket):
+            if row["created_at"] is None:
+                continue
+            key = (
+                self.truncate_to_hour(row["created_at"]),
+                row["module"],
+                row["action"],
+                row["level"],
+                row["user_id"],
+            )
+            counts[key] = counts.get(key, 0) + 1
+        
+        if counts:
+            bulk_insert(db, table, [
+                {
+                    "bucket": bucket,
+                    "module": module,
+                    "action": action,
+                    "level": level,
+                    "user_id": user_id,
+                    "count": count,
+                }
+                for (bucket, module, action, level, user_id), count in counts.items()
+            ])
+        
+        return len(counts)
+
+
 system_log = CRUDSystemLog(SystemLog)
-audit_log = CRUDAuditLog(AuditLog) 
\ No newline at end of file
+audit_log = CRUDAuditLog(AuditLog)
+system_log_hourly_stat = CRUDSystemLogHourlyStat(SystemLogHourlyStat) 
\ No newline at end of file
@@ -3,6 +3,7 @@ from sqlalchemy.orm import Session
 from fastapi.encoders import jsonable_encoder
 
 from app.crud.base import CRUDBase
+from app.db.session import commit_or_flush
 from app.models.template import Template
 from app.models.field import Field
 from app.schemas.template import TemplateCreate, TemplateUpdate
@@ -29,8 +30,7 @@ class CRUDTemplate(CRUDBase[Template, TemplateCreate, TemplateUpdate]):
         db_obj.created_by_id = creator_id
         db_obj.updated_by_id = creator_id
         db.add(db_obj)
-        db.commit()
-        db.refresh(db_obj)
+        commit_or_flush(db, db_obj)
         
         # 创建字段并关联到模板
         for field_data in fields:
@@ -39,8 +39,7 @@ class CRUDTemplate(CRUDBase[Template, TemplateCreate, TemplateUpdate]):
             field_obj.template_id = db_obj.id
             db.add(field_obj)
         
-        db.commit()
-        db.refresh(db_obj)
+        commit_or_flush(db, db_obj)
         return db_obj
         
     def update(self, db: Session, *, db_obj: Template, obj_in: Union[TemplateUpdate, Dict[str, Any]], updater_id: int) -> Template:
@@ -60,8 +59,7 @@ class CRUDTemplate(CRUDBase[Template, TemplateCreate, TemplateUpdate]):
                 setattr(db_obj, field, update_data[field])
                 
         db.add(db_obj)
-        db.commit()
-        db.refresh(db_obj)
+        commit_or_flush(db, db_obj)
         return db_obj
 
 template = CRUDTemplate(Template)
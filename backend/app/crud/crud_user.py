@@ -5,7 +5,7 @@ from app.core.security import get_password_hash
 from app.crud.base import CRUDBase
 from app.models.user import User
 from app.schemas.user import UserCreate, UserUpdate
-from app.services.casbin_service import check_permission, get_roles_for_user, get_permissions_for_role
+from app.services.casbin_service import check_permission, get_roles_for_user, get_role_permission_map
 
 class CRUDUser(CRUDBase[User, UserCreate, UserUpdate]):
     def create(self, db: Session, *, obj_in: UserCreate) -> User:
@@ -83,23 +83,13 @@ class CRUDUser(CRUDBase[User, UserCreate, UserUpdate]):
         if "admin" in roles:
             return True
         
-        # 检查每个角色的权限
+        # 检查每个角色的权限：通配符(*:*)、资源通配符(ledger:*)或精确匹配(ledger:view)
+        resource = permission.split(":")[0]
+        candidates = {"*:*", f"{resource}:*", permission}
+        permission_map = get_role_permission_map()
         for role in roles:
-            role_permissions = get_permissions_for_role(role)
-            
-            for p in role_permissions:
-                if len(p) >= 3:
-                    # 通配符匹配: *, *
-                    if p[1] == "*" and p[2] == "*":
-                        return True
-                    
-                    # 资源通配符匹配: ledger, *
-                    if p[1] == permission.split(":")[0] and p[2] == "*":
-                        return True
-                    
-                    # 精确匹配: ledger, view
-                    if p[1] == permission.split(":")[0] and p[2] == permission.split(":")[1]:
-                        return True
+            if not candidates.isdisjoint(permission_map.get(role, ())):
+                return True
         
         return False
 
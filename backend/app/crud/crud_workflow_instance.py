@@ -5,6 +5,7 @@ from datetime import datetime
 from fastapi.encoders import jsonable_encoder
 
 from app.crud.base import CRUDBase
+from app.db.session import commit_or_flush
 from app.models.workflow import (
     WorkflowInstance, WorkflowInstanceNode, WorkflowNode, 
     workflow_node_approvers, ApprovalStatus
@@ -67,8 +68,7 @@ class CRUDWorkflowInstance(CRUDBase[WorkflowInstance, WorkflowInstanceCreate, Wo
         if instance_nodes:
             db_obj.current_node_id = instance_nodes[1].id
         
-        db.commit()
-        db.refresh(db_obj)
+        commit_or_flush(db, db_obj)
         return db_obj
     
     def get_by_ledger(self, db: Session, *, ledger_id: int) -> Optional[WorkflowInstance]:
@@ -174,7 +174,7 @@ class CRUDWorkflowInstance(CRUDBase[WorkflowInstance, WorkflowInstanceCreate, Wo
             # 设置当前审批人为此次操作的用户
             current_node.approver_id = user_id
             db.add(current_node)
-            db.commit()
+            commit_or_flush(db)
             return {
                 "success": True, 
                 "message": "审批记录已添加，等待其他审批人操作", 
@@ -200,7 +200,7 @@ class CRUDWorkflowInstance(CRUDBase[WorkflowInstance, WorkflowInstanceCreate, Wo
             instance.status = "completed"
             instance.completed_at = datetime.now()
             db.add(instance)
-            db.commit()
+            commit_or_flush(db)
             return {"success": True, "message": "审批完成", "workflow_completed": True}
         
         # 下一个节点的实例
@@ -226,8 +226,7 @@ class CRUDWorkflowInstance(CRUDBase[WorkflowInstance, WorkflowInstanceCreate, Wo
         # 更新工作流实例的当前节点
         instance.current_node_id = next_node.id
         db.add(instance)
-        db.commit()
-        db.refresh(instance)  # 刷新实例以确保关系正确加载
+        commit_or_flush(db, instance)  # 刷新实例以确保关系正确加载
         
         return {"success": True, "message": "审批通过", "next_node_id": next_node.id}
     
@@ -291,15 +290,14 @@ class CRUDWorkflowInstance(CRUDBase[WorkflowInstance, WorkflowInstanceCreate, Wo
             if reject_node:
                 instance.current_node_id = reject_node.id
                 db.add(instance)
-                db.commit()
-                db.refresh(instance)  # 刷新实例以确保关系正确加载
+                commit_or_flush(db, instance)  # 刷新实例以确保关系正确加载
                 return {"success": True, "message": "已拒绝，工作流回退", "next_node_id": reject_node.id}
         
         # 如果没有定义拒绝后的跳转，或找不到跳转节点，则完成工作流（拒绝结束）
         instance.status = "rejected"
         instance.completed_at = datetime.now()
         db.add(instance)
-        db.commit()
+        commit_or_flush(db)
         
         return {"success": True, "message": "已拒绝，工作流结束", "workflow_rejected": True}
     
@@ -310,8 +308,7 @@ class CRUDWorkflowInstance(CRUDBase[WorkflowInstance, WorkflowInstanceCreate, Wo
             instance.status = "cancelled"
             instance.completed_at = datetime.now()
             db.add(instance)
-            db.commit()
-            db.refresh(instance)
+            commit_or_flush(db, instance)
         return instance
 
     def delete_workflow_instance(
@@ -324,7 +321,7 @@ class CRUDWorkflowInstance(CRUDBase[WorkflowInstance, WorkflowInstanceCreate, Wo
         instance = db.query(WorkflowInstance).filter(WorkflowInstance.id == instance_id).first()
         if instance:
             db.delete(instance)
-            db.commit()
+            commit_or_flush(db)
 
 
 class CRUDWorkflowInstanceNode(CRUDBase[WorkflowInstanceNode, WorkflowInstanceNodeCreate, WorkflowInstanceNodeUpdate]):
@@ -472,8 +469,7 @@ class CRUDWorkflowInstanceNode(CRUDBase[WorkflowInstanceNode, WorkflowInstanceNo
             node.approver_actions = []
         node.approver_actions.append(action_record)
         
-        db.commit()
-        db.refresh(node)
+        commit_or_flush(db, node)
         return node
     
 # 导出实例
@@ -0,0 +1,30 @@
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from sqlalchemy import Table, insert
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+
+
+def chunked(items: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    """按固定大小切分"""
+    iterator = iter(items)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def bulk_insert(db: Session, table: Table, rows: Iterable[Dict[str, Any]], batch_size: Optional[int] = None) -> int:
+    """
+    批量插入（不提交事务），返回插入的行数
+    每批执行一条 INSERT 的 executemany：cx_Oracle下为数组绑定，一批数据只需一次往返；
+    ORM逐个add再flush时，为了取回主键每行都是一条单独的INSERT
+    """
+    count = 0
+    for chunk in chunked(rows, batch_size or settings.DB_BULK_BATCH_SIZE):
+        db.execute(insert(table), chunk)
+        count += len(chunk)
+    return count
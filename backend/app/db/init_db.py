@@ -137,8 +137,7 @@ def init_db(db: Session) -> None:
             admin_role = crud.role.get_by_name(db, name="admin")
             if admin_role:
                 # 为超级用户添加超级管理员角色
-                e = get_enforcer_instance()
-                e.add_grouping_policy(str(user.id), "admin")
+                add_role_for_user(str(user.id), "admin")
                 logger.info(f"已为超级用户 {user.username} 分配超级管理员角色")
         else:
             logger.info(f"超级用户已存在: {settings.FIRST_SUPERUSER}")
@@ -159,8 +158,7 @@ def create_admin_role(db: Session) -> None:
         logger.info("已创建超级管理员角色")
         
         # 将所有系统权限添加到超级管理员角色
-        e = get_enforcer_instance()
-        e.add_policy("admin", "*", "*")
+        add_permission_for_role("admin", "*", "*")
         logger.info("已为超级管理员角色添加所有权限")
     else:
         logger.info("超级管理员角色已存在")
@@ -0,0 +1,59 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+class QueryStats:
+    """单个请求内执行的SQL语句数量与数据库耗时"""
+
+    __slots__ = ("statements", "duration")
+
+    def __init__(self):
+        self.statements = 0
+        self.duration = 0.0
+
+    @property
+    def duration_ms(self) -> float:
+        return self.duration * 1000
+
+
+# 当前请求的统计对象；同步端点在线程池中执行时会复制上下文，共享同一个对象
+_current_stats: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+
+def get_query_stats() -> Optional[QueryStats]:
+    """获取当前上下文的SQL统计，不在统计范围内时返回None"""
+    return _current_stats.get()
+
+
+@contextmanager
+def track_queries() -> Iterator[QueryStats]:
+    """在代码块内统计SQL语句数量和耗时"""
+    stats = QueryStats()
+    token = _current_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _current_stats.reset(token)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current_stats.get() is not None:
+        conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current_stats.get()
+    if stats is None:
+        return
+    start_times = conn.info.get("query_start_time")
+    if not start_times:
+        return
+    stats.statements += 1
+    stats.duration += time.perf_counter() - start_times.pop()
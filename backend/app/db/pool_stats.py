@@ -0,0 +1,149 @@
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from sqlalchemy import event, exc
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import QueuePool
+
+from app.core.metrics import Histogram
+
+# 等待连接耗时的分桶（秒），上限覆盖默认的 DB_POOL_TIMEOUT
+WAIT_BUCKETS = (0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+# 连接占用时长的分桶（秒）
+HOLD_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _histogram_summary(histogram: Histogram) -> Dict[str, Any]:
+    """直方图的累计分桶，以及按分桶上限估算的分位数"""
+    buckets, total_sum, total_count = histogram.snapshot()
+    summary: Dict[str, Any] = {
+        "buckets": dict(buckets),
+        "sum": total_sum,
+        "count": total_count,
+    }
+    for name, quantile in (("p50", 0.5), ("p95", 0.95), ("p99", 0.99)):
+        value: Optional[float] = None
+        if total_count:
+            target = quantile * total_count
+            for bound, count in buckets:
+                if count >= target:
+                    value = None if bound == "+Inf" else float(bound)
+                    break
+        summary[name] = value
+    return summary
+
+
+class PoolStats:
+    """
+    连接池的等待和占用统计
+    - wait: 从请求连接到拿到连接的耗时（含超时的请求）
+    - hold: 连接从签出到归还的时长，通常对应一个请求的会话
+    - overflow_checkouts: 超出 pool_size 新建溢出连接的次数
+    - timeouts: 等待超过 pool_timeout 而失败的次数
+    """
+
+    def __init__(self):
+        self.wait = Histogram(WAIT_BUCKETS)
+        self.hold = Histogram(HOLD_BUCKETS)
+        self.checkouts = 0
+        self.overflow_checkouts = 0
+        self.timeouts = 0
+        self.max_overflow_in_use = 0
+        self._lock = threading.Lock()
+
+    def record_wait(self, seconds: float, overflow: int, overflowed: bool) -> None:
+        self.wait.observe(seconds)
+        with self._lock:
+            self.checkouts += 1
+            if overflowed:
+                self.overflow_checkouts += 1
+            if overflow > self.max_overflow_in_use:
+                self.max_overflow_in_use = overflow
+
+    def record_timeout(self, seconds: float) -> None:
+        self.wait.observe(seconds)
+        with self._lock:
+            self.timeouts += 1
+
+    def record_hold(self, seconds: float) -> None:
+        self.hold.observe(seconds)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            counters = {
+                "checkouts": self.checkouts,
+                "overflow_checkouts": self.overflow_checkouts,
+                "timeouts": self.timeouts,
+                "max_overflow_in_use": self.max_overflow_in_use,
+            }
+        return {
+            **counters,
+            "wait": _histogram_summary(self.wait),
+            "hold": _histogram_summary(self.hold),
+        }
+
+
+class InstrumentedQueuePool(QueuePool):
+    """
+    记录签出等待时间、溢出连接和超时的QueuePool
+    SQLAlchemy的连接池事件只在拿到连接之后触发（checkout），无法得知等待了多久，
+    所以在 _do_get 外层计时；连接占用时长通过 checkout/checkin 事件记录（见 instrument_pool）
+    """
+
+    stats: Optional[PoolStats] = None
+    _local = threading.local()
+
+    def _do_get(self):
+        # QueuePool._do_get 在竞争时会递归调用自身，只在最外层计时
+        if self.stats is None or getattr(self._local, "active", False):
+            return super()._do_get()
+
+        self._local.active = True
+        overflow_before = self._overflow
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            self.stats.record_timeout(time.perf_counter() - start)
+            raise
+        finally:
+            self._local.active = False
+        overflow = self.overflow()
+        self.stats.record_wait(
+            time.perf_counter() - start,
+            overflow=max(overflow, 0),
+            overflowed=overflow > 0 and self._overflow > overflow_before,
+        )
+        return connection
+
+    def recreate(self):
+        # engine.dispose() 会重建连接池，沿用原来的统计
+        pool = super().recreate()
+        pool.stats = self.stats
+        return pool
+
+
+def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+    connection_record.info["checkout_time"] = time.perf_counter()
+
+
+def instrument_pool(engine: Engine) -> Optional[PoolStats]:
+    """为使用 InstrumentedQueuePool 的引擎开启统计，返回统计对象"""
+    pool = engine.pool
+    if not isinstance(pool, InstrumentedQueuePool):
+        return None
+    if pool.stats is not None:
+        return pool.stats
+
+    stats = PoolStats()
+    pool.stats = stats
+
+    def on_checkin(dbapi_connection, connection_record):
+        start = connection_record.info.pop("checkout_time", None)
+        if start is not None:
+            stats.record_hold(time.perf_counter() - start)
+
+    event.listen(engine, "checkout", _on_checkout)
+    event.listen(engine, "checkin", on_checkin)
+    return stats
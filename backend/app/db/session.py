@@ -1,8 +1,20 @@
-from sqlalchemy import create_engine
+import logging
+import time
+from typing import Any, AsyncGenerator, Callable, Dict, List, Tuple, Union
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import DBAPIError
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import NullPool, StaticPool
+from starlette.concurrency import run_in_threadpool
 
 from app.core.config import settings
+from app.db.pool_stats import InstrumentedQueuePool, instrument_pool
+from app.utils.cache import MISSING, LRUCache
+
+logger = logging.getLogger(__name__)
 
 # 数据库连接池配置参数
 # pool_size: 连接池中保持的连接数，默认5
@@ -11,14 +23,107 @@ from app.core.config import settings
 # pool_recycle: 连接回收时间（秒），防止连接长时间空闲后被数据库关闭，默认3600
 # pool_pre_ping: 每次使用连接前ping一下，确保连接有效
 
-engine = create_engine(
+
+def _is_sqlite(uri: str) -> bool:
+    return uri.startswith("sqlite")
+
+
+def _is_oracle(uri: str) -> bool:
+    return uri.startswith("oracle")
+
+
+def _is_sqlite_memory(uri: str) -> bool:
+    return ":memory:" in uri or "mode=memory" in uri or uri.split("?")[0].rstrip("/") in ("sqlite:", "sqlite+aiosqlite:")
+
+
+def _engine_options(uri: str, is_async: bool = False) -> Dict[str, Any]:
+    """
+    按数据库类型选择连接池
+    SQLite文件库在SQLAlchemy 1.4中默认使用NullPool（每次都新建连接并重新执行PRAGMA），
+    同步引擎改为QueuePool复用连接；内存库只能共享同一个连接，使用StaticPool。
+    aiosqlite的每个连接都有一个非守护的工作线程，池中未关闭的连接会阻止进程退出，
+    所以异步引擎仍使用NullPool，在会话结束时关闭连接。
+    其余情况使用 InstrumentedQueuePool，记录签出等待、溢出和超时（见 get_pool_stats）
+    """
+    options: Dict[str, Any] = {
+        "pool_pre_ping": True,  # 连接前ping，确保连接有效
+        "pool_recycle": settings.DB_POOL_RECYCLE,  # 连接回收时间
+        "echo_pool": False,  # 是否打印连接池日志（调试时设为True）
+    }
+    if _is_sqlite(uri) and _is_sqlite_memory(uri):
+        options["poolclass"] = StaticPool
+        return options
+
+    if _is_sqlite(uri) and is_async:
+        options["poolclass"] = NullPool
+        return options
+    if _is_oracle(uri):
+        # 由cx_Oracle方言设置到每个游标上
+        options["arraysize"] = settings.ORACLE_ARRAYSIZE
+    options["poolclass"] = InstrumentedQueuePool
+    options.update(
+        pool_size=settings.DB_POOL_SIZE,  # 连接池大小
+        max_overflow=settings.DB_MAX_OVERFLOW,  # 最大溢出连接数
+        pool_timeout=settings.DB_POOL_TIMEOUT,  # 获取连接超时时间
+    )
+    return options
+
+
+def get_sqlite_pragmas() -> List[Tuple[str, Any]]:
+    """SQLite连接建立时执行的PRAGMA（按执行顺序）"""
+    return [
+        ("journal_mode", settings.SQLITE_JOURNAL_MODE),
+        ("synchronous", settings.SQLITE_SYNCHRONOUS),
+        ("busy_timeout", settings.SQLITE_BUSY_TIMEOUT),
+        ("mmap_size", settings.SQLITE_MMAP_SIZE),
+        ("cache_size", settings.SQLITE_CACHE_SIZE),
+        ("temp_store", settings.SQLITE_TEMP_STORE),
+    ]
+
+
+def apply_sqlite_pragmas(dbapi_connection, connection_record=None) -> None:
+    """
+    connect事件：为每个新建的SQLite连接设置PRAGMA
+    WAL模式下读不阻塞写，busy_timeout让并发写入等待锁而不是直接报"database is locked"
+    """
+    cursor = dbapi_connection.cursor()
+    try:
+        for name, value in get_sqlite_pragmas():
+            cursor.execute(f"PRAGMA {name}={value}")
+    finally:
+        cursor.close()
+
+
+def apply_oracle_connection_settings(dbapi_connection, connection_record=None) -> None:
+    """
+    connect事件：设置cx_Oracle连接的语句缓存大小
+    缓存命中时同一SQL不需要重新解析，列表、详情等固定语句的接口受益最大
+    """
+    dbapi_connection.stmtcachesize = settings.ORACLE_STMT_CACHE_SIZE
+
+
+def apply_oracle_prefetchrows(conn, cursor, statement, parameters, context, executemany) -> None:
+    """
+    before_cursor_execute事件：设置游标的预取行数
+    小结果集（详情、分页列表）在执行语句的那次往返中就能全部取回，不需要再额外fetch
+    """
+    if not executemany and hasattr(cursor, "prefetchrows"):
+        cursor.prefetchrows = settings.ORACLE_PREFETCHROWS
+
+
+def _configure_engine(engine: Engine, uri: str) -> Engine:
+    if _is_sqlite(uri) and settings.SQLITE_PRAGMAS_ENABLED:
+        event.listen(engine, "connect", apply_sqlite_pragmas)
+    if _is_oracle(uri):
+        event.listen(engine, "connect", apply_oracle_connection_settings)
+        event.listen(engine, "before_cursor_execute", apply_oracle_prefetchrows)
+    instrument_pool(engine)
+    return engine
+
+
+engine = _configure_engine(
+    create_engine(settings.SQLALCHEMY_DATABASE_URI, **_engine_options(settings.SQLALCHEMY_DATABASE_URI)),
     settings.SQLALCHEMY_DATABASE_URI,
-    pool_pre_ping=True,  # 连接前ping，确保连接有效
-    pool_size=settings.DB_POOL_SIZE,  # 连接池大小
-    max_overflow=settings.DB_MAX_OVERFLOW,  # 最大溢出连接数
-    pool_timeout=settings.DB_POOL_TIMEOUT,  # 获取连接超时时间
-    pool_recycle=settings.DB_POOL_RECYCLE,  # 连接回收时间
-    echo_pool=False,  # 是否打印连接池日志（调试时设为True）
 )
 
 # 连接池监控函数（可选，用于调试和监控）
@@ -33,11 +138,18 @@ def get_pool_status():
         "checked_in": pool.checkedin(),
         "checked_out": pool.checkedout(),
         "overflow": pool.overflow(),
-        "invalid": pool.invalid(),
         "max_connections": pool.size() + pool._max_overflow,
         "current_connections": pool.size() + pool.overflow(),
     }
 
+def get_pool_stats():
+    """
+    获取连接池的累计统计：签出等待时间、连接占用时长的直方图，溢出和超时次数
+    用于根据实际负载调整 DB_POOL_SIZE / DB_MAX_OVERFLOW；未启用统计的连接池返回None
+    """
+    stats = getattr(engine.pool, "stats", None)
+    return stats.snapshot() if stats is not None else None
+
 def log_pool_status():
     """打印连接池状态（用于调试）"""
     status = get_pool_status()
@@ -46,14 +158,181 @@ def log_pool_status():
           f"空闲: {status['checked_in']}, "
           f"溢出: {status['overflow']}, "
           f"当前总连接: {status['current_connections']}/{status['max_connections']}")
+    stats = get_pool_stats()
+    if stats:
+        print(f"[连接池统计] 签出: {stats['checkouts']}, "
+              f"等待p95: {stats['wait']['p95']}s, "
+              f"占用p95: {stats['hold']['p95']}s, "
+              f"溢出连接: {stats['overflow_checkouts']}, "
+              f"超时: {stats['timeouts']}")
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# 只读副本（如Oracle备库），供列表、详情、统计和日志等只读接口使用
+read_engine = None
+ReadSessionLocal = None
+if settings.READ_DATABASE_URI:
+    read_engine = _configure_engine(
+        create_engine(settings.READ_DATABASE_URI, **_engine_options(settings.READ_DATABASE_URI)),
+        settings.READ_DATABASE_URI,
+    )
+    ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
+
+# 副本连接失败后，在此时间点（time.monotonic）之前只读请求直接使用主库
+_replica_unavailable_until = 0.0
+
+# 最近有写操作的用户，窗口期内其只读请求使用主库，保证能读到自己刚写入的数据
+# 记录只在当前进程内有效
+_recent_writers = LRUCache(maxsize=10000, ttl=settings.READ_YOUR_WRITES_WINDOW)
+
 Base = declarative_base()
 
+# 工作单元模式：会话info中的标记，由get_uow_db设置
+UNIT_OF_WORK = "unit_of_work"
+# 工作单元会话中等待事务结束后执行的回调
+AFTER_COMMIT_CALLBACKS = "after_commit_callbacks"
+
+
+def commit_or_flush(db: Session, *instances: Any) -> None:
+    """
+    提交当前修改
+    普通会话立即提交并刷新传入的对象；
+    工作单元会话只flush（获得主键、触发约束检查），并使传入的对象过期以便按需重新加载，
+    事务由请求结束时的get_uow_db统一提交
+    """
+    if db.info.get(UNIT_OF_WORK):
+        db.flush()
+        for instance in instances:
+            db.expire(instance)
+        return
+
+    db.commit()
+    for instance in instances:
+        db.refresh(instance)
+
+
+def run_after_commit(db: Session, callback: Callable[[], Any]) -> None:
+    """
+    事务提交后执行回调，用于清除缓存等
+    工作单元会话中commit_or_flush只flush，此时清除缓存，提交前的并发读取会把旧数据重新写入缓存，
+    因此回调延迟到get_uow_db结束事务之后执行；普通会话在commit_or_flush中已经提交，立即执行
+    """
+    if db.info.get(UNIT_OF_WORK):
+        db.info.setdefault(AFTER_COMMIT_CALLBACKS, []).append(callback)
+    else:
+        callback()
+
+
 # 依赖项，用于获取数据库会话
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close() 
\ No newline at end of file
+        db.close()
+
+
+def get_uow_db():
+    """
+    工作单元模式的数据库会话
+    请求内的服务只flush，接口正常返回后统一提交一次，出现异常时整体回滚
+    """
+    db = SessionLocal()
+    db.info[UNIT_OF_WORK] = True
+    try:
+        yield db
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        # 回滚时同样执行：请求内可能已用未提交的数据填充了缓存
+        callbacks = db.info.pop(AFTER_COMMIT_CALLBACKS, [])
+        db.close()
+        for callback in callbacks:
+            callback()
+
+
+# 异步引擎，供高频只读接口使用，不占用线程池
+# SQLite通过aiosqlite访问；SQLAlchemy 1.4没有Oracle的异步方言，此时async_engine为None，
+# 异步接口退回到线程池中使用同步会话
+async_engine = None
+AsyncSessionLocal = None
+
+if settings.ASYNC_SQLALCHEMY_DATABASE_URI:
+    try:
+        from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+        async_engine = create_async_engine(
+            settings.ASYNC_SQLALCHEMY_DATABASE_URI,
+            **_engine_options(settings.ASYNC_SQLALCHEMY_DATABASE_URI, is_async=True),
+        )
+        _configure_engine(async_engine.sync_engine, settings.ASYNC_SQLALCHEMY_DATABASE_URI)
+        AsyncSessionLocal = sessionmaker(
+            async_engine,
+            class_=AsyncSession,
+            autoflush=False,
+            expire_on_commit=False,  # 提交后仍可在事件循环中读取已加载的属性
+        )
+    except ImportError as e:
+        logger.warning(f"异步数据库驱动不可用，异步接口将使用线程池: {str(e)}")
+
+
+async def get_async_db() -> AsyncGenerator:
+    """
+    异步依赖项，获取数据库会话
+    异步引擎可用时返回AsyncSession，否则返回同步会话
+    """
+    if AsyncSessionLocal is None:
+        db = SessionLocal()
+        try:
+            yield db
+        finally:
+            await run_in_threadpool(db.close)
+        return
+
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+async def run_sync(db: Union[Session, "AsyncSession"], fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+    """
+    在会话上执行同步的数据库函数，fn的第一个参数为同步Session
+    AsyncSession通过run_sync在事件循环中执行（IO由异步驱动完成）；
+    同步会话则放到线程池中执行
+    """
+    if isinstance(db, Session):
+        return await run_in_threadpool(fn, db, *args, **kwargs)
+    return await db.run_sync(fn, *args, **kwargs)
+
+
+def mark_user_write(user_id: Any) -> None:
+    """记录用户刚执行过写操作"""
+    if user_id is not None and settings.READ_YOUR_WRITES_WINDOW > 0:
+        _recent_writers.set(str(user_id), True)
+
+
+def has_recent_write(user_id: Any) -> bool:
+    """用户是否在读写一致窗口期内"""
+    return user_id is not None and _recent_writers.get(str(user_id)) is not MISSING
+
+
+def create_read_session(user_id: Any = None) -> Session:
+    """
+    创建只读会话
+    以下情况返回主库会话：未配置副本、用户刚执行过写操作、副本最近连接失败；
+    副本会话会提前获取连接，连接失败时记录日志并在一段时间内改用主库
+    """
+    global _replica_unavailable_until
+
+    if ReadSessionLocal is None or has_recent_write(user_id) or time.monotonic() < _replica_unavailable_until:
+        return SessionLocal()
+
+    db = ReadSessionLocal()
+    try:
+        db.connection()
+    except DBAPIError as e:
+        db.close()
+        _replica_unavailable_until = time.monotonic() + settings.READ_REPLICA_RETRY_INTERVAL
+        logger.warning(f"只读副本不可用，{settings.READ_REPLICA_RETRY_INTERVAL}秒内改用主库: {str(e)}")
+        return SessionLocal()
+    return db
@@ -0,0 +1,167 @@
+import logging
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# 当前请求的ASGI scope，用于在记录慢查询时取出发起请求的路由
+_current_scope: ContextVar[Optional[Dict[str, Any]]] = ContextVar("slow_query_scope", default=None)
+
+# 只对这些语句抓取执行计划，避免EXPLAIN写操作带来的副作用
+EXPLAIN_PREFIXES = ("SELECT", "WITH")
+
+# 记录的SQL语句最大长度
+MAX_STATEMENT_LENGTH = 4000
+
+
+@contextmanager
+def endpoint_scope(scope: Dict[str, Any]) -> Iterator[None]:
+    """在代码块内把慢查询归属到该请求"""
+    token = _current_scope.set(scope)
+    try:
+        yield
+    finally:
+        _current_scope.reset(token)
+
+
+def current_endpoint() -> Optional[str]:
+    """当前请求的 "方法 路由模板"，不在请求内时返回None"""
+    scope = _current_scope.get()
+    if scope is None:
+        return None
+    # 路由匹配后FastAPI会把路由对象写入scope，优先使用路由模板
+    route = scope.get("route")
+    path = getattr(route, "path", None) or scope.get("path")
+    return f"{scope.get('method')} {path}"
+
+
+def redact_parameters(parameters: Any) -> Any:
+    """只保留参数的类型，不记录参数值"""
+    if isinstance(parameters, dict):
+        return {key: type(value).__name__ for key, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return [type(value).__name__ for value in parameters]
+    return type(parameters).__name__
+
+
+def explain_statement(conn, statement: str, parameters: Any) -> Optional[List[str]]:
+    """
+    使用当前连接的方言获取执行计划
+    在原连接上新开一个DBAPI游标执行，不影响原语句的结果集，也不触发SQLAlchemy事件
+    """
+    dialect = conn.dialect.name
+    if not statement.lstrip().upper().startswith(EXPLAIN_PREFIXES):
+        return None
+
+    cursor = conn.connection.cursor()
+    try:
+        if dialect == "sqlite":
+            cursor.execute(f"EXPLAIN QUERY PLAN {statement}", parameters)
+            return [str(row[-1]) for row in cursor.fetchall()]
+        if dialect == "oracle":
+            # EXPLAIN PLAN 不需要绑定参数值，结果写入PLAN_TABLE后用DBMS_XPLAN格式化
+            cursor.execute(f"EXPLAIN PLAN FOR {statement}")
+            cursor.execute("SELECT plan_table_output FROM TABLE(DBMS_XPLAN.DISPLAY())")
+            return [str(row[0]) for row in cursor.fetchall()]
+        if dialect in ("postgresql", "mysql", "mariadb"):
+            cursor.execute(f"EXPLAIN {statement}", parameters)
+            return [" ".join(str(column) for column in row) for row in cursor.fetchall()]
+        return None
+    except Exception as e:
+        return [f"获取执行计划失败: {str(e)}"]
+    finally:
+        cursor.close()
+
+
+class SlowQueryRecorder:
+    """
+    记录耗时超过阈值的SQL语句
+    参数只保留类型；同时记录发起请求的路由和方言的执行计划，
+    最近的记录保存在固定长度的环形缓冲区中，只在当前进程内有效
+    """
+
+    def __init__(self, threshold_ms: float, buffer_size: int, explain: bool = True):
+        self.threshold = threshold_ms / 1000
+        self.explain = explain
+        self._records: deque = deque(maxlen=max(buffer_size, 1))
+        self._lock = threading.Lock()
+        self._targets: List[Any] = []
+
+    def install(self, target: Any = Engine) -> None:
+        """在引擎（默认为所有引擎）上注册游标事件"""
+        if target in self._targets:
+            return
+        event.listen(target, "before_cursor_execute", self._before_cursor_execute)
+        event.listen(target, "after_cursor_execute", self._after_cursor_execute)
+        self._targets.append(target)
+
+    def uninstall(self, target: Any = Engine) -> None:
+        if target not in self._targets:
+            return
+        event.remove(target, "before_cursor_execute", self._before_cursor_execute)
+        event.remove(target, "after_cursor_execute", self._after_cursor_execute)
+        self._targets.remove(target)
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("slow_query_start_time", []).append(time.perf_counter())
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        start_times = conn.info.get("slow_query_start_time")
+        if not start_times:
+            return
+        duration = time.perf_counter() - start_times.pop()
+        if duration < self.threshold:
+            return
+
+        if executemany:
+            rows = len(parameters)
+            redacted = redact_parameters(parameters[0]) if rows else []
+        else:
+            rows = 1
+            redacted = redact_parameters(parameters)
+        plan = None
+        if self.explain and not executemany:
+            plan = explain_statement(conn, statement, parameters)
+
+        record = {
+            "timestamp": datetime.now(),
+            "duration_ms": round(duration * 1000, 3),
+            "statement": statement[:MAX_STATEMENT_LENGTH],
+            "parameters": redacted,
+            "executemany": rows if executemany else None,
+            "endpoint": current_endpoint(),
+            "dialect": conn.dialect.name,
+            "plan": plan,
+        }
+        with self._lock:
+            self._records.append(record)
+        logger.warning(f"慢查询 {record['duration_ms']:.1f}ms [{record['endpoint']}]: {record['statement'][:200]}")
+
+    def records(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """最近的慢查询，按时间倒序"""
+        with self._lock:
+            records = list(self._records)
+        records.reverse()
+        return records[:limit] if limit else records
+
+    def clear(self) -> None:
+        with self._lock:
+            self._records.clear()
+
+
+# 全局慢查询记录器，SLOW_QUERY_LOG_ENABLED开启时在 app.main 中注册
+slow_query_recorder = SlowQueryRecorder(
+    threshold_ms=settings.SLOW_QUERY_THRESHOLD_MS,
+    buffer_size=settings.SLOW_QUERY_BUFFER_SIZE,
+    explain=settings.SLOW_QUERY_EXPLAIN,
+)
@@ -1,49 +1,16 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse, PlainTextResponse
 from app.api.api_v1.api import api_router
 from app.core.config import settings
+from app.core.log_config import setup_logging, stop_logging
+from app.core.metrics import metrics_registry
+from app.db.slow_query import slow_query_recorder
+from app.middleware.metrics import MetricsMiddleware
+from app.middleware.query_stats import QueryStatsMiddleware
+from app.middleware.read_your_writes import ReadYourWritesMiddleware
+from app.middleware.slow_query import SlowQueryMiddleware
 import logging
-import os
-import sys
-from logging.handlers import RotatingFileHandler
-
-# 配置日志
-def setup_logging():
-    # 创建日志格式
-    log_format = logging.Formatter(
-        '%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-        datefmt='%Y-%m-%d %H:%M:%S'
-    )
-    
-    # 获取根目录的日志记录器
-    logger = logging.getLogger()
-    logger.setLevel(logging.INFO)
-    
-    # 清除现有的处理程序
-    for handler in logger.handlers[:]:
-        logger.removeHandler(handler)
-    
-    # 添加控制台处理程序
-    console_handler = logging.StreamHandler(sys.stdout)
-    console_handler.setFormatter(log_format)
-    logger.addHandler(console_handler)
-    
-    # 添加文件处理程序
-    log_file = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'backend.log')
-    file_handler = RotatingFileHandler(
-        log_file,
-        maxBytes=10485760,  # 10MB
-        backupCount=5
-    )
-    file_handler.setFormatter(log_format)
-    logger.addHandler(file_handler)
-    
-    # 配置第三方库的日志级别
-    logging.getLogger('uvicorn').setLevel(logging.INFO)
-    logging.getLogger('uvicorn.access').setLevel(logging.INFO)
-    logging.getLogger('sqlalchemy.engine').setLevel(logging.WARNING)
-    
-    logging.info("日志系统已初始化，日志文件路径: %s", log_file)
 
 # 设置日志
 setup_logging()
@@ -55,6 +22,8 @@ app = FastAPI(
     openapi_url=f"{settings.API_V1_STR}/openapi.json",
     docs_url=f"{settings.API_V1_STR}/docs",
     redoc_url=f"{settings.API_V1_STR}/redoc",
+    # 使用orjson编码响应，比标准库json快得多，并直接支持datetime等类型
+    default_response_class=ORJSONResponse,
 )
 
 # 设置CORS
@@ -66,6 +35,23 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# 设置请求指标采集
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+
+# 设置SQL语句统计
+if settings.DB_QUERY_STATS_ENABLED:
+    app.add_middleware(QueryStatsMiddleware)
+
+# 设置慢查询记录
+if settings.SLOW_QUERY_LOG_ENABLED:
+    slow_query_recorder.install()
+    app.add_middleware(SlowQueryMiddleware)
+
+# 设置只读副本的读写一致保护
+if settings.READ_DATABASE_URI:
+    app.add_middleware(ReadYourWritesMiddleware)
+
 # 包含API路由
 app.include_router(api_router, prefix=settings.API_V1_STR)
 
@@ -74,6 +60,15 @@ async def root():
     logging.info("访问根路径")
     return {"message": "台账管理系统API服务"}
 
+if settings.METRICS_ENABLED:
+    @app.get("/metrics", include_in_schema=False)
+    def metrics():
+        """Prometheus文本格式的监控指标"""
+        return PlainTextResponse(
+            metrics_registry.render(),
+            media_type="text/plain; version=0.0.4; charset=utf-8",
+        )
+
 @app.on_event("startup")
 async def startup_event():
     logging.info("服务启动")
@@ -81,6 +76,8 @@ async def startup_event():
 @app.on_event("shutdown")
 async def shutdown_event():
     logging.info("服务关闭")
+    # 写出日志队列中剩余的日志
+    stop_logging()
 
 if __name__ == "__main__":
     import uvicorn
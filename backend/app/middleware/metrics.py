@@ -0,0 +1,43 @@
+import time
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.metrics import MetricsRegistry, metrics_registry
+
+# 未匹配到任何路由的请求统一使用该标签，避免按原始路径产生大量标签
+UNMATCHED_ROUTE = "<unmatched>"
+
+
+class MetricsMiddleware:
+    """
+    记录每个路由的请求耗时、状态码和并发请求数
+    使用纯ASGI实现，不包装请求/响应对象，额外开销只有一次计时和几次字典操作
+    """
+
+    def __init__(self, app: ASGIApp, registry: MetricsRegistry = metrics_registry):
+        self.app = app
+        self.registry = registry
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        self.registry.request_started()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            duration = time.perf_counter() - start
+            # 路由匹配后FastAPI会把路由对象写入scope，使用路由模板作为标签
+            route = scope.get("route")
+            route_path = getattr(route, "path", None) or UNMATCHED_ROUTE
+            self.registry.request_finished(scope["method"], route_path, status_code, duration)
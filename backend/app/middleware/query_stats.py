@@ -0,0 +1,34 @@
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.db.monitoring import track_queries
+
+
+class QueryStatsMiddleware:
+    """
+    统计每个请求执行的SQL语句数量和数据库耗时
+    通过 Server-Timing 和 X-DB-Queries 响应头返回，便于发现N+1查询
+    流式响应在响应头发出之后执行的语句不计入
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        with track_queries() as stats:
+
+            async def send_wrapper(message: Message) -> None:
+                if message["type"] == "http.response.start":
+                    headers = MutableHeaders(scope=message)
+                    headers.append("X-DB-Queries", str(stats.statements))
+                    headers.append(
+                        "Server-Timing",
+                        f'db;dur={stats.duration_ms:.2f};desc="{stats.statements} queries"',
+                    )
+                await send(message)
+
+            await self.app(scope, receive, send_wrapper)
@@ -0,0 +1,36 @@
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.core.security import get_token_subject
+from app.db.session import mark_user_write
+
+# 不会修改数据的请求方法
+SAFE_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+
+class ReadYourWritesMiddleware:
+    """
+    记录执行写操作的用户
+    请求开始和结束时都记录一次，使写操作进行中和完成后的一段时间内，
+    该用户的只读请求都使用主库（见 app.db.session.create_read_session）
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] in SAFE_METHODS:
+            await self.app(scope, receive, send)
+            return
+
+        authorization = None
+        for name, value in scope["headers"]:
+            if name == b"authorization":
+                authorization = value.decode("latin-1")
+                break
+        user_id = get_token_subject(authorization)
+
+        mark_user_write(user_id)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            mark_user_write(user_id)
@@ -0,0 +1,21 @@
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.db.slow_query import endpoint_scope
+
+
+class SlowQueryMiddleware:
+    """
+    把请求的scope放入上下文，慢查询记录器据此标注发起语句的路由
+    同步端点在线程池中执行时会复制上下文，同样能取到
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        with endpoint_scope(scope):
+            await self.app(scope, receive, send)
@@ -6,4 +6,4 @@ from app.models.field import Field
 from app.models.field_value import FieldValue
 from app.models.workflow import Workflow, WorkflowNode, WorkflowInstance, WorkflowInstanceNode, ApprovalStatus, workflow_node_approvers
 from app.models.ledger import Ledger
-from app.models.log import SystemLog, AuditLog, LogLevel, LogAction 
\ No newline at end of file
+from app.models.log import SystemLog, AuditLog, SystemLogHourlyStat, LogLevel, LogAction 
\ No newline at end of file
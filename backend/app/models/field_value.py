@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, Text
+from sqlalchemy import Column, Integer, String, ForeignKey, Text, Index
 from sqlalchemy.orm import relationship
 
 from app.db.session import Base
@@ -14,4 +14,9 @@ class FieldValue(Base):
     
     # 关系
     ledger = relationship("Ledger", back_populates="field_values")
-    field = relationship("Field", back_populates="field_values") 
\ No newline at end of file
+    field = relationship("Field", back_populates="field_values")
+
+    # 按台账加载字段值、按台账和字段查找单个值
+    __table_args__ = (
+        Index("ix_field_values_ledger_field", "ledger_id", "field_id"),
+    ) 
\ No newline at end of file
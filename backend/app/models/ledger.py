@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, ForeignKey, DateTime, JSON, Boolean
+from sqlalchemy import Column, Integer, String, Text, ForeignKey, DateTime, JSON, Boolean, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 
@@ -41,4 +41,11 @@ class Ledger(Base):
     current_approver = relationship("User", foreign_keys=[current_approver_id])
     field_values = relationship("FieldValue", back_populates="ledger", cascade="all, delete-orphan")
     # workflow = relationship("Workflow", foreign_keys=[workflow_id])
-    audit_logs = relationship("AuditLog", back_populates="ledger", cascade="all, delete-orphan") 
\ No newline at end of file
+    audit_logs = relationship("AuditLog", back_populates="ledger", cascade="all, delete-orphan")
+
+    # 台账列表按团队/模板筛选（可叠加状态、审批状态），按更新时间倒序分页
+    __table_args__ = (
+        Index("ix_ledgers_team_status", "team_id", "status", "approval_status", "updated_at"),
+        Index("ix_ledgers_template_status", "template_id", "status", "approval_status", "updated_at"),
+        Index("ix_ledgers_updated_at", "updated_at"),
+    ) 
\ No newline at end of file
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, ForeignKey, Integer, String, DateTime, Text, JSON
+from sqlalchemy import Column, ForeignKey, Integer, String, DateTime, Text, JSON, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from typing import Dict, Any, Optional
@@ -70,5 +70,31 @@ class AuditLog(Base):
     ledger = relationship("Ledger", foreign_keys=[ledger_id])
     workflow_instance = relationship("WorkflowInstance", foreign_keys=[workflow_instance_id])
 
+    # 台账审计记录按时间排序
+    __table_args__ = (
+        Index("ix_audit_logs_ledger_created", "ledger_id", "created_at"),
+    )
+
+    def __repr__(self):
+        return f"<AuditLog {self.id}: {self.action}>" 
+
+# 系统日志小时汇总模型
+# 由日志写入时增量维护，仪表盘统计只读取此表，避免对system_logs全表分组
+class SystemLogHourlyStat(Base):
+    __tablename__ = "system_log_hourly_stats"
+
+    id = Column(Integer, primary_key=True, index=True)
+    bucket = Column(DateTime, nullable=False)  # 小时分桶的起始时间
+    module = Column(String, nullable=False)
+    action = Column(String, nullable=False)
+    level = Column(String, nullable=False)
+    user_id = Column(Integer, nullable=True)  # 不设外键，删除用户后保留历史统计
+    count = Column(Integer, nullable=False, default=0)
+
+    # 统计查询总是对count求和，因此并发写入产生的重复分组行不影响结果
+    __table_args__ = (
+        Index("ix_system_log_hourly_stats_key", "bucket", "module", "action", "level", "user_id"),
+    )
+
     def __repr__(self):
-        return f"<AuditLog {self.id}: {self.action}>" 
\ No newline at end of file
+        return f"<SystemLogHourlyStat {self.bucket} {self.module}.{self.action}: {self.count}>"
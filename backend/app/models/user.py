@@ -14,7 +14,7 @@ class User(Base):
     department = Column(String)
     is_active = Column(Boolean, default=True)
     is_superuser = Column(Boolean, default=False)
-    team_id = Column(Integer, ForeignKey("teams.id"), nullable=True)
+    team_id = Column(Integer, ForeignKey("teams.id"), nullable=True, index=True)
     last_password_change = Column(DateTime, default=datetime.now)
     
     # 关系
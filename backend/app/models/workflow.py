@@ -1,4 +1,4 @@
-from sqlalchemy import Column, ForeignKey, Integer, String, Boolean, DateTime, Text, JSON, Enum, Table
+from sqlalchemy import Column, ForeignKey, Integer, String, Boolean, DateTime, Text, JSON, Enum, Table, Index
 from sqlalchemy.orm import relationship
 import uuid
 from datetime import datetime
@@ -69,6 +69,11 @@ class WorkflowNode(Base):
     approvers = relationship("User", secondary=workflow_node_approvers, backref="workflow_nodes")
     instance_nodes = relationship("WorkflowInstanceNode", back_populates="workflow_node")
 
+    # 按工作流顺序读取节点、查找下一节点
+    __table_args__ = (
+        Index("ix_workflow_nodes_workflow_order", "workflow_id", "order_index"),
+    )
+
     def __repr__(self):
         return f"<WorkflowNode {self.name}>"
 
@@ -132,5 +137,10 @@ class WorkflowInstanceNode(Base):
     workflow_node = relationship("WorkflowNode", back_populates="instance_nodes")
     approver = relationship("User", foreign_keys=[approver_id])
 
+    # 按实例查找当前待审批节点
+    __table_args__ = (
+        Index("ix_workflow_instance_nodes_instance_status", "workflow_instance_id", "status"),
+    )
+
     def __repr__(self):
         return f"<WorkflowInstanceNode {self.id}>" 
\ No newline at end of file
@@ -13,5 +13,6 @@ from app.schemas.workflow import (
     WorkflowInstanceNode, WorkflowInstanceNodeCreate, WorkflowInstanceNodeUpdate,
     ApprovalAction, WorkflowNodeApproval, WorkflowNodeRejection
 )
-from app.schemas.log import SystemLog, SystemLogCreate, AuditLog, AuditLogCreate, LogQueryParams
-from app.schemas.field_value import FieldValue, FieldValueCreate, FieldValueUpdate, LedgerItemCreate, LedgerItemUpdate 
\ No newline at end of file
+from app.schemas.log import SystemLog, SystemLogCreate, AuditLog, AuditLogCreate, LogQueryParams, LogStatsQueryParams, LogStatsPoint, LogStatsGroup
+from app.schemas.field_value import FieldValue, FieldValueCreate, FieldValueUpdate, LedgerItemCreate, LedgerItemUpdate
+from app.schemas.monitoring import SlowQuery, HistogramSummary, DBPoolStats
\ No newline at end of file
@@ -60,4 +60,23 @@ class LogQueryParams(BaseModel):
     start_date: Optional[datetime] = None
     end_date: Optional[datetime] = None
     page: int = 1
-    page_size: int = 20 
\ No newline at end of file
+    page_size: int = 20 
+
+# 日志统计查询参数
+class LogStatsQueryParams(BaseModel):
+    module: Optional[str] = None
+    action: Optional[str] = None
+    level: Optional[str] = None
+    user_id: Optional[int] = None
+    start_date: Optional[datetime] = None
+    end_date: Optional[datetime] = None
+
+# 日志统计时间序列数据点
+class LogStatsPoint(BaseModel):
+    bucket: datetime
+    count: int
+
+# 日志统计分组结果
+class LogStatsGroup(BaseModel):
+    key: Optional[str] = None
+    count: int
@@ -0,0 +1,37 @@
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from pydantic import BaseModel
+
+
+# 慢查询记录
+class SlowQuery(BaseModel):
+    timestamp: datetime
+    duration_ms: float
+    statement: str
+    parameters: Any = None  # 只包含参数类型，不含参数值
+    executemany: Optional[int] = None  # 批量执行时的行数
+    endpoint: Optional[str] = None
+    dialect: str
+    plan: Optional[List[str]] = None
+
+
+# 直方图汇总（累计分桶计数，分位数为所在分桶的上限）
+class HistogramSummary(BaseModel):
+    buckets: Dict[str, int]
+    sum: float
+    count: int
+    p50: Optional[float] = None
+    p95: Optional[float] = None
+    p99: Optional[float] = None
+
+
+# 数据库连接池状态与统计
+class DBPoolStats(BaseModel):
+    status: Optional[Dict[str, int]] = None  # 当前连接数（get_pool_status）
+    checkouts: int = 0
+    overflow_checkouts: int = 0
+    timeouts: int = 0
+    max_overflow_in_use: int = 0
+    wait: Optional[HistogramSummary] = None  # 签出等待时间（秒）
+    hold: Optional[HistogramSummary] = None  # 连接占用时长（秒）
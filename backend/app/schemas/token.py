@@ -12,6 +12,7 @@ class Token(BaseModel):
     name: Optional[str] = None
     roles: List[str] = []
     permissions: List[str] = []
+    permissions_etag: Optional[str] = None  # 权限列表的ETag，可用于 /users/me/permissions 的 If-None-Match
     teamId: Optional[int] = None
     password_expired: bool = False
 
@@ -3,24 +3,50 @@ from typing import Dict, Any, List, Optional
 
 from fastapi import HTTPException
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 
 from app import models, schemas
-from app.core.security import create_access_token, verify_password, get_password_hash
-from app.services.casbin_service import get_roles_for_user, get_permissions_for_role, add_role_for_user
+from app.core.security import create_access_token, verify_password, verify_password_async, get_password_hash
+from app.db.session import run_sync
+from app.services.casbin_service import get_roles_for_user, get_user_permission_set, add_role_for_user
+from app.services.statistics_service import invalidate_statistics
+from app.services.user_cache_service import invalidate_user
 
 
 class AuthService:
     """认证服务类，处理用户认证相关的业务逻辑"""
 
     @staticmethod
-    def authenticate_user(db: Session, ehr_id: str, password: str) -> Dict[str, Any]:
-        """用户认证"""
-        # 使用EHR号查找用户
+    def _get_login_user(db: Session, ehr_id: str) -> models.User:
+        """使用EHR号查找登录用户，不存在时返回401"""
         user = db.query(models.User).filter(models.User.ehr_id == ehr_id).first()
         if not user:
             raise HTTPException(status_code=401, detail="EHR号或密码错误")
+        return user
+
+    @staticmethod
+    def authenticate_user(db: Session, ehr_id: str, password: str) -> Dict[str, Any]:
+        """用户认证"""
+        user = AuthService._get_login_user(db, ehr_id)
         if not verify_password(password, user.hashed_password):
             raise HTTPException(status_code=401, detail="EHR号或密码错误")
+        return AuthService._login_response(user)
+
+    @staticmethod
+    async def authenticate_user_async(db: Any, ehr_id: str, password: str) -> Dict[str, Any]:
+        """
+        用户认证（异步接口使用）
+        等待密码哈希线程池校验密码期间不占用事件循环和请求线程
+        """
+        user = await run_sync(db, AuthService._get_login_user, ehr_id)
+        if not await verify_password_async(password, user.hashed_password):
+            raise HTTPException(status_code=401, detail="EHR号或密码错误")
+        # 角色和权限可能需要读取策略，放到线程池中执行
+        return await run_in_threadpool(AuthService._login_response, user)
+
+    @staticmethod
+    def _login_response(user: models.User) -> Dict[str, Any]:
+        """校验密码通过后生成登录结果"""
         if not user.is_active:
             raise HTTPException(status_code=401, detail="用户已被禁用")
         
@@ -33,20 +59,8 @@ class AuthService:
             three_months_ago = datetime.now() - timedelta(days=90)
             password_expired = user.last_password_change < three_months_ago
         
-        # 获取用户权限
-        permissions = []
-        for role in roles:
-            role_permissions = get_permissions_for_role(role)
-            for p in role_permissions:
-                # p格式为 [role, resource, action]
-                if len(p) >= 3:
-                    permission = f"{p[1]}:{p[2]}"
-                    if permission not in permissions:
-                        permissions.append(permission)
-        
-        # 如果是超级管理员，添加所有权限
-        if user.is_superuser:
-            permissions = ["*:*"]
+        # 获取用户权限（超级管理员拥有所有权限）
+        permissions, permissions_etag = get_user_permission_set(str(user.id), user.is_superuser)
         
         access_token = create_access_token(
             data={"sub": str(user.id), "roles": roles}
@@ -61,6 +75,7 @@ class AuthService:
             "roles": roles,
             "password_expired": password_expired,
             "permissions": permissions,
+            "permissions_etag": permissions_etag,
             "team_id": user.team_id
         }
 
@@ -98,6 +113,7 @@ class AuthService:
         db.add(user)
         db.commit()
         db.refresh(user)
+        invalidate_statistics()
         
         # 为新用户分配默认角色
         add_role_for_user(str(user.id), "user")
@@ -123,6 +139,7 @@ class AuthService:
         user.hashed_password = get_password_hash(password_data.new_password)
         user.last_password_change = datetime.now()
         db.commit()
+        invalidate_user(user.id)
         
         return {"message": "密码修改成功"}
 
@@ -1,6 +1,15 @@
+import hashlib
 import os
+import threading
+from typing import Dict, FrozenSet, Iterable, List, Optional, Tuple
+
 import casbin
+from app.core.cache import Cache, invalidate_tag
 from app.core.config import settings
+from app.core.metrics import metrics_registry
+from app.db.session import engine
+from app.services.casbin_watcher import PolicyVersionWatcher
+from app.utils.cache import MISSING
 
 def get_enforcer():
     """获取Casbin enforcer实例"""
@@ -8,16 +17,28 @@ def get_enforcer():
     
     # 使用SQLite适配器
     from casbin_sqlalchemy_adapter import Adapter
-    from sqlalchemy import create_engine
     
-    # 获取数据库URL
-    database_url = settings.SQLALCHEMY_DATABASE_URI
+    # 创建SQLAlchemy适配器，复用应用的数据库引擎和连接池
+    adapter = Adapter(engine)
+    
+    # 创建enforcer
+    enforcer = casbin.Enforcer(model_path, adapter)
     
-    # 创建SQLAlchemy适配器
-    adapter = Adapter(create_engine(database_url))
+    # 多个worker之间通过策略版本号同步权限变更
+    if settings.CASBIN_WATCHER_ENABLED:
+        watcher = PolicyVersionWatcher(engine, interval=settings.CASBIN_POLICY_SYNC_INTERVAL)
+        watcher.set_update_callback(lambda: _reload_policy(enforcer))
+        enforcer.set_watcher(watcher)
     
-    # 创建并返回enforcer
-    return casbin.Enforcer(model_path, adapter)
+    return enforcer
+
+def _reload_policy(enforcer) -> None:
+    """
+    其他进程修改了策略，重新加载策略并重新生成本进程的策略快照
+    共享缓存中的条目按策略版本号区分，修改策略的进程已使旧条目失效，这里不再重复清除
+    """
+    enforcer.load_policy()
+    _reset_policy_snapshot()
 
 # 获取enforcer单例
 _enforcer = None
@@ -27,36 +48,225 @@ def get_enforcer_instance():
     global _enforcer
     if _enforcer is None:
         _enforcer = get_enforcer()
+    elif _enforcer.watcher is not None:
+        # 按间隔检查策略版本，未到间隔时不访问数据库
+        _enforcer.watcher.poll()
     return _enforcer
 
+# 权限缓存都带有"permissions"标签，策略变更时整体失效；
+# 键以本进程已加载的策略版本号开头，尚未同步到新策略的worker不会读到或写入新版本的条目。
+# 每次策略变更都会产生一批新键，条目必须有有效期，旧版本的键才会从共享缓存中过期
+# 权限判定缓存，键为(策略版本, 用户, 资源, 操作)
+_decision_cache = Cache(
+    "permissions:decisions", maxsize=settings.CASBIN_CACHE_SIZE, ttl=settings.CASBIN_CACHE_TTL, tags=("permissions",)
+)
+# 用户角色缓存，键为(策略版本, 用户ID)
+_roles_cache = Cache(
+    "permissions:roles", maxsize=settings.CASBIN_CACHE_SIZE, ttl=settings.CASBIN_CACHE_TTL, tags=("permissions",)
+)
+# 角色组合对应的权限集合缓存，键为(策略版本, 排序后的角色)
+_permission_set_cache = Cache(
+    "permissions:sets", maxsize=settings.CASBIN_CACHE_SIZE, ttl=settings.CASBIN_CACHE_TTL, tags=("permissions",)
+)
+# 按角色分组的策略快照及角色到权限集合的映射，与生成时的快照版本一起保存，版本不一致时重新生成
+_policy_snapshot: Optional[Tuple[Tuple[int, int], Dict[str, Tuple[str, ...]]]] = None
+_role_permission_map: Optional[Tuple[Tuple[int, int], Dict[str, FrozenSet[str]]]] = None
+# 本进程策略变更次数，每次置空快照时加一
+_snapshot_generation = 0
+_snapshot_lock = threading.Lock()
+
+# 超级管理员的权限列表
+SUPERUSER_PERMISSIONS = ["*:*"]
+
+def _reset_policy_snapshot() -> None:
+    """置空本进程的策略快照，之前开始生成的快照因版本不一致不会再被保存或使用"""
+    global _policy_snapshot, _role_permission_map, _snapshot_generation
+    with _snapshot_lock:
+        _snapshot_generation += 1
+        _policy_snapshot = None
+        _role_permission_map = None
+
+def _policy_version() -> int:
+    """本进程已加载的策略版本号，未启用策略同步时为0"""
+    watcher = _enforcer.watcher if _enforcer is not None else None
+    return watcher.version if isinstance(watcher, PolicyVersionWatcher) else 0
+
+def invalidate_permission_cache() -> None:
+    """
+    清空权限缓存（所有worker）
+    策略变更会影响所有继承该角色的用户，因此递增标签版本号整体失效，而不是按键删除
+    """
+    invalidate_tag("permissions")
+    _reset_policy_snapshot()
+
+def _snapshot_version() -> Tuple[int, int]:
+    """策略快照的版本：(已加载的策略版本号, 本进程策略变更次数)"""
+    return _policy_version(), _snapshot_generation
+
+def get_policy_snapshot() -> Dict[str, Tuple[str, ...]]:
+    """
+    获取按角色分组的全部权限，格式为 {角色: ("resource:action", ...)}
+    一次遍历全部策略生成，保持策略顺序并去重；策略未变更时直接复用
+    """
+    global _policy_snapshot
+    e = get_enforcer_instance()
+    # 先取版本再读取策略，生成期间策略发生变更时版本不一致，结果不会被保存
+    version = _snapshot_version()
+    cached = _policy_snapshot
+    if cached is not None and cached[0] == version:
+        return cached[1]
+    grouped: Dict[str, Dict[str, None]] = {}
+    for p in e.get_policy():
+        # p格式为 [role, resource, action]
+        if len(p) >= 3:
+            grouped.setdefault(p[0], {})[f"{p[1]}:{p[2]}"] = None
+    snapshot = {role: tuple(permissions) for role, permissions in grouped.items()}
+    with _snapshot_lock:
+        if _snapshot_version() == version:
+            _policy_snapshot = (version, snapshot)
+    return snapshot
+
+def get_role_permissions(role: str) -> List[str]:
+    """获取角色的权限字符串列表（resource:action）"""
+    return list(get_policy_snapshot().get(role, ()))
+
+def get_role_permission_map() -> Dict[str, FrozenSet[str]]:
+    """获取角色到权限字符串集合的映射，用于快速判断和合并多个角色的权限"""
+    global _role_permission_map
+    version = _snapshot_version()
+    cached = _role_permission_map
+    if cached is not None and cached[0] == version:
+        return cached[1]
+    snapshot = get_policy_snapshot()
+    permission_map = {role: frozenset(permissions) for role, permissions in snapshot.items()}
+    with _snapshot_lock:
+        if _snapshot_version() == version:
+            _role_permission_map = (version, permission_map)
+    return permission_map
+
+def _permission_etag(permissions: Iterable[str]) -> str:
+    """根据排序后的权限列表计算ETag"""
+    digest = hashlib.sha256("\n".join(permissions).encode("utf-8")).hexdigest()
+    return f'"{digest[:32]}"'
+
+def get_permission_set_for_roles(roles: Iterable[str]) -> Tuple[List[str], str]:
+    """
+    获取多个角色合并后的权限列表（已排序）及其ETag
+    相同角色组合的结果会被缓存
+    """
+    roles = sorted(frozenset(roles))
+
+    def load():
+        permission_map = get_role_permission_map()
+        permissions = sorted(frozenset().union(*(permission_map.get(role, frozenset()) for role in roles)))
+        return tuple(permissions), _permission_etag(permissions)
+
+    cached = _permission_set_cache.get_or_set((_policy_version(), ",".join(roles)), load)
+    return list(cached[0]), cached[1]
+
+def get_user_permission_set(user_id: str, is_superuser: bool = False) -> Tuple[List[str], str]:
+    """获取用户的权限列表及其ETag，超级管理员拥有所有权限"""
+    if is_superuser:
+        return list(SUPERUSER_PERMISSIONS), _permission_etag(SUPERUSER_PERMISSIONS)
+    return get_permission_set_for_roles(get_roles_for_user(str(user_id)))
+
+def get_permission_cache_stats() -> dict:
+    """获取权限缓存的命中统计"""
+    return {
+        "decisions": _decision_cache.stats(),
+        "roles": _roles_cache.stats(),
+        "permission_sets": _permission_set_cache.stats(),
+    }
+
+def _collect_cache_metrics():
+    """输出权限缓存命中统计指标"""
+    stats = get_permission_cache_stats()
+    for metric, metric_type in (("hits", "counter"), ("misses", "counter"), ("size", "gauge")):
+        yield (
+            f"casbin_cache_{metric}",
+            metric_type,
+            f"权限缓存{metric}",
+            # 共享缓存后端无法统计条目数，不输出size
+            [
+                ({"cache": name}, cache_stats[metric])
+                for name, cache_stats in stats.items()
+                if cache_stats[metric] is not None
+            ],
+        )
+
+metrics_registry.register_collector(_collect_cache_metrics)
+
 def add_permission_for_role(role: str, resource: str, action: str) -> bool:
     """为角色添加权限"""
     e = get_enforcer_instance()
-    return e.add_policy(role, resource, action)
+    try:
+        return e.add_policy(role, resource, action)
+    finally:
+        invalidate_permission_cache()
 
 def remove_permission_for_role(role: str, resource: str, action: str) -> bool:
     """移除角色的权限"""
     e = get_enforcer_instance()
-    return e.remove_policy(role, resource, action)
+    try:
+        return e.remove_policy(role, resource, action)
+    finally:
+        invalidate_permission_cache()
+
+def remove_permissions_for_role(role: str) -> bool:
+    """移除角色的所有权限"""
+    e = get_enforcer_instance()
+    try:
+        return e.remove_filtered_policy(0, role)
+    finally:
+        invalidate_permission_cache()
 
 def add_role_for_user(user_id: str, role: str) -> bool:
     """为用户添加角色"""
     e = get_enforcer_instance()
-    return e.add_grouping_policy(str(user_id), role)
+    try:
+        return e.add_grouping_policy(str(user_id), role)
+    finally:
+        invalidate_permission_cache()
+
+def add_roles_for_users(assignments: Iterable[Tuple[str, str]]) -> bool:
+    """
+    批量为用户添加角色，assignments为(用户ID, 角色)
+    一次写入全部分组策略，权限缓存只失效一次、策略版本号只递增一次；已存在的分配会被跳过
+    """
+    e = get_enforcer_instance()
+    rules = [[str(user_id), str(role)] for user_id, role in dict.fromkeys(
+        (str(user_id), str(role)) for user_id, role in assignments
+    )]
+    rules = [rule for rule in rules if not e.has_grouping_policy(*rule)]
+    if not rules:
+        return False
+    try:
+        return e.add_grouping_policies(rules)
+    finally:
+        invalidate_permission_cache()
 
 def remove_role_for_user(user_id: str, role: str) -> bool:
     """移除用户的角色"""
     e = get_enforcer_instance()
-    return e.remove_grouping_policy(str(user_id), role)
+    try:
+        return e.remove_grouping_policy(str(user_id), role)
+    finally:
+        invalidate_permission_cache()
 
 def get_roles_for_user(user_id: str) -> list:
     """获取用户的所有角色"""
     try:
         e = get_enforcer_instance()
+        key = (_policy_version(), str(user_id))
+        cached = _roles_cache.get(key)
+        if cached is not MISSING:
+            roles = list(cached)
+            return roles if roles else ["user"]
         if e is None:
             print("Enforcer实例为空")
             return ["user"]  # 默认返回user角色
         roles = e.get_roles_for_user(str(user_id))
+        _roles_cache.set(key, tuple(roles))
         if not roles:
             return ["user"]  # 如果没有找到角色，返回默认user角色
         return roles
@@ -85,6 +295,7 @@ def get_permissions_for_role(role: str) -> list:
     return e.get_permissions_for_user(role)
 
 def check_permission(user_id: str, resource: str, action: str) -> bool:
-    """检查用户是否有特定权限"""
+    """检查用户是否有特定权限（结果按用户/资源/操作缓存）"""
     e = get_enforcer_instance()
-    return e.enforce(str(user_id), resource, action) 
\ No newline at end of file
+    key = (_policy_version(), str(user_id), resource, action)
+    return _decision_cache.get_or_set(key, lambda: e.enforce(str(user_id), resource, action)) 
\ No newline at end of file
@@ -0,0 +1,114 @@
+import logging
+import threading
+import time
+from typing import Callable, Optional
+
+from sqlalchemy import Column, Integer, MetaData, Table, select
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import IntegrityError
+
+logger = logging.getLogger(__name__)
+
+# 策略版本表只有一行，每次策略变更时版本号加一
+_metadata = MetaData()
+policy_version_table = Table(
+    "casbin_policy_version",
+    _metadata,
+    Column("id", Integer, primary_key=True),
+    Column("version", Integer, nullable=False, default=0),
+)
+
+_VERSION_ROW_ID = 1
+
+
+class PolicyVersionWatcher:
+    """
+    基于数据库版本号的Casbin策略监听器
+    本进程修改策略时递增版本号；其他进程按间隔读取版本号（单行主键查询），
+    发现变化时才重新加载策略，从而在多个worker之间同步权限变更
+    """
+
+    def __init__(self, engine: Engine, interval: float = 2.0):
+        self.engine = engine
+        self.interval = interval
+        self._callback: Optional[Callable[[], None]] = None
+        self._lock = threading.Lock()
+        self._next_poll = 0.0
+
+        # 与适配器创建casbin_rule表的方式一致，表不存在时自动创建
+        _metadata.create_all(engine, checkfirst=True)
+        self._version = self._read_version()
+
+    @property
+    def version(self) -> int:
+        """本进程已加载的策略版本号"""
+        return self._version
+
+    def set_update_callback(self, callback: Callable[[], None]) -> None:
+        """设置策略变更时的回调（重新加载策略）"""
+        self._callback = callback
+
+    def _read_version(self) -> int:
+        with self.engine.connect() as conn:
+            version = conn.execute(
+                select(policy_version_table.c.version).where(policy_version_table.c.id == _VERSION_ROW_ID)
+            ).scalar()
+        return version or 0
+
+    def _increment_version(self) -> int:
+        """递增版本号并返回递增前的值"""
+        with self.engine.begin() as conn:
+            current = conn.execute(
+                select(policy_version_table.c.version).where(policy_version_table.c.id == _VERSION_ROW_ID)
+            ).scalar()
+            if current is None:
+                conn.execute(policy_version_table.insert().values(id=_VERSION_ROW_ID, version=1))
+                return 0
+            conn.execute(
+                policy_version_table.update()
+                .where(policy_version_table.c.id == _VERSION_ROW_ID)
+                .values(version=policy_version_table.c.version + 1)
+            )
+            return current
+
+    def update(self) -> None:
+        """本进程修改策略后调用，递增数据库中的版本号"""
+        with self._lock:
+            try:
+                current = self._increment_version()
+            except IntegrityError:
+                # 首次写入时其他进程已同时插入版本行，改为递增
+                current = self._increment_version()
+            stale = current != self._version
+            self._version = current + 1
+
+        # 在本次修改之前已有其他进程修改过策略，需要重新加载以合并其变更
+        if stale:
+            self._notify()
+
+    def poll(self, force: bool = False) -> bool:
+        """
+        检查版本号是否变化，变化时触发回调
+        未到检查间隔时直接返回，不访问数据库
+        """
+        now = time.monotonic()
+        if not force and now < self._next_poll:
+            return False
+        with self._lock:
+            self._next_poll = now + self.interval
+            try:
+                version = self._read_version()
+            except Exception as e:
+                logger.warning(f"读取权限策略版本失败: {str(e)}")
+                return False
+            if version == self._version:
+                return False
+            self._version = version
+
+        self._notify()
+        return True
+
+    def _notify(self) -> None:
+        if self._callback is not None:
+            logger.info("检测到权限策略变更，重新加载策略")
+            self._callback()
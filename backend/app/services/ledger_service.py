@@ -1,4 +1,4 @@
-from typing import Any, List, Optional, Dict
+from typing import AbstractSet, Any, List, Optional, Dict
 from fastapi import HTTPException
 from sqlalchemy.orm import Session
 import pandas as pd
@@ -6,13 +6,55 @@ from io import BytesIO
 from datetime import datetime
 from urllib.parse import quote
 from app import models, schemas, crud
+from app.crud.base import defer_unrequested
+from app.db.session import commit_or_flush
 from app.utils.logger import LoggerService
+from app.services.reference_cache_service import team_refs, template_refs, user_refs, workflow_refs
 from app.services.workflow_instance_service import WorkflowInstanceService
+from app.services.visibility_service import filter_visible_ledgers, ledger_visibility_filter, visibility_column
+
+
+# 由 _fill_reference_names 填充的名称字段
+REFERENCE_NAME_FIELDS = frozenset({
+    "team_name", "template_name", "workflow_name", "created_by_name", "updated_by_name", "current_approver_name",
+})
+# 列表接口未请求时延迟加载的大字段
+LEDGER_DEFERRABLE_COLUMNS = ("data", "description")
 
 
 class LedgerService:
     """台账服务类"""
 
+    @staticmethod
+    def _fill_reference_names(db: Session, ledgers: List[models.Ledger]) -> None:
+        """填充团队、模板、工作流、创建人、更新人和当前审批人的名称"""
+        teams = team_refs.get_many(db, (ledger.team_id for ledger in ledgers))
+        templates = template_refs.get_many(db, (ledger.template_id for ledger in ledgers))
+        workflows = workflow_refs.get_many(db, (template.workflow_id for template in templates.values()))
+        users = user_refs.get_many(db, (
+            user_id
+            for ledger in ledgers
+            for user_id in (ledger.created_by_id, ledger.updated_by_id, ledger.current_approver_id)
+        ))
+        
+        for ledger in ledgers:
+            if ledger.team_id in teams:
+                ledger.team_name = teams[ledger.team_id].name
+            
+            template = templates.get(ledger.template_id)
+            if template:
+                ledger.template_name = template.name
+                # 工作流名称取自模板关联的工作流
+                if template.workflow_id in workflows:
+                    ledger.workflow_name = workflows[template.workflow_id].name
+            
+            if ledger.created_by_id in users:
+                ledger.created_by_name = users[ledger.created_by_id].name
+            if ledger.updated_by_id in users:
+                ledger.updated_by_name = users[ledger.updated_by_id].name
+            if ledger.current_approver_id in users:
+                ledger.current_approver_name = users[ledger.current_approver_id].name
+
     @staticmethod
     def get_ledgers(
         db: Session,
@@ -24,12 +66,14 @@ class LedgerService:
         status: Optional[str] = None,
         approval_status: Optional[str] = None,
         current_user: models.User = None,
+        fields: Optional[AbstractSet[str]] = None,
     ) -> List[schemas.Ledger]:
         """
         获取台账列表
+        fields为只返回的字段（稀疏字段集），未请求的大字段延迟加载，未请求的名称和工作流实例不再查询
         """
         # 构建查询
-        query = db.query(models.Ledger)
+        query = db.query(models.Ledger).options(*defer_unrequested(models.Ledger, fields, LEDGER_DEFERRABLE_COLUMNS))
         
         # 按团队筛选
         if team_id:
@@ -51,54 +95,23 @@ class LedgerService:
         if search:
             query = query.filter(models.Ledger.name.ilike(f"%{search}%"))
         
-        # 非超级管理员只能看到自己团队的台账
-        # if current_user and not current_user.is_superuser and not team_id:
-        #     query = query.filter(models.Ledger.team_id == current_user.team_id)
+        # 非超级管理员只能看到自己创建、所在团队或自己参与审批的台账
+        query = filter_visible_ledgers(query, current_user)
         
         # 获取台账列表
         ledgers = query.order_by(models.Ledger.updated_at.desc()).offset(skip).limit(limit).all()
         
-        # 获取台账的相关数据（团队名称、模板名称等）
-        for ledger in ledgers:
-            # 获取团队名称
-            if ledger.team_id:
-                team = db.query(models.Team).filter(models.Team.id == ledger.team_id).first()
-                if team:
-                    ledger.team_name = team.name
-            
-            # 获取模板名称
-            if ledger.template_id:
-                template = db.query(models.Template).filter(models.Template.id == ledger.template_id).first()
-                if template:
-                    ledger.template_name = template.name
-
-                # 获取工作流名称
-                if template.workflow_id:
-                    workflow = db.query(models.Workflow).filter(models.Workflow.id == template.workflow_id).first()
-                    if workflow:
-                        ledger.workflow_name = workflow.name
+        # 获取台账的相关数据（团队名称、模板名称等），整页一起从引用缓存批量获取
+        if fields is None or fields & REFERENCE_NAME_FIELDS:
+            LedgerService._fill_reference_names(db, ledgers)
         
-            
-            # 获取创建人和更新人姓名
-            creator = db.query(models.User).filter(models.User.id == ledger.created_by_id).first()
-            if creator:
-                ledger.created_by_name = creator.name
-            
-            updater = db.query(models.User).filter(models.User.id == ledger.updated_by_id).first()
-            if updater:
-                ledger.updated_by_name = updater.name
-            
-            # 获取当前审批人姓名
-            if ledger.current_approver_id:
-                approver = db.query(models.User).filter(models.User.id == ledger.current_approver_id).first()
-                if approver:
-                    ledger.current_approver_name = approver.name
-
-            try:
-                # 获取当前活动的工作流实例
-                ledger.active_workflow_instance = WorkflowInstanceService.get_workflow_instance_by_ledger(db, ledger.id, current_user)
-            except:
-                ledger.active_workflow_instance = None
+        if fields is not None and "active_workflow_instance" not in fields:
+            return ledgers
+        
+        # 当前活动的工作流实例，整页一起获取；列表已按可见性过滤，实例对当前用户可见
+        instances = WorkflowInstanceService.get_workflow_instances_by_ledgers(db, ledgers)
+        for ledger in ledgers:
+            ledger.active_workflow_instance = instances.get(ledger.id)
             
         return ledgers
 
@@ -182,65 +195,20 @@ class LedgerService:
         """
         获取指定台账详情
         """
-        # 获取台账
-        ledger = db.query(models.Ledger).filter(models.Ledger.id == ledger_id).first()
-        if not ledger:
+        # 获取台账，同时在同一条查询中计算当前用户是否可见
+        row = db.query(
+            models.Ledger, visibility_column(ledger_visibility_filter(current_user))
+        ).filter(models.Ledger.id == ledger_id).first()
+        if not row:
             raise HTTPException(status_code=404, detail="台账不存在")
         
-        #TODO 非超级管理员只能查看自己团队的台账
-        # if not current_user.is_superuser and ledger.team_id != current_user.team_id:
-        #     # 检查用户是否是创建者
-        #     if ledger.created_by_id != current_user.id:
-        #         # 检查用户是否是审批人
-        #         if ledger.workflow_instance_id:
-        #             # 检查用户是否在审批节点中
-        #             workflow_instance = db.query(models.WorkflowInstance).filter(
-        #                 models.WorkflowInstance.id == ledger.workflow_instance_id
-        #             ).first()
-                    
-        #             if workflow_instance and workflow_instance.current_node_id:
-        #                 current_node = db.query(models.WorkflowInstanceNode).filter(
-        #                     models.WorkflowInstanceNode.id == workflow_instance.current_node_id
-        #                 ).first()
-                        
-        #                 if current_node and current_node.approver_id != current_user.id:
-        #                     raise HTTPException(status_code=403, detail="无权查看此台账")
-        #         else:
-        #             raise HTTPException(status_code=403, detail="无权查看此台账")
+        # 非超级管理员只能查看自己创建、所在团队或自己参与审批的台账
+        ledger, visible = row
+        if not visible:
+            raise HTTPException(status_code=403, detail="无权查看此台账")
         
         # 获取台账的相关数据（团队名称、模板名称等）
-        # 获取团队名称
-        if ledger.team_id:
-            team = db.query(models.Team).filter(models.Team.id == ledger.team_id).first()
-            if team:
-                ledger.team_name = team.name
-        
-        # 获取模板名称
-        if ledger.template_id:
-            template = db.query(models.Template).filter(models.Template.id == ledger.template_id).first()
-            if template:
-                ledger.template_name = template.name
-        
-            # 获取工作流名称
-            if template.workflow_id:
-                workflow = db.query(models.Workflow).filter(models.Workflow.id == template.workflow_id).first()
-                if workflow:
-                    ledger.workflow_name = workflow.name
-        
-        # 获取创建人和更新人姓名
-        creator = db.query(models.User).filter(models.User.id == ledger.created_by_id).first()
-        if creator:
-            ledger.created_by_name = creator.name
-        
-        updater = db.query(models.User).filter(models.User.id == ledger.updated_by_id).first()
-        if updater:
-            ledger.updated_by_name = updater.name
-        
-        # 获取当前审批人姓名
-        if ledger.current_approver_id:
-            approver = db.query(models.User).filter(models.User.id == ledger.current_approver_id).first()
-            if approver:
-                ledger.current_approver_name = approver.name
+        LedgerService._fill_reference_names(db, [ledger])
 
         # 获取当前活动的工作流实例
         ledger.active_workflow_instance = WorkflowInstanceService.get_workflow_instance_by_ledger(db, ledger.id, current_user)
@@ -370,7 +338,7 @@ class LedgerService:
         
         # 删除台账
         db.delete(ledger)
-        db.commit()
+        commit_or_flush(db)
         
         return ledger
 
@@ -593,8 +561,7 @@ class LedgerService:
         # 更新台账的data字段
         ledger.data = data
         db.add(ledger)
-        db.commit()
-        db.refresh(ledger)
+        commit_or_flush(db, ledger)
         
         return data
         
@@ -623,8 +590,9 @@ class LedgerService:
         current_field_values = crud.field_value.get_by_ledger(db, ledger_id=ledger_id)
         current_field_values_dict = {fv.field_id: fv for fv in current_field_values}
         
-        # 字段值列表
-        result_field_values = []
+        # 已同步的字段ID（按模板字段顺序），新建的字段值最后批量创建
+        synced_field_ids = []
+        new_values = {}
         
         # 遍历模板字段
         for field in fields:
@@ -640,18 +608,20 @@ class LedgerService:
                     field_value = current_field_values_dict[field.id]
                     field_value.value = value
                     db.add(field_value)
-                    result_field_values.append(field_value)
                 else:
-                    # 如果不存在，则创建新的字段值
-                    field_value_in = schemas.FieldValueCreate(
-                        field_id=field.id,
-                        value=value
-                    )
-                    field_value = crud.field_value.create(db, obj_in=field_value_in, ledger_id=ledger_id)
-                    result_field_values.append(field_value)
+                    # 如果不存在，则稍后批量创建
+                    new_values[field.id] = value
+                synced_field_ids.append(field.id)
+        
+        commit_or_flush(db)
         
-        db.commit()
+        if new_values:
+            for field_value in crud.field_value.create_multi(db, ledger_id=ledger_id, values=new_values):
+                current_field_values_dict[field_value.field_id] = field_value
+            # 批量插入不经过ORM，台账上已加载的字段值集合需要重新加载
+            db.expire(ledger, ["field_values"])
         
+        result_field_values = [current_field_values_dict[field_id] for field_id in synced_field_ids]
         return result_field_values
 
 
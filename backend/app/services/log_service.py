@@ -1,16 +1,31 @@
-from typing import Any, List, Optional
+import csv
+import io
+import json
+from datetime import datetime
+from typing import AbstractSet, Any, Callable, Dict, Iterable, Iterator, List, Optional
 
 from sqlalchemy.orm import Session
 
 from app import crud, models, schemas
+from app.db.session import SessionLocal
+from app.utils.stream import buffer_chunks, gzip_stream
+
+# 支持的日志导出格式及其响应类型
+EXPORT_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
 
 class LogService:
     @staticmethod
-    def get_system_logs(db: Session, params: schemas.LogQueryParams) -> List[models.SystemLog]:
+    def get_system_logs(
+        db: Session, params: schemas.LogQueryParams, fields: Optional[AbstractSet[str]] = None
+    ) -> List[models.SystemLog]:
         """
         获取系统日志列表
+        fields为只返回的字段（稀疏字段集），未请求的大字段不随查询读取
         """
-        return crud.system_log.get_multi_by_filter(db, params=params)
+        return crud.system_log.get_multi_by_filter(db, params=params, fields=fields)
 
     @staticmethod
     def count_system_logs(db: Session, params: schemas.LogQueryParams) -> int:
@@ -132,5 +147,151 @@ class LogService:
         
         return crud.audit_log.get_by_user(db, user_id=user_id, limit=limit)
 
+    @staticmethod
+    def get_log_stats_timeline(
+        db: Session, params: schemas.LogStatsQueryParams, interval: str = "hour"
+    ) -> List[Dict[str, Any]]:
+        """
+        获取日志数量的时间序列（读取小时汇总表）
+        """
+        points = crud.system_log_hourly_stat.get_time_series(db, params=params)
+        
+        if interval == "day":
+            # 按天合并小时数据，一年最多8760个点，在内存中合并即可
+            days: Dict[datetime, int] = {}
+            for point in points:
+                day = point.bucket.replace(hour=0)
+                days[day] = days.get(day, 0) + point.count
+            return [{"bucket": day, "count": count} for day, count in days.items()]
+        
+        return [{"bucket": point.bucket, "count": point.count} for point in points]
+
+    @staticmethod
+    def get_log_stats_summary(
+        db: Session, params: schemas.LogStatsQueryParams, group_by: str
+    ) -> List[Dict[str, Any]]:
+        """
+        按模块、操作、级别或用户分组统计日志数量（读取小时汇总表）
+        """
+        groups = crud.system_log_hourly_stat.get_grouped(db, params=params, group_by=group_by)
+        return [
+            {"key": str(group.key) if group.key is not None else None, "count": group.count}
+            for group in groups
+        ]
+
+    @staticmethod
+    def rebuild_log_stats(
+        db: Session, start_date: Optional[datetime] = None, end_date: Optional[datetime] = None
+    ) -> int:
+        """
+        根据原始系统日志重建小时汇总
+        """
+        count = crud.system_log_hourly_stat.rebuild(db, start_date=start_date, end_date=end_date)
+        db.commit()
+        return count
+
+    @staticmethod
+    def _format_value(value: Any) -> Any:
+        """将日志字段转换为可序列化的值"""
+        if isinstance(value, datetime):
+            return value.isoformat()
+        return value
+
+    @staticmethod
+    def format_export_rows(
+        rows: Iterable[Dict[str, Any]],
+        columns: List[str],
+        format: str
+    ) -> Iterator[str]:
+        """
+        将日志行逐行格式化为NDJSON或CSV文本
+        """
+        if format == "csv":
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            writer.writerow(columns)
+            for row in rows:
+                values = []
+                for column in columns:
+                    value = LogService._format_value(row.get(column))
+                    if isinstance(value, (dict, list)):
+                        value = json.dumps(value, ensure_ascii=False)
+                    values.append(value)
+                writer.writerow(values)
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate(0)
+            # 没有数据行时仍需输出表头
+            if buffer.tell():
+                yield buffer.getvalue()
+        else:
+            for row in rows:
+                record = {column: LogService._format_value(row.get(column)) for column in columns}
+                yield json.dumps(record, ensure_ascii=False, default=str) + "\n"
+
+    @staticmethod
+    def _export_stream(
+        fetch_rows: Callable[[Session], Iterable[Dict[str, Any]]],
+        columns: List[str],
+        format: str,
+        compress: bool,
+        session_factory: Callable[[], Session]
+    ) -> Iterator[bytes]:
+        """
+        生成导出数据流
+        使用独立的数据库会话，因为请求依赖项中的会话会在响应发送前关闭
+        """
+        with session_factory() as db:
+            lines = LogService.format_export_rows(fetch_rows(db), columns, format)
+            chunks = buffer_chunks(lines)
+            if compress:
+                chunks = gzip_stream(chunks)
+            yield from chunks
+
+    @staticmethod
+    def export_system_logs(
+        params: schemas.LogQueryParams,
+        format: str = "ndjson",
+        compress: bool = False,
+        session_factory: Callable[[], Session] = SessionLocal
+    ) -> Iterator[bytes]:
+        """
+        流式导出系统日志
+        """
+        columns = [column.name for column in models.SystemLog.__table__.columns]
+        return LogService._export_stream(
+            lambda db: crud.system_log.stream_by_filter(db, params=params),
+            columns,
+            format,
+            compress,
+            session_factory,
+        )
+
+    @staticmethod
+    def export_audit_logs(
+        params: schemas.LogQueryParams,
+        ledger_id: Optional[int] = None,
+        workflow_instance_id: Optional[int] = None,
+        format: str = "ndjson",
+        compress: bool = False,
+        session_factory: Callable[[], Session] = SessionLocal
+    ) -> Iterator[bytes]:
+        """
+        流式导出审计日志
+        """
+        columns = [column.name for column in models.AuditLog.__table__.columns]
+        return LogService._export_stream(
+            lambda db: crud.audit_log.stream_by_filter(
+                db,
+                params=params,
+                ledger_id=ledger_id,
+                workflow_instance_id=workflow_instance_id,
+            ),
+            columns,
+            format,
+            compress,
+            session_factory,
+        )
+
 
 log_service = LogService() 
\ No newline at end of file
@@ -0,0 +1,93 @@
+from collections import namedtuple
+from typing import Dict, Iterable, List, Optional, Sequence
+
+from sqlalchemy.orm import Session
+
+from app import models
+from app.core.cache import Cache
+from app.core.config import settings
+from app.db.bulk import chunked
+
+# 单条IN查询的最大ID数（Oracle限制为1000）
+MAX_IN_IDS = 1000
+
+
+class ReferenceCache:
+    """
+    小型引用实体（用户、团队、模板等）的只读缓存，用于填充列表和详情中的 *_name 字段
+    只缓存生成显示信息所需的几列，缓存中保存普通元组（可在共享缓存后端中序列化），返回时转换为命名元组；
+    get_many 对已缓存的ID一次读取、对未命中的ID合并成一条IN查询，并按读取时的标签版本号写回。实体修改、删除后由对应的服务调用 invalidate
+    """
+
+    def __init__(self, name: str, model, columns: Sequence[str], maxsize: int, ttl: float):
+        self.model = model
+        self.columns = tuple(columns)
+        self.row_type = namedtuple(f"{model.__name__}Ref", self.columns)
+        self._cache = Cache(f"refs:{name}", maxsize=maxsize, ttl=ttl)
+
+    def get_many(self, db: Session, ids: Iterable[Optional[int]]) -> Dict[int, tuple]:
+        """批量获取，返回 ID -> 命名元组，不存在的ID不在结果中"""
+        id_column = self.model.id
+        columns = [getattr(self.model, name) for name in self.columns]
+
+        def load(missing: List[int]) -> Dict[int, tuple]:
+            loaded = {}
+            for batch in chunked(missing, MAX_IN_IDS):
+                for row in db.query(*columns).filter(id_column.in_(batch)).all():
+                    loaded[row.id] = tuple(row)
+            return loaded
+
+        rows = self._cache.get_many_or_set({i for i in ids if i is not None}, load)
+        return {entity_id: self.row_type(*row) for entity_id, row in rows.items()}
+
+    def get(self, db: Session, entity_id: Optional[int]) -> Optional[tuple]:
+        """获取单个实体，不存在时返回None"""
+        if entity_id is None:
+            return None
+        return self.get_many(db, [entity_id]).get(entity_id)
+
+    def invalidate(self, entity_id: Optional[int] = None) -> None:
+        """清除单个实体的缓存，未指定ID时清空"""
+        if entity_id is None:
+            self._cache.clear()
+        else:
+            self._cache.delete(int(entity_id))
+
+    def stats(self) -> dict:
+        return self._cache.stats()
+
+
+def _cache(name: str, model, columns: Sequence[str]) -> ReferenceCache:
+    return ReferenceCache(
+        name, model, columns, maxsize=settings.REFERENCE_CACHE_SIZE, ttl=settings.REFERENCE_CACHE_TTL
+    )
+
+
+user_refs = _cache("users", models.User, ("id", "name", "username"))
+team_refs = _cache("teams", models.Team, ("id", "name", "leader_id"))
+template_refs = _cache("templates", models.Template, ("id", "name", "workflow_id"))
+workflow_refs = _cache("workflows", models.Workflow, ("id", "name"))
+role_refs = _cache("roles", models.Role, ("id", "name"))
+
+
+def name_of(refs: Dict[int, tuple], entity_id: Optional[int]) -> Optional[str]:
+    """从 get_many 的结果中取名称，实体不存在时返回None"""
+    ref = refs.get(entity_id) if entity_id is not None else None
+    return ref.name if ref is not None else None
+
+
+def clear_reference_caches() -> None:
+    """清空所有引用实体缓存"""
+    for refs in (user_refs, team_refs, template_refs, workflow_refs, role_refs):
+        refs.invalidate()
+
+
+def get_reference_cache_stats() -> dict:
+    """获取各引用实体缓存的命中统计"""
+    return {
+        "users": user_refs.stats(),
+        "teams": team_refs.stats(),
+        "templates": template_refs.stats(),
+        "workflows": workflow_refs.stats(),
+        "roles": role_refs.stats(),
+    }
@@ -5,10 +5,13 @@ from sqlalchemy.orm import Session
 
 from app import crud, models, schemas
 from app.models.role import Role
+from app.services.reference_cache_service import role_refs
 from app.services.casbin_service import (
     add_permission_for_role,
-    get_permissions_for_role,
+    get_policy_snapshot,
+    get_role_permissions,
     remove_permission_for_role,
+    remove_permissions_for_role,
     add_role_for_user,
     remove_role_for_user,
     get_roles_for_user,
@@ -24,24 +27,10 @@ class RoleService:
         # 获取所有角色
         roles = crud.role.get_multi(db, skip=skip, limit=limit)
         
-        # 获取每个角色的权限
+        # 获取每个角色的权限（一次读取按角色分组的策略快照）
+        policy_snapshot = get_policy_snapshot()
         for role in roles:
-            # 使用casbin获取权限
-            permissions = get_permissions_for_role(role.name)
-            # 转换权限格式
-            role_permissions = []
-            for p in permissions:
-                if len(p) >= 2:
-                    # Casbin 策略格式为: [role, obj, act]
-                    obj, act = p[1], p[2]
-                    if obj == "*" and act == "*":
-                        role_permissions.append("*:*")  # 所有权限
-                    elif act == "*":
-                        role_permissions.append(f"{obj}:*")  # 所有操作权限
-                    else:
-                        role_permissions.append(f"{obj}:{act}")  # 具体权限
-            
-            role.permissions = role_permissions
+            role.permissions = list(policy_snapshot.get(role.name, ()))
         
         return roles
 
@@ -63,37 +52,24 @@ class RoleService:
         
         # 添加权限
         if role_in.permissions:
-            enforcer = get_enforcer_instance()
             for permission in role_in.permissions:
                 # 解析权限格式
                 if permission == "*:*":
                     # 所有权限
-                    enforcer.add_policy(role.name, "*", "*")
+                    add_permission_for_role(role.name, "*", "*")
                 elif permission.endswith(":*"):
                     # 某个对象的所有操作权限
                     obj = permission.split(":")[0]
-                    enforcer.add_policy(role.name, obj, "*")
+                    add_permission_for_role(role.name, obj, "*")
                 else:
                     # 具体权限
                     parts = permission.split(":")
                     if len(parts) == 2:
                         obj, act = parts
-                        enforcer.add_policy(role.name, obj, act)
+                        add_permission_for_role(role.name, obj, act)
         
         # 获取角色权限
-        permissions = get_permissions_for_role(role.name)
-        role_permissions = []
-        for p in permissions:
-            if len(p) >= 2:
-                obj, act = p[1], p[2]
-                if obj == "*" and act == "*":
-                    role_permissions.append("*:*")
-                elif act == "*":
-                    role_permissions.append(f"{obj}:*")
-                else:
-                    role_permissions.append(f"{obj}:{act}")
-        
-        role.permissions = role_permissions
+        role.permissions = get_role_permissions(role.name)
         
         return role
 
@@ -108,19 +84,7 @@ class RoleService:
             raise HTTPException(status_code=404, detail="角色不存在")
         
         # 获取角色权限
-        permissions = get_permissions_for_role(role.name)
-        role_permissions = []
-        for p in permissions:
-            if len(p) >= 2:
-                obj, act = p[1], p[2]
-                if obj == "*" and act == "*":
-                    role_permissions.append("*:*")
-                elif act == "*":
-                    role_permissions.append(f"{obj}:*")
-                else:
-                    role_permissions.append(f"{obj}:{act}")
-        
-        role.permissions = role_permissions
+        role.permissions = get_role_permissions(role.name)
         
         return role
 
@@ -151,6 +115,7 @@ class RoleService:
         # 更新角色信息
         old_name = role.name
         role = crud.role.update(db, db_obj=role, obj_in=role_in)
+        role_refs.invalidate(role_id)
         
         # 更新权限
         if role_in.permissions is not None:
@@ -159,58 +124,46 @@ class RoleService:
             # 如果角色名改变了，需要更新所有权限和角色分配
             if role_in.name and role_in.name != old_name:
                 # 获取所有旧权限
-                old_permissions = get_permissions_for_role(old_name)
+                old_permissions = get_role_permissions(old_name)
                 
                 # 获取所有有该角色的用户
                 users_with_role = enforcer.get_users_for_role(old_name)
                 
                 # 删除旧角色的所有权限
-                enforcer.remove_filtered_policy(0, old_name)
+                remove_permissions_for_role(old_name)
                 
                 # 删除旧角色的所有角色分配
                 for user in users_with_role:
-                    enforcer.remove_grouping_policy(user, old_name)
-                    enforcer.add_grouping_policy(user, role.name)
+                    remove_role_for_user(user, old_name)
+                    add_role_for_user(user, role.name)
                 
                 # 添加新角色的权限
-                for p in old_permissions:
-                    if len(p) >= 2:
-                        enforcer.add_policy(role.name, p[1], p[2])
+                for permission in old_permissions:
+                    obj, act = permission.split(":", 1)
+                    add_permission_for_role(role.name, obj, act)
             else:
                 # 删除所有现有权限
-                enforcer.remove_filtered_policy(0, role.name)
+                remove_permissions_for_role(role.name)
             
             # 添加新权限
             for permission in role_in.permissions:
                 # 解析权限格式
                 if permission == "*:*":
                     # 所有权限
-                    enforcer.add_policy(role.name, "*", "*")
+                    add_permission_for_role(role.name, "*", "*")
                 elif permission.endswith(":*"):
                     # 某个对象的所有操作权限
                     obj = permission.split(":")[0]
-                    enforcer.add_policy(role.name, obj, "*")
+                    add_permission_for_role(role.name, obj, "*")
                 else:
                     # 具体权限
                     parts = permission.split(":")
                     if len(parts) == 2:
                         obj, act = parts
-                        enforcer.add_policy(role.name, obj, act)
+                        add_permission_for_role(role.name, obj, act)
         
         # 获取角色权限
-        permissions = get_permissions_for_role(role.name)
-        role_permissions = []
-        for p in permissions:
-            if len(p) >= 2:
-                obj, act = p[1], p[2]
-                if obj == "*" and act == "*":
-                    role_permissions.append("*:*")
-                elif act == "*":
-                    role_permissions.append(f"{obj}:*")
-                else:
-                    role_permissions.append(f"{obj}:{act}")
-        
-        role.permissions = role_permissions
+        role.permissions = get_role_permissions(role.name)
         
         return role
 
@@ -228,11 +181,11 @@ class RoleService:
             raise HTTPException(status_code=400, detail="不能删除系统角色")
         
         # 删除角色的所有权限
-        enforcer = get_enforcer_instance()
-        enforcer.remove_filtered_policy(0, role.name)
+        remove_permissions_for_role(role.name)
         
         # 删除角色
         role = crud.role.remove(db, id=role_id)
+        role_refs.invalidate(role_id)
         
         return role
 
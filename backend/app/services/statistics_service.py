@@ -0,0 +1,33 @@
+from typing import Dict
+
+from sqlalchemy.orm import Session
+
+from app import models
+from app.core.cache import Cache
+from app.core.config import settings
+
+# 系统概览计数缓存，用户、团队新增或删除时失效
+_statistics_cache = Cache("statistics", maxsize=64, ttl=settings.STATISTICS_CACHE_TTL)
+
+
+class StatisticsService:
+    """统计服务类，处理统计数据相关的业务逻辑"""
+
+    @staticmethod
+    def get_overview_counts(db: Session) -> Dict[str, int]:
+        """获取系统概览中的用户数和团队数，优先使用缓存"""
+        return _statistics_cache.get_or_set(
+            "overview_counts",
+            lambda: {
+                "users_count": db.query(models.User).count(),
+                "teams_count": db.query(models.Team).count(),
+            },
+        )
+
+
+def invalidate_statistics() -> None:
+    """用户、团队新增或删除后清除统计缓存（所有worker）"""
+    _statistics_cache.clear()
+
+
+statistics_service = StatisticsService()
@@ -3,6 +3,9 @@ from fastapi import HTTPException
 from sqlalchemy.orm import Session
 
 from app import models, schemas
+from app.services.reference_cache_service import name_of, team_refs, user_refs
+from app.services.statistics_service import invalidate_statistics
+from app.services.user_cache_service import invalidate_user
 from app.utils.logger import LoggerService
 
 
@@ -33,17 +36,16 @@ class TeamService:
             # 分页
             teams = query.offset(skip).limit(limit).all()
             
+            # 团队负责人从引用缓存批量获取
+            leaders = user_refs.get_many(db, (team.leader_id for team in teams))
+            
             # 计算每个团队的成员数量
             for team in teams:
                 try:
                     team.member_count = db.query(models.User).filter(models.User.team_id == team.id).count()
                     
                     # 获取团队负责人姓名
-                    if team.leader_id:
-                        leader = db.query(models.User).filter(models.User.id == team.leader_id).first()
-                        team.leader_name = leader.name if leader else None
-                    else:
-                        team.leader_name = None
+                    team.leader_name = name_of(leaders, team.leader_id)
                 except Exception as e:
                     print(f"处理团队 {team.id} 的信息时出错: {e}")
                     team.member_count = 0
@@ -79,6 +81,7 @@ class TeamService:
         db.add(team)
         db.commit()
         db.refresh(team)
+        invalidate_statistics()
         
         return team
 
@@ -93,11 +96,7 @@ class TeamService:
         team.member_count = db.query(models.User).filter(models.User.team_id == team.id).count()
         
         # 获取团队负责人姓名
-        if team.leader_id:
-            leader = db.query(models.User).filter(models.User.id == team.leader_id).first()
-            team.leader_name = leader.name if leader else None
-        else:
-            team.leader_name = None
+        team.leader_name = name_of(user_refs.get_many(db, [team.leader_id]), team.leader_id)
         
         return team
 
@@ -134,6 +133,7 @@ class TeamService:
         db.add(team)
         db.commit()
         db.refresh(team)
+        team_refs.invalidate(team.id)
         
         return team
 
@@ -161,6 +161,8 @@ class TeamService:
         # 删除团队
         db.delete(team)
         db.commit()
+        team_refs.invalidate(team_id)
+        invalidate_statistics()
 
     @staticmethod
     def get_team_members(db: Session, team_id: int) -> List[models.User]:
@@ -203,6 +205,7 @@ class TeamService:
         user.team_id = team_id
         db.add(user)
         db.commit()
+        invalidate_user(user_id)
 
     @staticmethod
     def remove_user_from_team(
@@ -230,6 +233,7 @@ class TeamService:
         user.team_id = None
         db.add(user)
         db.commit()
+        invalidate_user(user_id)
 
 
 team_service = TeamService() 
\ No newline at end of file
@@ -1,47 +1,67 @@
-from typing import Any, List, Optional, Dict
+from typing import AbstractSet, Any, List, Optional, Dict
 
 from fastapi import HTTPException
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 
 from app import models, schemas
+from app.crud.base import defer_unrequested
+from app.db.session import commit_or_flush, run_after_commit
+from app.services.reference_cache_service import name_of, template_refs, user_refs
+
+# 列表接口未请求时延迟加载的大字段
+TEMPLATE_DEFERRABLE_COLUMNS = ("description", "default_description", "default_metadata")
 
 class TemplateService:
+    @staticmethod
+    def _fill_user_names(db: Session, templates: List[models.Template]) -> None:
+        """填充创建者和更新者姓名"""
+        users = user_refs.get_many(db, (
+            user_id for template in templates for user_id in (template.created_by_id, template.updated_by_id)
+        ))
+        for template in templates:
+            if template.created_by_id:
+                template.created_by_name = name_of(users, template.created_by_id)
+            if template.updated_by_id:
+                template.updated_by_name = name_of(users, template.updated_by_id)
+
     @staticmethod
     def get_templates(
         db: Session, 
         skip: int = 0, 
         limit: int = 100,
-        search: Optional[str] = None
+        search: Optional[str] = None,
+        fields: Optional[AbstractSet[str]] = None,
     ) -> List[models.Template]:
         """
         获取模板列表
+        fields为只返回的字段（稀疏字段集），未请求的大字段延迟加载，未请求的姓名和字段数量不再查询
         """
         # 构建查询
-        query = db.query(models.Template)
+        query = db.query(models.Template).options(
+            *defer_unrequested(models.Template, fields, TEMPLATE_DEFERRABLE_COLUMNS)
+        )
         
         # 搜索
         if search:
             query = query.filter(models.Template.name.ilike(f"%{search}%"))
         
-        # 获取总数
-        total = query.count()
-        
         # 分页
         templates = query.offset(skip).limit(limit).all()
         
         # 获取关联信息
-        for template in templates:
-            # 获取创建者和更新者信息
-            if template.created_by_id:
-                creator = db.query(models.User).filter(models.User.id == template.created_by_id).first()
-                template.created_by_name = creator.name if creator else None
-            
-            if template.updated_by_id:
-                updater = db.query(models.User).filter(models.User.id == template.updated_by_id).first()
-                template.updated_by_name = updater.name if updater else None
-            
-            # 获取字段数量
-            template.field_count = db.query(models.Field).filter(models.Field.template_id == template.id).count()
+        if fields is None or fields & {"created_by_name", "updated_by_name"}:
+            TemplateService._fill_user_names(db, templates)
+        if (fields is None or "fields_count" in fields) and templates:
+            # 获取字段数量，整页一条分组查询
+            counts = dict(
+                db.query(models.Field.template_id, func.count(models.Field.id))
+                .filter(models.Field.template_id.in_([template.id for template in templates]))
+                .group_by(models.Field.template_id)
+                .all()
+            )
+            for template in templates:
+                template.fields_count = counts.get(template.id, 0)
             
         return templates
 
@@ -72,8 +92,7 @@ class TemplateService:
             updated_by_id=current_user_id,
         )
         db.add(template)
-        db.commit()
-        db.refresh(template)
+        commit_or_flush(db, template)
         
         # 创建字段
         if template_in.fields:
@@ -89,19 +108,13 @@ class TemplateService:
                     template_id=template.id,
                 )
                 db.add(field)
-            db.commit()
+            commit_or_flush(db)
         
         # 获取关联信息
-        if template.created_by_id:
-            creator = db.query(models.User).filter(models.User.id == template.created_by_id).first()
-            template.created_by_name = creator.name if creator else None
-        
-        if template.updated_by_id:
-            updater = db.query(models.User).filter(models.User.id == template.updated_by_id).first()
-            template.updated_by_name = updater.name if updater else None
+        TemplateService._fill_user_names(db, [template])
         
         # 获取字段数量
-        template.field_count = db.query(models.Field).filter(models.Field.template_id == template.id).count()
+        template.fields_count = db.query(models.Field).filter(models.Field.template_id == template.id).count()
         
         return template
 
@@ -115,13 +128,7 @@ class TemplateService:
             raise HTTPException(status_code=404, detail="模板不存在")
         
         # 获取关联信息
-        if template.created_by_id:
-            creator = db.query(models.User).filter(models.User.id == template.created_by_id).first()
-            template.created_by_name = creator.name if creator else None
-        
-        if template.updated_by_id:
-            updater = db.query(models.User).filter(models.User.id == template.updated_by_id).first()
-            template.updated_by_name = updater.name if updater else None
+        TemplateService._fill_user_names(db, [template])
         
         # 获取字段
         fields = db.query(models.Field).filter(models.Field.template_id == template.id).order_by(models.Field.order).all()
@@ -163,8 +170,8 @@ class TemplateService:
         template.updated_by_id = current_user_id
         
         db.add(template)
-        db.commit()
-        db.refresh(template)
+        commit_or_flush(db, template)
+        run_after_commit(db, lambda: template_refs.invalidate(template_id))
         
         # 处理字段更新
         if hasattr(template_in, "fields") and template_in.fields is not None:
@@ -213,16 +220,10 @@ class TemplateService:
                 if field:
                     db.delete(field)
             
-            db.commit()
+            commit_or_flush(db)
         
         # 获取关联信息
-        if template.created_by_id:
-            creator = db.query(models.User).filter(models.User.id == template.created_by_id).first()
-            template.created_by_name = creator.name if creator else None
-        
-        if template.updated_by_id:
-            updater = db.query(models.User).filter(models.User.id == template.updated_by_id).first()
-            template.updated_by_name = updater.name if updater else None
+        TemplateService._fill_user_names(db, [template])
         
         # 获取字段
         fields = db.query(models.Field).filter(models.Field.template_id == template.id).order_by(models.Field.order).all()
@@ -249,7 +250,8 @@ class TemplateService:
         
         # 删除模板
         db.delete(template)
-        db.commit()
+        commit_or_flush(db)
+        run_after_commit(db, lambda: template_refs.invalidate(template_id))
         
         return template
 
@@ -0,0 +1,64 @@
+from typing import Optional
+
+from sqlalchemy import inspect
+from sqlalchemy.orm import Session, make_transient_to_detached
+
+from app import models
+from app.core.config import settings
+from app.core.cache import Cache
+from app.services.reference_cache_service import user_refs
+
+# 已认证用户的缓存，键为用户ID，值为用户的列属性字典
+# 使用共享缓存后端时，一个worker修改用户后其他worker立即读到新数据
+_user_cache = Cache("users", maxsize=4096, ttl=settings.USER_CACHE_TTL)
+
+
+def _columns(user: models.User) -> dict:
+    """复制用户的列属性"""
+    return {attr.key: getattr(user, attr.key) for attr in inspect(models.User).column_attrs}
+
+
+def _snapshot(data: dict) -> models.User:
+    """由列属性生成不属于任何会话的游离对象"""
+    snapshot = models.User(**data)
+    make_transient_to_detached(snapshot)
+    return snapshot
+
+
+def get_user(db: Session, user_id: int) -> Optional[models.User]:
+    """
+    获取用户，优先使用缓存
+    命中时由缓存的列属性生成快照，通过 merge(load=False) 把快照的副本挂到当前会话，不执行查询；
+    返回的对象可以正常访问关系属性和修改，缓存中的快照本身不会被修改
+    """
+    if settings.USER_CACHE_TTL <= 0:
+        return db.query(models.User).filter(models.User.id == user_id).first()
+
+    loaded = []
+
+    def load(user_ids) -> dict:
+        # 按读取时的版本号写入，查询期间用户被修改或清除缓存时，查到的旧数据不会被后续读取采用；不存在的用户不缓存
+        user = db.query(models.User).filter(models.User.id == user_id).first()
+        loaded.append(user)
+        return {user_id: _columns(user)} if user is not None else {}
+
+    data = _user_cache.get_many_or_set([user_id], load).get(user_id)
+    if loaded:
+        return loaded[0]
+    return db.merge(_snapshot(data), load=False) if data is not None else None
+
+
+def invalidate_user(user_id: int) -> None:
+    """用户信息变更（修改、删除、停用、调整团队、修改密码）后清除缓存，包括显示名所用的引用缓存"""
+    _user_cache.delete(int(user_id))
+    user_refs.invalidate(user_id)
+
+
+def clear_user_cache() -> None:
+    """清空用户缓存（所有worker）"""
+    _user_cache.clear()
+
+
+def get_user_cache_stats() -> dict:
+    """获取用户缓存的命中统计"""
+    return _user_cache.stats()
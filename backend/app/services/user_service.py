@@ -5,8 +5,12 @@ from sqlalchemy.orm import Session
 import pandas as pd
 import io
 from app import models, schemas
-from app.core.security import get_password_hash
-from app.services.casbin_service import add_role_for_user, remove_role_for_user, get_roles_for_user
+from app.core.config import settings
+from app.core.security import get_password_hash, hash_passwords
+from app.db.bulk import bulk_insert, chunked
+from app.services.casbin_service import add_role_for_user, add_roles_for_users, remove_role_for_user, get_roles_for_user
+from app.services.statistics_service import invalidate_statistics
+from app.services.user_cache_service import invalidate_user
 
 
 class UserService:
@@ -56,6 +60,7 @@ class UserService:
         db.add(user)
         db.commit()
         db.refresh(user)
+        invalidate_statistics()
         
         # 为用户分配角色
         if hasattr(user_in, 'roles') and user_in.roles:
@@ -123,6 +128,7 @@ class UserService:
             setattr(user, key, value)
         
         db.commit()
+        invalidate_user(user.id)
         db.refresh(user)
         
         return user
@@ -136,9 +142,27 @@ class UserService:
         
         db.delete(user)
         db.commit()
+        invalidate_user(user_id)
+        invalidate_statistics()
         
         return user
 
+    @staticmethod
+    def _import_user_mapping(row: Any, hashed_password: str) -> Dict[str, Any]:
+        """导入的一行Excel数据对应的users表记录"""
+        department = row.get('department', '未分配')
+        team_id = row.get('team_id')
+        return {
+            "username": row['username'],
+            "ehr_id": row['ehr_id'],
+            "hashed_password": hashed_password,
+            "name": row['name'],
+            "department": department,
+            "is_active": True,
+            "is_superuser": False,
+            "team_id": team_id if pd.notna(team_id) else None,
+        }
+
     @staticmethod
     def import_users_from_excel(db: Session, file: UploadFile) -> Dict[str, Any]:
         """从Excel文件导入用户"""
@@ -151,6 +175,10 @@ class UserService:
             failed_count = 0
             error_messages = []
             
+            # 第一遍：校验数据，收集需要创建的行
+            pending_rows = []
+            seen_usernames = set()
+            seen_ehr_ids = set()
             for _, row in df.iterrows():
                 try:
                     # 检查必要字段是否存在
@@ -159,46 +187,71 @@ class UserService:
                         error_messages.append(f"行数据缺少必要字段: {row}")
                         continue
                     
-                    # 检查是否存在重复用户
-                    existing_user = db.query(models.User).filter(
-                        (models.User.username == row['username']) | 
-                        (models.User.ehr_id == row['ehr_id'])
-                    ).first()
+                    # 检查是否存在重复用户（包括文件中前面的行）
+                    existing_user = (
+                        row['username'] in seen_usernames or row['ehr_id'] in seen_ehr_ids
+                        or db.query(models.User).filter(
+                            (models.User.username == row['username']) | 
+                            (models.User.ehr_id == row['ehr_id'])
+                        ).first()
+                    )
                     
                     if existing_user:
                         failed_count += 1
                         error_messages.append(f"用户名或EHR号已存在: {row['username']}, {row['ehr_id']}")
                         continue
                     
-                    # 创建用户
-                    department = row.get('department', '未分配')
-                    team_id = row.get('team_id')
-                    
-                    user = models.User(
-                        username=row['username'],
-                        ehr_id=row['ehr_id'],
-                        hashed_password=get_password_hash(str(row['password'])),
-                        name=row['name'],
-                        department=department,
-                        is_active=True,
-                        is_superuser=False,
-                        team_id=team_id if pd.notna(team_id) else None
-                    )
-                    
-                    db.add(user)
-                    db.commit()
-                    db.refresh(user)
-                    
-                    # 分配角色
-                    role = row.get('role', 'user')
-                    add_role_for_user(str(user.id), str(role))
-                    
-                    success_count += 1
+                    seen_usernames.add(row['username'])
+                    seen_ehr_ids.add(row['ehr_id'])
+                    pending_rows.append(row)
                     
                 except Exception as e:
                     failed_count += 1
                     error_messages.append(f"处理用户时出错: {row.get('username', 'Unknown')}, 错误: {str(e)}")
+            
+            # 并行计算所有待创建用户的密码哈希
+            hashed_passwords = hash_passwords([str(row['password']) for row in pending_rows])
+            
+            # 第二遍：按批创建用户，每批一条executemany语句
+            table = models.User.__table__
+            role_assignments = []
+            for batch in chunked(zip(pending_rows, hashed_passwords), settings.DB_BULK_BATCH_SIZE):
+                mappings = [UserService._import_user_mapping(row, hashed_password) for row, hashed_password in batch]
+                created_rows = []
+                try:
+                    bulk_insert(db, table, mappings)
+                    db.commit()
+                    created_rows = [row for row, _ in batch]
+                except Exception:
                     db.rollback()
+                    # 整批失败时逐行插入，找出出错的行
+                    for (row, _), mapping in zip(batch, mappings):
+                        try:
+                            bulk_insert(db, table, [mapping])
+                            db.commit()
+                            created_rows.append(row)
+                        except Exception as e:
+                            failed_count += 1
+                            error_messages.append(f"处理用户时出错: {row.get('username', 'Unknown')}, 错误: {str(e)}")
+                            db.rollback()
+                
+                if not created_rows:
+                    continue
+                
+                # 分配角色
+                user_ids = dict(
+                    db.query(models.User.username, models.User.id)
+                    .filter(models.User.username.in_([row['username'] for row in created_rows]))
+                    .all()
+                )
+                for row in created_rows:
+                    role_assignments.append((str(user_ids[row['username']]), str(row.get('role', 'user'))))
+                    success_count += 1
+            
+            # 批量分配角色，权限缓存只失效一次
+            add_roles_for_users(role_assignments)
+            if success_count:
+                invalidate_statistics()
             
             return {
                 "success_count": success_count,
@@ -0,0 +1,84 @@
+from typing import Optional
+
+from sqlalchemy import and_, case, exists, or_, true
+from sqlalchemy.orm import Query
+from sqlalchemy.sql.elements import ColumnElement
+
+from app import models
+
+
+def _is_unrestricted(user: Optional[models.User]) -> bool:
+    """未指定用户（内部调用）或超级管理员不受可见性限制"""
+    return user is None or user.is_superuser
+
+
+def _assigned_approver_condition(user_id: int, ledger_id_column) -> ColumnElement:
+    """
+    用户是台账工作流中某个节点的审批人：
+    节点直接指定的审批人，或节点定义的审批人列表中包含该用户
+    """
+    instance_node = models.WorkflowInstanceNode
+    listed_approver = exists().where(
+        and_(
+            models.workflow_node_approvers.c.workflow_node_id == instance_node.workflow_node_id,
+            models.workflow_node_approvers.c.user_id == user_id,
+        )
+    )
+    return exists().where(
+        and_(
+            models.WorkflowInstance.ledger_id == ledger_id_column,
+            instance_node.workflow_instance_id == models.WorkflowInstance.id,
+            or_(instance_node.approver_id == user_id, listed_approver),
+        )
+    )
+
+
+def ledger_visibility_filter(user: Optional[models.User]) -> ColumnElement:
+    """
+    台账可见性条件：超级管理员 / 创建者 / 同团队 / 当前或已指派的审批人
+    返回可直接用于 filter() 的SQL表达式，不会产生逐行查询；作为查询列时使用 visibility_column 包装
+    """
+    if _is_unrestricted(user):
+        return true()
+
+    conditions = [
+        models.Ledger.created_by_id == user.id,
+        models.Ledger.current_approver_id == user.id,
+        _assigned_approver_condition(user.id, models.Ledger.id),
+    ]
+    if user.team_id is not None:
+        conditions.append(models.Ledger.team_id == user.team_id)
+    return or_(*conditions)
+
+
+def workflow_instance_visibility_filter(user: Optional[models.User]) -> ColumnElement:
+    """
+    工作流实例可见性条件：实例发起人，或者能看到实例关联的台账
+    """
+    if _is_unrestricted(user):
+        return true()
+
+    return or_(
+        models.WorkflowInstance.created_by == user.id,
+        exists().where(
+            and_(
+                models.Ledger.id == models.WorkflowInstance.ledger_id,
+                ledger_visibility_filter(user),
+            )
+        ),
+    )
+
+
+def visibility_column(condition: ColumnElement) -> ColumnElement:
+    """
+    把可见性条件转换为查询列visible（可见为1，否则为0），用于在同一条查询中区分404和403
+    Oracle不支持在SELECT列表中直接使用布尔表达式，因此用CASE包装
+    """
+    return case((condition, 1), else_=0).label("visible")
+
+
+def filter_visible_ledgers(query: Query, user: Optional[models.User]) -> Query:
+    """只保留用户可见的台账"""
+    if _is_unrestricted(user):
+        return query
+    return query.filter(ledger_visibility_filter(user))
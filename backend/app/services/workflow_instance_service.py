@@ -5,9 +5,15 @@ from sqlalchemy.orm import Session
 from fastapi.encoders import jsonable_encoder
 
 from app import crud, models, schemas
+from app.db.session import commit_or_flush
 from app.utils.logger import LoggerService, log_audit
 from app.api import deps
 from app.services.workflow_node_service import WorkflowNodeService
+from app.services.visibility_service import (
+    ledger_visibility_filter,
+    visibility_column,
+    workflow_instance_visibility_filter,
+)
 
 
 class WorkflowInstanceService:
@@ -22,56 +28,23 @@ class WorkflowInstanceService:
         """
         获取工作流实例详情
         """
-        # 获取工作流实例
-        instance = db.query(models.WorkflowInstance).filter(models.WorkflowInstance.id == instance_id).first()
-        if not instance:
+        # 获取工作流实例，同时在同一条查询中计算当前用户是否可见
+        row = db.query(
+            models.WorkflowInstance, visibility_column(workflow_instance_visibility_filter(current_user))
+        ).filter(models.WorkflowInstance.id == instance_id).first()
+        if not row:
             raise HTTPException(status_code=404, detail="工作流实例不存在")
         
+        # 检查用户是否有权限查看：发起人，或能看到关联台账（创建者、同团队、审批人）
+        instance, visible = row
+        if not visible:
+            raise HTTPException(status_code=403, detail="无权查看此工作流实例")
+        
         # 获取台账
         ledger = db.query(models.Ledger).filter(models.Ledger.id == instance.ledger_id).first()
         if not ledger:
             raise HTTPException(status_code=404, detail="关联的台账不存在")
         
-        # 检查用户是否有权限查看
-        # if not crud.user.is_superuser(current_user) and ledger.created_by_id != current_user.id:
-        #     # 检查用户是否是审批人
-        #     is_approver = False
-            
-        #     # 获取实例的所有节点
-        #     instance_nodes = db.query(models.WorkflowInstanceNode).filter(
-        #         models.WorkflowInstanceNode.workflow_instance_id == instance_id
-        #     ).all()
-            
-        #     for node in instance_nodes:
-        #         if node.approver_id == current_user.id:
-        #             is_approver = True
-        #             break
-                
-        #         # 检查用户是否在节点的审批人列表中
-        #         workflow_node = db.query(models.WorkflowNode).filter(
-        #             models.WorkflowNode.id == node.workflow_node_id
-        #         ).first()
-                
-        #         if workflow_node:
-        #             # 获取节点审批人
-        #             approvers = db.query(models.User).join(
-        #                 models.workflow_node_approvers,
-        #                 models.workflow_node_approvers.c.user_id == models.User.id
-        #             ).filter(
-        #                 models.workflow_node_approvers.c.workflow_node_id == workflow_node.id
-        #             ).all()
-                    
-        #             for approver in approvers:
-        #                 if approver.id == current_user.id:
-        #                     is_approver = True
-        #                     break
-                
-        #         if is_approver:
-        #             break
-            
-        #     if not is_approver:
-        #         raise HTTPException(status_code=403, detail="无权查看此工作流实例")
-        
         # 获取当前节点
         current_node = None
         if instance.current_node_id:
@@ -134,6 +107,71 @@ class WorkflowInstanceService:
         
         return result
 
+    @staticmethod
+    def get_workflow_instances_by_ledgers(
+        db: Session,
+        ledgers: List[models.Ledger]
+    ) -> Dict[int, schemas.WorkflowInstance]:
+        """
+        批量获取一页台账的工作流实例，返回台账ID到实例的映射
+        内容与逐条调用 get_workflow_instance_by_ledger 相同，调用方负责保证台账对当前用户可见；
+        实例、节点、节点定义、工作流和用户各用一条查询获取，查询次数与台账数量无关
+        """
+        ledger_names = {ledger.id: ledger.name for ledger in ledgers}
+        if not ledger_names:
+            return {}
+        instances = db.query(models.WorkflowInstance).filter(
+            models.WorkflowInstance.ledger_id.in_(list(ledger_names))
+        ).all()
+        if not instances:
+            return {}
+        
+        # 整页实例的节点、节点定义、工作流和相关用户
+        instance_nodes = db.query(models.WorkflowInstanceNode).filter(
+            models.WorkflowInstanceNode.workflow_instance_id.in_([instance.id for instance in instances])
+        ).order_by(models.WorkflowInstanceNode.id).all()
+        workflow_nodes = {
+            node.id: node
+            for node in db.query(models.WorkflowNode).filter(
+                models.WorkflowNode.id.in_({node.workflow_node_id for node in instance_nodes})
+            )
+        } if instance_nodes else {}
+        workflows = dict(db.query(models.Workflow.id, models.Workflow.name).filter(
+            models.Workflow.id.in_({instance.workflow_id for instance in instances})
+        ).all())
+        user_ids = {instance.created_by for instance in instances}
+        user_ids.update(node.approver_id for node in instance_nodes if node.approver_id)
+        users = {user.id: user for user in db.query(models.User).filter(models.User.id.in_(user_ids))}
+        
+        nodes_by_instance: Dict[int, List[models.WorkflowInstanceNode]] = {}
+        for node in instance_nodes:
+            workflow_node = workflow_nodes.get(node.workflow_node_id)
+            if workflow_node:
+                node.node_name = workflow_node.name
+                node.node_type = workflow_node.node_type
+            approver = users.get(node.approver_id) if node.approver_id else None
+            if approver:
+                node.approver = approver
+                node.approver_name = approver.name
+            nodes_by_instance.setdefault(node.workflow_instance_id, []).append(node)
+        
+        results = {}
+        for instance in instances:
+            result = schemas.WorkflowInstance(**jsonable_encoder(instance))
+            result.nodes = nodes_by_instance.get(instance.id, [])
+            result.current_node = next(
+                (node for node in result.nodes if node.id == instance.current_node_id), None
+            )
+            result.workflow_name = workflows.get(instance.workflow_id)
+            result.ledger_name = ledger_names[instance.ledger_id]
+            creator = users.get(instance.created_by)
+            if creator:
+                result.creator = creator
+                result.creator_name = creator.name
+            results[instance.ledger_id] = result
+        
+        return results
+
     @staticmethod
     def get_workflow_instance_by_ledger(
         db: Session, 
@@ -143,20 +181,16 @@ class WorkflowInstanceService:
         """
         获取台账的活动工作流实例
         """
-        # 获取台账
-        ledger = crud.ledger.get(db, id=ledger_id)
-        if not ledger:
+        # 获取台账，同时计算当前用户是否可见
+        row = db.query(
+            models.Ledger.id, visibility_column(ledger_visibility_filter(current_user))
+        ).filter(models.Ledger.id == ledger_id).first()
+        if not row:
             raise HTTPException(status_code=404, detail="台账不存在")
         
         # 检查用户是否有权限查看
-        # if not crud.user.is_superuser(current_user) and ledger.created_by_id != current_user.id:
-        #     # 检查用户是否在台账所属团队中
-        #     if ledger.team_id:
-        #         user_teams = [team.id for team in current_user.teams]
-        #         if ledger.team_id not in user_teams:
-        #             raise HTTPException(status_code=403, detail="无权查看此台账的工作流实例")
-        #     else:
-        #         raise HTTPException(status_code=403, detail="无权查看此台账的工作流实例")
+        if not row.visible:
+            raise HTTPException(status_code=403, detail="无权查看此台账的工作流实例")
         
         # 获取活动的工作流实例
         instance = crud.workflow_instance.get_by_ledger(db, ledger_id=ledger_id)
@@ -174,31 +208,23 @@ class WorkflowInstanceService:
         """
         获取工作流实例的所有节点
         """
-        # 获取工作流实例
-        instance = crud.workflow_instance.get(db, id=instance_id)
-        if not instance:
+        # 获取工作流实例，同时计算当前用户是否可见
+        row = db.query(
+            models.WorkflowInstance, visibility_column(workflow_instance_visibility_filter(current_user))
+        ).filter(models.WorkflowInstance.id == instance_id).first()
+        if not row:
             raise HTTPException(status_code=404, detail="工作流实例不存在")
         
+        # 检查用户是否有权限查看
+        instance, visible = row
+        if not visible:
+            raise HTTPException(status_code=403, detail="无权查看此工作流实例的节点")
+        
         # 获取台账
         ledger = crud.ledger.get(db, id=instance.ledger_id)
         if not ledger:
             raise HTTPException(status_code=404, detail="关联的台账不存在")
         
-        # 检查用户是否有权限查看
-        # if not crud.user.is_superuser(current_user) and ledger.created_by_id != current_user.id:
-        #     # 检查用户是否是审批人
-        #     is_approver = False
-            
-        #     # 获取实例的所有节点
-        #     instance_nodes = crud.workflow_instance_node.get_by_instance(db, instance_id=instance_id)
-        #     for node in instance_nodes:
-        #         if node.approver_id == current_user.id:
-        #             is_approver = True
-        #             break
-            
-        #     if not is_approver:
-        #         raise HTTPException(status_code=403, detail="无权查看此工作流实例的节点")
-        
         # 获取所有节点
         nodes = crud.workflow_instance_node.get_by_instance(db, instance_id=instance_id)
         
@@ -302,7 +328,7 @@ class WorkflowInstanceService:
                 ledger.approved_at = datetime.now()
                 ledger.status = "completed"
                 db.add(ledger)
-                db.commit()
+                commit_or_flush(db)
         
         return result
 
@@ -386,7 +412,7 @@ class WorkflowInstanceService:
                 ledger.approval_status = "rejected"
                 ledger.status = "returned"
                 db.add(ledger)
-                db.commit()
+                commit_or_flush(db)
         
         return result
 
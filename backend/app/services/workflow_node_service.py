@@ -7,6 +7,7 @@ from pydantic import BaseModel
 
 from app import crud, models, schemas
 from app.api import deps
+from app.services.reference_cache_service import role_refs
 
 class WorkflowNodeService:
     @staticmethod
@@ -49,7 +50,7 @@ class WorkflowNodeService:
         
         # 获取角色信息
         if node.approver_role_id:
-            role = db.query(models.Role).filter(models.Role.id == node.approver_role_id).first()
+            role = role_refs.get(db, node.approver_role_id)
             if role:
                 node_dict["approver_role_name"] = role.name
         
@@ -7,6 +7,7 @@ from fastapi.encoders import jsonable_encoder
 
 from app import models, schemas
 from app.utils.logger import LoggerService
+from app.services.reference_cache_service import workflow_refs
 from app.services.workflow_node_service import WorkflowNodeService
 
 class WorkflowService:
@@ -266,6 +267,7 @@ class WorkflowService:
         db.add(workflow)
         db.commit()
         db.refresh(workflow)
+        workflow_refs.invalidate(workflow.id)
         
         # 记录日志
         LoggerService.log_info(
@@ -321,6 +323,7 @@ class WorkflowService:
         # 删除工作流
         db.delete(workflow)
         db.commit()
+        workflow_refs.invalidate(workflow_id)
         
         # 转换为Pydantic模型返回
         try:
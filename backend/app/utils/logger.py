@@ -2,17 +2,15 @@ import logging
 from typing import Dict, Any, Optional
 from datetime import datetime
 from fastapi import Request
+from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.orm import Session
 
-from app.db.session import SessionLocal
+from app.crud import crud_log
+from app.db.session import SessionLocal, commit_or_flush
 from app.models.log import SystemLog, AuditLog, LogLevel, LogAction
 from app.models.workflow import WorkflowInstance, WorkflowInstanceNode
 
-# 配置标准Python日志
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-)
+# 标准Python日志的处理程序统一由 app.core.log_config.setup_logging 配置
 logger = logging.getLogger("taizhang")
 
 
@@ -34,6 +32,29 @@ class LoggerService:
         
         return {"ip_address": ip_address, "user_agent": user_agent}
     
+    @staticmethod
+    def _increment_hourly_stat(
+        db: Session,
+        created_at: datetime,
+        level: str,
+        module: str,
+        action: str,
+        user_id: Optional[int],
+    ) -> None:
+        """累加日志小时汇总，失败时只回滚汇总部分，不影响日志本身的写入"""
+        try:
+            with db.begin_nested():
+                crud_log.system_log_hourly_stat.increment(
+                    db,
+                    bucket=crud_log.system_log_hourly_stat.truncate_to_hour(created_at),
+                    module=module,
+                    action=action,
+                    level=level,
+                    user_id=user_id,
+                )
+        except SQLAlchemyError as e:
+            logger.warning(f"更新日志小时汇总失败: {str(e)}")
+    
     @classmethod
     def log_system(
         cls,
@@ -52,8 +73,12 @@ class LoggerService:
         # 获取客户端信息
         client_info = cls.get_client_info(request)
         
+        # 日志时间与小时汇总分桶使用同一时间戳
+        created_at = datetime.now()
+        
         # 创建日志记录
         log_entry = SystemLog(
+            created_at=created_at,
             user_id=user_id,
             ip_address=client_info["ip_address"],
             user_agent=client_info["user_agent"],
@@ -66,10 +91,10 @@ class LoggerService:
             details=details,
         )
         
-        # 记录到数据库
+        # 记录到数据库，并在同一事务中累加小时汇总
         db.add(log_entry)
-        db.commit()
-        db.refresh(log_entry)
+        cls._increment_hourly_stat(db, created_at, level, module, action, user_id)
+        commit_or_flush(db, log_entry)
         
         # 同时记录到标准日志
         log_message = f"[{level.upper()}] {module}.{action}: {message}"
@@ -223,8 +248,7 @@ class LoggerService:
         
         # 记录到数据库
         db.add(log_entry)
-        db.commit()
-        db.refresh(log_entry)
+        commit_or_flush(db, log_entry)
         
         # 构造日志消息
         log_message = f"AUDIT: {action}"
@@ -0,0 +1,180 @@
+"""
+ORM对象到字典的快速序列化
+
+schemas.Ledger.model_validate(obj, from_attributes=True) 会逐字段校验类型并构造模型实例，
+列表接口一页几百条台账（包含data字典和嵌套的工作流实例）时这部分开销占响应时间的大头。
+orm_serializer 根据Pydantic模型的字段生成一个只做属性读取的函数，直接得到可交给orjson的字典：
+字段的取值规则与 from_attributes 相同（对象上没有该属性时使用字段默认值），嵌套模型递归处理，
+datetime等类型由orjson直接编码。ORM对象已加载的属性直接从 __dict__ 读取，跳过SQLAlchemy属性描述符。
+带有校验器、别名或自定义序列化的模型（如User）无法跳过Pydantic，仍按原方式处理，
+同一次 serialize_list 中重复出现的同一对象（如各节点的审批人）只处理一次
+"""
+import threading
+import typing
+from contextvars import ContextVar
+from typing import AbstractSet, Any, Callable, Dict, Iterable, List, Optional, Tuple, Type
+
+from pydantic import BaseModel
+
+Serializer = Callable[[Any], Optional[Dict[str, Any]]]
+# 序列化计划：每个输出字段的(字段名, 默认值, 转换函数)
+Plan = List[Tuple[str, Any, Optional[Callable[[Any], Any]]]]
+
+# 已生成的全部字段的序列化函数和计划，键为模型，由Pydantic处理的模型计划为None；
+# 稀疏字段集每次从计划中筛选，不按客户端请求的字段组合缓存
+_serializers: Dict[Type[BaseModel], Tuple[Serializer, Optional[Plan]]] = {}
+# 生成序列化函数时加锁；生成中的函数（包括其间递归生成的嵌套模型的函数）先放在_pending中，
+# 整组字段列表填好后才发布到_serializers，其他线程不会拿到字段列表尚未填好的函数
+_lock = threading.RLock()
+_pending: Dict[Type[BaseModel], Tuple[Serializer, Optional[Plan]]] = {}
+# 一次 serialize_list 中由Pydantic处理过的对象，键为((模型, 字段集合), 对象id)
+_memo: ContextVar[Optional[Dict[Any, Any]]] = ContextVar("serializer_memo", default=None)
+_MISSING = object()
+
+
+def _nested_model(annotation: Any) -> Optional[Type[BaseModel]]:
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        return annotation
+    return None
+
+
+def _converter(annotation: Any) -> Optional[Callable[[Any], Any]]:
+    """字段值的转换函数，普通值不需要转换时返回None"""
+    origin = typing.get_origin(annotation)
+    if origin is typing.Union:
+        args = [arg for arg in typing.get_args(annotation) if arg is not type(None)]
+        return _converter(args[0]) if len(args) == 1 else None
+    if origin in (list, List):
+        args = typing.get_args(annotation)
+        item = _converter(args[0]) if args else None
+        if item is None:
+            return None
+        return lambda value: [item(v) for v in value] if value is not None else None
+    model = _nested_model(annotation)
+    if model is not None:
+        return orm_serializer(model)
+    return None
+
+
+def _needs_pydantic(schema: Type[BaseModel]) -> bool:
+    """模型带有校验器、别名或自定义序列化时，必须由Pydantic处理"""
+    decorators = schema.__pydantic_decorators__
+    if (
+        decorators.validators
+        or decorators.field_validators
+        or decorators.root_validators
+        or decorators.model_validators
+        or decorators.field_serializers
+        or decorators.model_serializers
+        or decorators.computed_fields
+    ):
+        return True
+    return any(
+        field.alias or field.serialization_alias or field.validation_alias
+        for field in schema.model_fields.values()
+    )
+
+
+def _pydantic_serializer(schema: Type[BaseModel], fields: Optional[AbstractSet[str]]) -> Serializer:
+    include = set(fields) if fields is not None else None
+    variant = (schema, frozenset(include) if include is not None else None)
+
+    def serialize(obj: Any) -> Optional[Dict[str, Any]]:
+        if obj is None:
+            return None
+        memo = _memo.get()
+        key = (variant, id(obj))
+        if memo is not None and key in memo:
+            return memo[key][1]
+        model = obj if isinstance(obj, schema) else schema.model_validate(obj, from_attributes=True)
+        result = model.model_dump(include=include)
+        if memo is not None:
+            # 同时保存对象本身，保证调用结束前对象id不会被复用
+            memo[key] = (obj, result)
+        return result
+
+    return serialize
+
+
+def orm_serializer(schema: Type[BaseModel], fields: Optional[AbstractSet[str]] = None) -> Serializer:
+    """
+    获取模型的序列化函数，函数接收ORM对象（或字典、模型实例），返回字典，对象为None时返回None
+    fields为只输出的顶层字段（稀疏字段集），未指定时输出全部字段；嵌套模型总是输出全部字段
+    """
+    serializer, plan = _schema_serializer(schema)
+    if fields is None:
+        return serializer
+    if plan is None:
+        return _pydantic_serializer(schema, fields)
+    return _plan_serializer([entry for entry in plan if entry[0] in fields])
+
+
+def _schema_serializer(schema: Type[BaseModel]) -> Tuple[Serializer, Optional[Plan]]:
+    """获取模型全部字段的序列化函数和计划，首次使用时生成"""
+    entry = _serializers.get(schema)
+    if entry is not None:
+        return entry
+
+    with _lock:
+        entry = _serializers.get(schema) or _pending.get(schema)
+        if entry is not None:
+            return entry
+        outermost = not _pending
+        try:
+            entry = _build_serializer(schema)
+            if outermost:
+                _serializers.update(_pending)
+        finally:
+            if outermost:
+                _pending.clear()
+    return entry
+
+
+def _plan_serializer(plan: Plan) -> Serializer:
+    """按计划读取属性的序列化函数"""
+    def serializer(obj: Any) -> Optional[Dict[str, Any]]:
+        if obj is None:
+            return None
+        if isinstance(obj, dict):
+            get = obj.get
+            return {name: convert(get(name, default)) if convert else get(name, default) for name, default, convert in plan}
+        loaded = getattr(obj, "__dict__", {})
+        result = {}
+        for name, default, convert in plan:
+            value = loaded.get(name, _MISSING)
+            if value is _MISSING:
+                # 未加载的列、关系或属性，按from_attributes的方式读取
+                value = getattr(obj, name, default)
+            result[name] = convert(value) if convert is not None else value
+        return result
+
+    return serializer
+
+
+def _build_serializer(schema: Type[BaseModel]) -> Tuple[Serializer, Optional[Plan]]:
+    """生成序列化函数并放入_pending，调用方持有_lock"""
+    if _needs_pydantic(schema):
+        entry = _pending[schema] = (_pydantic_serializer(schema, None), None)
+        return entry
+
+    # 先登记再生成字段，自引用的模型可以拿到自身的序列化函数
+    plan: Plan = []
+    entry = _pending[schema] = (_plan_serializer(plan), plan)
+    # 解析 Optional['User'] 这类前向引用
+    hints = typing.get_type_hints(schema)
+    for name, field in schema.model_fields.items():
+        default = None if field.is_required() else field.get_default(call_default_factory=True)
+        plan.append((name, default, _converter(hints.get(name, field.annotation))))
+    return entry
+
+
+def serialize_list(
+    schema: Type[BaseModel], items: Iterable[Any], fields: Optional[AbstractSet[str]] = None
+) -> List[Dict[str, Any]]:
+    """序列化对象列表，fields为只输出的字段"""
+    serializer = orm_serializer(schema, fields)
+    token = _memo.set({})
+    try:
+        return [serializer(item) for item in items]
+    finally:
+        _memo.reset(token)
@@ -0,0 +1,35 @@
+import zlib
+from typing import Iterable, Iterator
+
+# 合并输出块的目标大小，避免逐行发送造成过多的小数据包
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+
+def buffer_chunks(lines: Iterable[str], chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[bytes]:
+    """将逐行生成的文本合并为固定大小左右的字节块"""
+    buffer = []
+    size = 0
+    for line in lines:
+        data = line.encode("utf-8")
+        buffer.append(data)
+        size += len(data)
+        if size >= chunk_size:
+            yield b"".join(buffer)
+            buffer = []
+            size = 0
+    if buffer:
+        yield b"".join(buffer)
+
+
+def gzip_stream(chunks: Iterable[bytes], level: int = 6) -> Iterator[bytes]:
+    """
+    对字节流进行边生成边压缩（gzip格式）
+    只保留压缩器的内部状态，内存占用与数据总量无关
+    """
+    # wbits=31 表示输出带gzip头和校验尾的数据
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
@@ -0,0 +1,207 @@
+"""
+Oracle批量读写基准测试
+
+对比逐行INSERT与 app.db.bulk.bulk_insert（executemany数组绑定）的写入，
+以及SQLAlchemy默认arraysize（50）与 ORACLE_ARRAYSIZE/ORACLE_PREFETCHROWS 下的读取。
+
+配置了Oracle（DATABASE_TYPE=oracle）时直接连接Oracle，只报告耗时；
+否则使用替身方言：SQLite连接外包一层模拟cx_Oracle往返的游标
+（每次execute/executemany一次往返，取数时每arraysize行一次往返，execute时随响应返回prefetchrows行），
+报告往返次数，以及按 --rtt-ms 估算网络耗时后的总耗时。
+
+用法（在backend目录下）:
+    python -m benchmarks.oracle_bulk --rows 5000 --rtt-ms 1
+"""
+import argparse
+import os
+import sqlite3
+import tempfile
+import time
+from typing import Any, Dict, Optional
+
+from sqlalchemy import Column, Integer, MetaData, String, Table, create_engine, insert, select
+from sqlalchemy.orm import sessionmaker
+
+from app.core.config import settings
+from app.db.bulk import bulk_insert
+from app.db.session import _configure_engine, _engine_options
+
+# 调整前：SQLAlchemy cx_Oracle方言的arraysize默认值，cx_Oracle的prefetchrows默认值
+DEFAULT_ARRAYSIZE = 50
+DEFAULT_PREFETCHROWS = 2
+
+metadata = MetaData()
+bench_rows = Table(
+    "bench_bulk_rows",
+    metadata,
+    Column("id", Integer, primary_key=True, autoincrement=False),
+    Column("ledger_id", Integer, nullable=False),
+    Column("field_id", Integer, nullable=False),
+    Column("value", String(200)),
+)
+
+
+class RoundTripCursor:
+    """模拟cx_Oracle往返次数的游标"""
+
+    def __init__(self, cursor, connection: "RoundTripConnection"):
+        self._cursor = cursor
+        self._connection = connection
+        self._buffered = 0
+        self.arraysize = connection.arraysize
+        self.prefetchrows = connection.prefetchrows
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def __iter__(self):
+        return iter(self.fetchall())
+
+    def execute(self, statement, parameters=()):
+        self._connection.round_trips += 1
+        self._cursor.execute(statement, parameters)
+        self._buffered = self.prefetchrows
+        return self
+
+    def executemany(self, statement, parameters):
+        # 数组绑定：整批参数在一次往返中发送
+        self._connection.round_trips += 1
+        self._cursor.executemany(statement, parameters)
+        return self
+
+    def _take(self, rows):
+        for _ in rows:
+            if self._buffered == 0:
+                self._connection.round_trips += 1
+                self._buffered = self.arraysize
+            self._buffered -= 1
+        return rows
+
+    def fetchone(self):
+        row = self._cursor.fetchone()
+        if row is not None:
+            self._take([row])
+        return row
+
+    def fetchmany(self, size=None):
+        return self._take(self._cursor.fetchmany(size or self.arraysize))
+
+    def fetchall(self):
+        return self._take(self._cursor.fetchall())
+
+
+class RoundTripConnection:
+    """包装sqlite3连接，由它创建的游标统计往返次数"""
+
+    def __init__(self, connection: sqlite3.Connection, arraysize: int, prefetchrows: int):
+        object.__setattr__(self, "_connection", connection)
+        object.__setattr__(self, "arraysize", arraysize)
+        object.__setattr__(self, "prefetchrows", prefetchrows)
+        object.__setattr__(self, "round_trips", 0)
+
+    def __getattr__(self, name):
+        return getattr(self._connection, name)
+
+    def __setattr__(self, name, value):
+        if name in ("arraysize", "prefetchrows", "round_trips"):
+            object.__setattr__(self, name, value)
+        else:
+            setattr(self._connection, name, value)
+
+    def cursor(self, *args, **kwargs):
+        return RoundTripCursor(self._connection.cursor(*args, **kwargs), self)
+
+
+def _make_engine(tuned: bool, path: Optional[str]):
+    uri = settings.SQLALCHEMY_DATABASE_URI
+    if path is None:
+        if tuned:
+            return _configure_engine(create_engine(uri, **_engine_options(uri)), uri), None
+        return create_engine(uri, arraysize=DEFAULT_ARRAYSIZE), None
+
+    arraysize = settings.ORACLE_ARRAYSIZE if tuned else DEFAULT_ARRAYSIZE
+    prefetchrows = settings.ORACLE_PREFETCHROWS if tuned else DEFAULT_PREFETCHROWS
+    connections = []
+
+    def creator():
+        connection = RoundTripConnection(sqlite3.connect(path, check_same_thread=False), arraysize, prefetchrows)
+        connections.append(connection)
+        return connection
+
+    engine = create_engine(f"sqlite:///{path}", creator=creator)
+    return engine, connections
+
+
+def run(tuned: bool, rows: int, rtt_ms: float, path: Optional[str]) -> Dict[str, Any]:
+    engine, connections = _make_engine(tuned, path)
+    metadata.drop_all(engine)
+    metadata.create_all(engine)
+    Session = sessionmaker(bind=engine)
+    data = [{"id": i, "ledger_id": i // 20, "field_id": i % 20, "value": f"值{i}"} for i in range(rows)]
+
+    def round_trips():
+        return sum(c.round_trips for c in connections) if connections is not None else None
+
+    result: Dict[str, Any] = {}
+    db = Session()
+    try:
+        before = round_trips()
+        start = time.perf_counter()
+        if tuned:
+            bulk_insert(db, bench_rows, data)
+        else:
+            for row in data:
+                db.execute(insert(bench_rows), row)
+        db.commit()
+        result["write"] = (time.perf_counter() - start, round_trips() - before if before is not None else None)
+
+        before = round_trips()
+        start = time.perf_counter()
+        fetched = db.execute(select(bench_rows)).fetchall()
+        assert len(fetched) == rows
+        result["read"] = (time.perf_counter() - start, round_trips() - before if before is not None else None)
+    finally:
+        db.close()
+        metadata.drop_all(engine)
+        engine.dispose()
+
+    for key, (elapsed, trips) in result.items():
+        total = elapsed + (trips or 0) * rtt_ms / 1000
+        result[key] = {"ms": elapsed * 1000, "round_trips": trips, "total_ms": total * 1000}
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Oracle批量读写基准测试")
+    parser.add_argument("--rows", type=int, default=5000, help="写入和读取的行数")
+    parser.add_argument("--rtt-ms", type=float, default=1.0, help="替身方言每次往返的网络延迟（毫秒）")
+    args = parser.parse_args()
+
+    use_oracle = settings.SQLALCHEMY_DATABASE_URI.startswith("oracle")
+    path = None
+    if not use_oracle:
+        fd, path = tempfile.mkstemp(suffix=".db")
+        os.close(fd)
+        print(f"未配置Oracle，使用替身方言（每次往返按 {args.rtt_ms}ms 估算）")
+
+    try:
+        for label, tuned in (("调整前", False), ("调整后", True)):
+            result = run(tuned, args.rows, args.rtt_ms, path)
+            for name, title in (("write", "写入"), ("read", "读取")):
+                item = result[name]
+                if item["round_trips"] is None:
+                    print(f"{label} {title} {args.rows} 行: {item['ms']:.1f} ms")
+                else:
+                    print(
+                        f"{label} {title} {args.rows} 行: 往返 {item['round_trips']} 次, "
+                        f"本地 {item['ms']:.1f} ms, 估算总耗时 {item['total_ms']:.1f} ms"
+                    )
+    finally:
+        if path:
+            for suffix in ("", "-wal", "-shm", "-journal"):
+                if os.path.exists(path + suffix):
+                    os.remove(path + suffix)
+
+
+if __name__ == "__main__":
+    main()
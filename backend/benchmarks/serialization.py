@@ -0,0 +1,148 @@
+"""
+台账列表序列化基准测试
+
+在临时SQLite数据库中准备一页台账（每条带data字典和包含审批节点的活动工作流实例），
+由 LedgerService.get_ledgers 查询出来后，只对序列化计时：
+- 调整前：逐条 schemas.Ledger.model_validate(from_attributes=True)，再经FastAPI的response_model
+  校验序列化（serialize_response），最后由JSONResponse（标准库json）编码
+- 调整后：app.utils.serializer.serialize_list 直接读取属性生成字典，由ORJSONResponse编码
+并检查两种方式输出的JSON按schemas.Ledger解析后内容一致
+
+用法（在backend目录下）:
+    python -m benchmarks.serialization --ledgers 500 --fields 20 --rounds 20
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+from typing import Any, Dict, List
+
+from fastapi.responses import JSONResponse, ORJSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+from pydantic import TypeAdapter
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app import models, schemas
+from app.db.session import Base, _configure_engine, _engine_options
+from app.services.ledger_service import LedgerService
+from app.services.reference_cache_service import clear_reference_caches
+from app.utils.serializer import serialize_list
+
+
+def _seed(Session, ledger_count: int, field_count: int) -> None:
+    db = Session()
+    user = models.User(
+        username="bench", ehr_id="9000001", hashed_password="x", name="基准测试用户", is_active=True, is_superuser=True
+    )
+    db.add(user)
+    db.flush()
+    team = models.Team(name="基准测试团队", department="测试部门", leader_id=user.id)
+    workflow = models.Workflow(name="基准测试工作流", created_by=user.id)
+    db.add_all([team, workflow])
+    db.flush()
+    workflow_nodes = [
+        models.WorkflowNode(workflow_id=workflow.id, name=name, node_type=node_type, order_index=i)
+        for i, (name, node_type) in enumerate((("开始", "start"), ("审批", "approval"), ("结束", "end")))
+    ]
+    template = models.Template(
+        name="基准测试模板", department="测试部门", created_by_id=user.id, workflow_id=workflow.id
+    )
+    db.add_all(workflow_nodes + [template])
+    db.flush()
+
+    data = {f"field_{n}": f"第{n}列的内容" for n in range(field_count)}
+    for i in range(ledger_count):
+        ledger = models.Ledger(
+            name=f"基准测试台账{i}", description="用于序列化基准测试", status="active",
+            approval_status="pending", team_id=team.id, template_id=template.id,
+            created_by_id=user.id, updated_by_id=user.id, current_approver_id=user.id,
+            data=dict(data, index=i),
+        )
+        db.add(ledger)
+        db.flush()
+        instance = models.WorkflowInstance(workflow_id=workflow.id, ledger_id=ledger.id, created_by=user.id)
+        db.add(instance)
+        db.flush()
+        nodes = [
+            models.WorkflowInstanceNode(
+                workflow_instance_id=instance.id, workflow_node_id=node.id, approver_id=user.id,
+                status="approved" if n == 0 else "pending",
+                approver_actions=[{"user_id": user.id, "action": "submit", "comment": "提交"}] if n == 0 else [],
+            )
+            for n, node in enumerate(workflow_nodes[:2])
+        ]
+        db.add_all(nodes)
+        db.flush()
+        instance.current_node_id = nodes[1].id
+    db.commit()
+    db.close()
+
+
+def _before(page: List[models.Ledger]) -> bytes:
+    field = create_model_field("Response_read_ledgers", List[schemas.Ledger], mode="serialization")
+    content = [schemas.Ledger.model_validate(ledger, from_attributes=True) for ledger in page]
+    content = asyncio.run(serialize_response(field=field, response_content=content))
+    return JSONResponse(content).body
+
+
+def _after(page: List[models.Ledger]) -> bytes:
+    return ORJSONResponse(serialize_list(schemas.Ledger, page)).body
+
+
+def run(ledger_count: int, field_count: int, rounds: int) -> Dict[str, Any]:
+    fd, path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    uri = f"sqlite:///{path}?check_same_thread=False"
+    engine = _configure_engine(create_engine(uri, **_engine_options(uri)), uri)
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    _seed(Session, ledger_count, field_count)
+    clear_reference_caches()
+
+    db = Session()
+    result: Dict[str, Any] = {}
+    try:
+        user = db.query(models.User).first()
+        page = LedgerService.get_ledgers(db, limit=ledger_count, current_user=user)
+        assert len(page) == ledger_count
+        # 预热：触发所有延迟加载的关系属性，计时只包含序列化
+        before_body, after_body = _before(page), _after(page)
+        # 调整前嵌套的User未经校验，按ORM对象原样输出，缺少roles等字段；按schemas.Ledger规范化后再比较
+        adapter = TypeAdapter(List[schemas.Ledger])
+        result["same_output"] = adapter.dump_python(adapter.validate_json(before_body)) == adapter.dump_python(
+            adapter.validate_json(after_body)
+        )
+
+        for name, serialize in (("before", _before), ("after", _after)):
+            start = time.perf_counter()
+            for _ in range(rounds):
+                body = serialize(page)
+            result[name] = {"ms": (time.perf_counter() - start) * 1000 / rounds, "bytes": len(body)}
+    finally:
+        db.close()
+        engine.dispose()
+        for suffix in ("", "-wal", "-shm", "-journal"):
+            if os.path.exists(path + suffix):
+                os.remove(path + suffix)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="台账列表序列化基准测试")
+    parser.add_argument("--ledgers", type=int, default=500, help="每页台账数")
+    parser.add_argument("--fields", type=int, default=20, help="每条台账data中的字段数")
+    parser.add_argument("--rounds", type=int, default=20, help="重复序列化的次数")
+    args = parser.parse_args()
+
+    result = run(args.ledgers, args.fields, args.rounds)
+    for label, name in (("调整前（Pydantic + json）", "before"), ("调整后（直接读取属性 + orjson）", "after")):
+        item = result[name]
+        print(f"{label}: {item['ms']:.1f} ms/页, {item['bytes']} 字节")
+    print(f"输出一致: {result['same_output']}")
+
+
+if __name__ == "__main__":
+    main()
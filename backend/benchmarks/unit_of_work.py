@@ -0,0 +1,109 @@
+"""
+工作单元模式基准测试
+
+在临时SQLite数据库中反复执行 ledger_service.update_ledger（修改data，会同步字段值并写系统日志），
+对比每次操作都提交的普通会话与请求结束时统一提交的工作单元会话的提交次数和耗时。
+
+用法（在backend目录下）:
+    python -m benchmarks.unit_of_work --iterations 200 --fields 10
+"""
+import argparse
+import os
+import tempfile
+import time
+from typing import Dict
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from app import models, schemas
+from app.db.session import UNIT_OF_WORK, Base, _configure_engine, _engine_options
+from app.services.ledger_service import LedgerService
+
+
+def _seed(Session, field_count: int):
+    db = Session()
+    user = models.User(
+        username="bench", ehr_id="9000001", hashed_password="x", name="基准测试用户", is_active=True, is_superuser=True
+    )
+    db.add(user)
+    db.flush()
+    template = models.Template(name="基准测试模板", department="测试部门", created_by_id=user.id)
+    db.add(template)
+    db.flush()
+    for i in range(field_count):
+        db.add(models.Field(name=f"field_{i}", label=f"字段{i}", type="input", order=i + 1, template_id=template.id))
+    ledger = models.Ledger(
+        name="基准测试台账", status="draft", approval_status="draft", template_id=template.id,
+        created_by_id=user.id, updated_by_id=user.id, data={},
+    )
+    db.add(ledger)
+    db.commit()
+    db.refresh(user)
+    db.expunge(user)
+    ledger_id = ledger.id
+    db.close()
+    return user, ledger_id
+
+
+def run(unit_of_work: bool, iterations: int, field_count: int) -> Dict[str, float]:
+    fd, path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    uri = f"sqlite:///{path}?check_same_thread=False"
+    engine = _configure_engine(create_engine(uri, **_engine_options(uri)), uri)
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    user, ledger_id = _seed(Session, field_count)
+
+    counters = {"commits": 0, "statements": 0}
+    event.listen(engine, "commit", lambda conn: counters.__setitem__("commits", counters["commits"] + 1))
+    event.listen(
+        engine, "before_cursor_execute",
+        lambda *args: counters.__setitem__("statements", counters["statements"] + 1),
+    )
+
+    start = time.perf_counter()
+    for i in range(iterations):
+        db = Session()
+        if unit_of_work:
+            db.info[UNIT_OF_WORK] = True
+        try:
+            data = {f"field_{n}": f"value {i}-{n}" for n in range(field_count)}
+            ledger = LedgerService.update_ledger(db, ledger_id, schemas.LedgerUpdate(data=data), user)
+            # 与接口一致：在会话关闭前完成序列化
+            schemas.Ledger.model_validate(ledger, from_attributes=True)
+            if unit_of_work:
+                db.commit()
+        finally:
+            db.close()
+    elapsed = time.perf_counter() - start
+
+    engine.dispose()
+    for suffix in ("", "-wal", "-shm", "-journal"):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+
+    return {
+        "ms_per_request": elapsed * 1000 / iterations,
+        "commits_per_request": counters["commits"] / iterations,
+        "statements_per_request": counters["statements"] / iterations,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="工作单元模式基准测试")
+    parser.add_argument("--iterations", type=int, default=200, help="更新次数")
+    parser.add_argument("--fields", type=int, default=10, help="模板字段数")
+    args = parser.parse_args()
+
+    for label, unit_of_work in (("逐次提交", False), ("工作单元", True)):
+        result = run(unit_of_work, args.iterations, args.fields)
+        print(
+            f"{label}: {result['ms_per_request']:.2f} ms/次, "
+            f"提交 {result['commits_per_request']:.1f} 次/请求, "
+            f"SQL {result['statements_per_request']:.1f} 条/请求"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -5,6 +5,7 @@ from sqlalchemy.orm import Session
 from app import crud, models, schemas
 from app.core.config import settings
 from app.main import app
+from tests.utils.ledger import create_pending_ledgers
 
 client = TestClient(app)
 
@@ -44,6 +45,37 @@ def test_get_pending_approvals(db: Session, normal_token_headers: dict, normal_u
     db.commit()
 
 
+def test_get_pending_tasks_async(normal_token_headers: dict):
+    """测试异步接口：待办任务、台账列表和模板列表"""
+    for path in ("/approvals/tasks", "/ledgers/", "/templates/"):
+        response = client.get(f"{settings.API_V1_STR}{path}", headers=normal_token_headers)
+        assert response.status_code == 200, path
+        assert isinstance(response.json(), list)
+    
+    # 异步依赖同样校验令牌
+    response = client.get(f"{settings.API_V1_STR}/approvals/tasks")
+    assert response.status_code == 401
+    response = client.get(
+        f"{settings.API_V1_STR}/approvals/tasks",
+        headers={"Authorization": "Bearer invalid"},
+    )
+    assert response.status_code == 401
+
+
+def test_get_approval_ledgers_query_budget(db: Session, normal_token_headers: dict, normal_user: models.User, assert_query_budget):
+    """测试待审批台账列表的SQL语句数不随台账数量增长"""
+    ledgers = create_pending_ledgers(db, normal_user, 5)
+    response = client.get(
+        f"{settings.API_V1_STR}/approvals/ledgers",
+        headers=normal_token_headers,
+    )
+    
+    assert response.status_code == 200
+    # 当前用户、两类待办节点、实例对应的台账ID、台账，以及模板、创建人、团队名称各一条查询
+    assert_query_budget(response, 8)
+    assert {l["id"] for l in response.json()} == {ledger.id for ledger in ledgers}
+
+
 def test_get_processed_approvals(db: Session, normal_token_headers: dict, normal_user: models.User, workflow_instance: models.WorkflowInstance):
     """测试获取已处理的审批列表"""
     # 创建一个已审批的实例节点
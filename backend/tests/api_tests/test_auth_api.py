@@ -81,13 +81,14 @@ def test_login_access_token_with_wrong_password(db: Session):
     db.commit()
 
 
-def test_user_me(db: Session, normal_token_headers: dict):
+def test_user_me(db: Session, normal_token_headers: dict, assert_query_budget):
     """测试获取当前登录用户信息"""
     response = client.get(
         f"{settings.API_V1_STR}/auth/me", headers=normal_token_headers
     )
     
     assert response.status_code == 200
+    assert_query_budget(response, 2)
     user_data = response.json()
     assert "id" in user_data
     assert "username" in user_data
@@ -5,6 +5,7 @@ from sqlalchemy.orm import Session
 from app import crud, models, schemas
 from app.core.config import settings
 from app.main import app
+from tests.utils.ledger import create_pending_ledgers
 
 client = TestClient(app)
 
@@ -24,6 +25,21 @@ def test_get_ledgers(db: Session, normal_token_headers: dict, ledger: models.Led
     assert any(l["id"] == ledger.id for l in data)
 
 
+def test_get_ledgers_query_budget(db: Session, normal_token_headers: dict, normal_user: models.User, assert_query_budget):
+    """测试台账列表的SQL语句数不随台账数量增长"""
+    ledgers = create_pending_ledgers(db, normal_user, 5)
+    response = client.get(
+        f"{settings.API_V1_STR}/ledgers/",
+        headers=normal_token_headers,
+    )
+    
+    assert response.status_code == 200
+    # 名称、工作流实例及其节点、审批人整页批量获取
+    assert_query_budget(response, 15)
+    data = {l["id"]: l for l in response.json()}
+    assert all(data[ledger.id]["active_workflow_instance"]["ledger_id"] == ledger.id for ledger in ledgers)
+
+
 def test_create_ledger(db: Session, normal_token_headers: dict, template: models.Template, team: models.Team):
     """测试创建台账"""
     ledger_data = {
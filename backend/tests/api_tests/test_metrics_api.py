@@ -0,0 +1,42 @@
+from fastapi.testclient import TestClient
+
+from app.core.config import settings
+from app.core.metrics import Histogram, metrics_registry
+from app.main import app
+
+client = TestClient(app)
+
+
+def test_histogram_buckets():
+    """测试直方图分桶计数为累计值"""
+    histogram = Histogram(buckets=(0.1, 1.0))
+    histogram.observe(0.05)
+    histogram.observe(0.5)
+    histogram.observe(5)
+
+    buckets, total_sum, total_count = histogram.snapshot()
+    assert buckets == [("0.1", 1), ("1.0", 2), ("+Inf", 3)]
+    assert total_count == 3
+    assert abs(total_sum - 5.55) < 1e-9
+
+
+def test_metrics_endpoint():
+    """测试/metrics按路由模板输出请求指标"""
+    metrics_registry.reset()
+
+    client.get("/")
+    client.get(f"{settings.API_V1_STR}/ledgers/12345")
+    client.get("/not-exists")
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+
+    body = response.text
+    assert 'http_requests_total{method="GET",route="/",status="200"} 1' in body
+    # 路径参数不会展开为独立标签
+    assert f'route="{settings.API_V1_STR}/ledgers/{{ledger_id}}"' in body
+    assert "/ledgers/12345" not in body
+    assert 'http_requests_total{method="GET",route="<unmatched>",status="404"} 1' in body
+    assert 'http_request_duration_seconds_bucket{method="GET",route="/",le="+Inf"} 1' in body
+    assert "http_requests_in_flight" in body
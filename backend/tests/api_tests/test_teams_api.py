@@ -24,7 +24,7 @@ def test_get_teams(db: Session, admin_token_headers: dict, team: models.Team):
     assert any(t["id"] == team.id for t in data)
 
 
-def test_create_team(db: Session, admin_token_headers: dict):
+def test_create_team(db: Session, admin_token_headers: dict, assert_query_budget):
     """测试创建团队"""
     team_data = {
         "name": "测试API创建团队",
@@ -39,6 +39,7 @@ def test_create_team(db: Session, admin_token_headers: dict):
     )
     
     assert response.status_code == 200
+    assert_query_budget(response, 5)
     data = response.json()
     assert data["name"] == team_data["name"]
     assert data["description"] == team_data["description"]
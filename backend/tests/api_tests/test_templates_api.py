@@ -5,6 +5,7 @@ from sqlalchemy.orm import Session
 from app import crud, models, schemas
 from app.core.config import settings
 from app.main import app
+from tests.utils.ledger import create_pending_ledgers
 
 client = TestClient(app)
 
@@ -24,6 +25,21 @@ def test_get_templates(db: Session, normal_token_headers: dict, template: models
     assert any(t["id"] == template.id for t in data)
 
 
+def test_get_templates_query_budget(db: Session, normal_token_headers: dict, normal_user: models.User, assert_query_budget):
+    """测试模板列表的SQL语句数不随模板数量增长"""
+    for _ in range(3):
+        create_pending_ledgers(db, normal_user, 1)
+    response = client.get(
+        f"{settings.API_V1_STR}/templates/",
+        headers=normal_token_headers,
+    )
+    
+    assert response.status_code == 200
+    # 当前用户、模板、创建人姓名和字段数量各一条查询
+    assert_query_budget(response, 4)
+    assert all(t["fields_count"] is not None for t in response.json())
+
+
 def test_create_template(db: Session, admin_token_headers: dict, workflow: models.Workflow):
     """测试创建模板"""
     template_data = {
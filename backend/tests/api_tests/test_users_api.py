@@ -12,7 +12,7 @@ from app.main import app
 client = TestClient(app)
 
 
-def test_get_users(db: Session, admin_token_headers: dict):
+def test_get_users(db: Session, admin_token_headers: dict, assert_query_budget):
     """测试获取用户列表"""
     response = client.get(
         f"{settings.API_V1_STR}/users/",
@@ -20,6 +20,8 @@ def test_get_users(db: Session, admin_token_headers: dict):
     )
     
     assert response.status_code == 200
+    # 查询次数不应随用户数量增长
+    assert_query_budget(response, 5)
     data = response.json()
     # 检查分页响应格式
     assert "items" in data
@@ -69,7 +71,48 @@ def test_create_user(db: Session, admin_token_headers: dict):
         db.commit()
 
 
-def test_get_user(db: Session, admin_token_headers: dict, normal_user: models.User):
+def test_import_users(db: Session, admin_token_headers: dict):
+    """测试批量导入用户：每批一条INSERT，重复用户和不存在的团队按行报告"""
+    from sqlalchemy import event
+    from app.db.session import engine
+
+    suffix = uuid.uuid4().hex[:8]
+    team = crud.team.create(db, obj_in=schemas.TeamCreate(name=f"导入团队_{suffix}", department="测试部门"))
+    existing = db.query(models.User).first()
+    csv_content = "\n".join([
+        "username,ehr_id,password,name,team_id",
+        f"import_a_{suffix},{random.randint(1000000, 4999999)},Password123!,导入用户A,{team.id}",
+        f"import_b_{suffix},{random.randint(5000000, 9999999)},Password123!,导入用户B,999999",
+        f"{existing.username},{random.randint(1000000, 9999999)},Password123!,重复用户,",
+    ])
+
+    inserts = []
+    listener = lambda conn, cursor, statement, *args: inserts.append(statement) if statement.startswith("INSERT INTO users") else None
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        response = client.post(
+            f"{settings.API_V1_STR}/users/import",
+            headers=admin_token_headers,
+            files={"file": ("users.csv", csv_content.encode("utf-8"), "text/csv")},
+        )
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["success_count"] == 2
+    assert data["failed_users"] == [{"row": 4, "username": existing.username, "reason": "用户名已存在"}]
+    assert len(inserts) == 1
+
+    db.expire_all()
+    user_a = crud.user.get_by_username(db, username=f"import_a_{suffix}")
+    user_b = crud.user.get_by_username(db, username=f"import_b_{suffix}")
+    assert user_a.team_id == team.id
+    assert user_b.team_id is None
+    assert user_a.last_password_change is not None
+
+
+def test_get_user(db: Session, admin_token_headers: dict, normal_user: models.User, assert_query_budget):
     """测试获取单个用户"""
     response = client.get(
         f"{settings.API_V1_STR}/users/{normal_user.id}",
@@ -77,12 +120,32 @@ def test_get_user(db: Session, admin_token_headers: dict, normal_user: models.Us
     )
     
     assert response.status_code == 200
+    assert_query_budget(response, 3)
     data = response.json()
     assert data["id"] == normal_user.id
     assert data["username"] == normal_user.username
     assert data["name"] == normal_user.name
 
 
+def test_read_user_permissions_etag(normal_token_headers: dict):
+    """测试权限列表的ETag与304响应"""
+    response = client.get(
+        f"{settings.API_V1_STR}/users/me/permissions",
+        headers=normal_token_headers,
+    )
+    assert response.status_code == 200
+    assert isinstance(response.json(), list)
+    etag = response.headers["ETag"]
+    
+    # 权限未变化时返回304
+    response = client.get(
+        f"{settings.API_V1_STR}/users/me/permissions",
+        headers={**normal_token_headers, "If-None-Match": etag},
+    )
+    assert response.status_code == 304
+    assert response.headers["ETag"] == etag
+
+
 def test_update_user(db: Session, admin_token_headers: dict):
     """测试更新用户"""
     # 创建测试用户
@@ -175,3 +238,4 @@ def test_delete_user(db: Session, admin_token_headers: dict):
     # 验证用户已被删除
     deleted_user = db.query(models.User).filter(models.User.id == user_id).first()
     assert deleted_user is None
+
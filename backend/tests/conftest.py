@@ -1,7 +1,11 @@
+import os
 import pytest
-from typing import Dict, Generator
+from typing import Callable, Dict, Generator
 from sqlalchemy.orm import Session
 
+# 测试环境使用最低的bcrypt成本因子，加快用户创建和登录
+os.environ.setdefault("BCRYPT_ROUNDS", "4")
+
 from app import crud, models, schemas
 from app.core.config import settings
 from app.db.session import SessionLocal
@@ -62,4 +66,22 @@ def admin_token_headers(admin_user: models.User) -> Dict[str, str]:
 def normal_token_headers(normal_user: models.User) -> Dict[str, str]:
     """普通用户令牌头"""
     access_token = create_access_token({"sub": str(normal_user.id)})
-    return {"Authorization": f"Bearer {access_token}"} 
\ No newline at end of file
+    return {"Authorization": f"Bearer {access_token}"} 
+
+
+@pytest.fixture
+def assert_query_budget() -> Callable:
+    """
+    断言接口执行的SQL语句数不超过预算
+    读取 QueryStatsMiddleware 返回的 X-DB-Queries 响应头，用于发现N+1查询的回归
+    """
+    def check(response, max_queries: int) -> int:
+        assert "X-DB-Queries" in response.headers, "响应缺少X-DB-Queries头，请确认已开启DB_QUERY_STATS_ENABLED"
+        queries = int(response.headers["X-DB-Queries"])
+        request = response.request
+        assert queries <= max_queries, (
+            f"{request.method} {request.url.path} 执行了 {queries} 条SQL语句，超出预算 {max_queries}"
+        )
+        return queries
+
+    return check
@@ -6,6 +6,9 @@ from sqlalchemy.orm import Session
 
 from app.db.session import SessionLocal, engine, Base
 from app.core.security import get_password_hash
+from app.services.reference_cache_service import clear_reference_caches
+from app.services.statistics_service import invalidate_statistics
+from app.services.user_cache_service import clear_user_cache
 from app import models
 
 
@@ -15,6 +18,10 @@ def db() -> Generator:
     # 在每个测试函数前重建数据库
     Base.metadata.drop_all(bind=engine)
     Base.metadata.create_all(bind=engine)
+    # 用户等实体的ID会在重建的数据库中复用，清空认证用户缓存、引用实体缓存和统计缓存
+    clear_user_cache()
+    clear_reference_caches()
+    invalidate_statistics()
     
     db = SessionLocal()
     try:
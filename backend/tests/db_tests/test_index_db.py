@@ -0,0 +1,106 @@
+from typing import Callable, List
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app import crud, models
+from app.db import session
+from app.services.ledger_service import ledger_service
+
+
+@pytest.fixture
+def plan_db():
+    """
+    内存SQLite数据库会话，用于查看服务层实际生成的SQL的执行计划
+    返回会话和一个函数：执行给定调用，返回其中访问指定表的第一条语句的执行计划
+    """
+    engine = create_engine("sqlite://", poolclass=StaticPool)
+    session.Base.metadata.create_all(engine)
+    db = sessionmaker(bind=engine)()
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters))
+
+    def explain(call: Callable, table: str) -> str:
+        statements.clear()
+        event.listen(engine, "before_cursor_execute", record)
+        try:
+            call()
+        finally:
+            event.remove(engine, "before_cursor_execute", record)
+        statement, parameters = next((s, p) for s, p in statements if f"FROM {table}" in s)
+        with engine.connect() as conn:
+            rows: List = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters).fetchall()
+        return "\n".join(row[-1] for row in rows)
+
+    try:
+        yield db, explain
+    finally:
+        db.close()
+        engine.dispose()
+
+
+def _create_users(db):
+    """创建一个普通用户（受可见性限制）和一个超级管理员"""
+    team = models.Team(name="索引测试团队", department="测试部门")
+    db.add(team)
+    db.flush()
+    user = models.User(
+        username="plan_user", ehr_id="1000001", name="普通用户", hashed_password="x",
+        is_active=True, is_superuser=False, team_id=team.id,
+    )
+    admin = models.User(
+        username="plan_admin", ehr_id="1000002", name="管理员", hashed_password="x",
+        is_active=True, is_superuser=True,
+    )
+    db.add_all([user, admin])
+    db.commit()
+    db.refresh(user)
+    db.refresh(admin)
+    return user, admin
+
+
+def test_ledger_list_indexes(plan_db):
+    """测试台账列表（含可见性过滤）使用索引，且不需要额外排序"""
+    db, explain = plan_db
+    user, admin = _create_users(db)
+
+    cases = {
+        "ix_ledgers_team_status": dict(team_id=1, status="active", approval_status="approved"),
+        "ix_ledgers_template_status": dict(template_id=1, status="active", approval_status="pending"),
+        "ix_ledgers_updated_at": dict(limit=20),
+    }
+    for current_user in (user, admin):
+        for index_name, filters in cases.items():
+            plan = explain(
+                lambda: ledger_service.get_ledgers(db, current_user=current_user, fields={"id", "name"}, **filters),
+                "ledgers",
+            )
+            assert index_name in plan, f"{filters} 未使用索引 {index_name}: {plan}"
+            assert "TEMP B-TREE" not in plan, f"{filters} 需要额外排序: {plan}"
+            if not current_user.is_superuser:
+                # 可见性条件中的审批人子查询按工作流实例节点索引查找
+                assert "ix_workflow_instance_nodes_instance_status" in plan, plan
+
+
+def test_lookup_indexes(plan_db):
+    """测试字段值、工作流节点、审计日志和团队成员的查询使用索引"""
+    db, explain = plan_db
+
+    cases = [
+        (
+            "ix_field_values_ledger_field",
+            lambda: crud.field_value.get_by_ledger_and_field(db, ledger_id=1, field_id=2),
+            "field_values",
+        ),
+        ("ix_workflow_nodes_workflow_order", lambda: crud.workflow_node.get_by_workflow(db, workflow_id=1), "workflow_nodes"),
+        ("ix_audit_logs_ledger_created", lambda: crud.audit_log.get_by_ledger(db, ledger_id=1), "audit_logs"),
+        ("ix_users_team_id", lambda: crud.user.get_multi_by_team(db, team_id=1), "users"),
+    ]
+    for index_name, call, table in cases:
+        plan = explain(call, table)
+        assert index_name in plan, f"{table} 未使用索引 {index_name}: {plan}"
+        assert "TEMP B-TREE" not in plan, f"{table} 需要额外排序: {plan}"
@@ -1,16 +1,28 @@
 import pytest
+from sqlalchemy import event
 from sqlalchemy.orm import Session
 
 from app import crud, models, schemas
+from app.core.cache import RedisBackend, set_cache_backend
+from app.db.session import engine
 from app.services.casbin_service import (
+    get_enforcer,
     get_enforcer_instance,
     add_permission_for_role,
     remove_permission_for_role,
     get_permissions_for_role,
     add_role_for_user,
+    remove_role_for_user,
     get_roles_for_user,
-    check_permission
+    check_permission,
+    get_permission_cache_stats,
+    get_role_permission_map,
+    get_policy_snapshot,
+    invalidate_permission_cache,
+    add_roles_for_users
 )
+from app.services.casbin_watcher import PolicyVersionWatcher, policy_version_table
+from tests.utils.resp_server import start_resp_server, stop_resp_server
 
 
 def test_add_permission_for_role(db: Session, test_role: dict):
@@ -214,6 +226,171 @@ def test_check_permission(db: Session, test_user: dict, test_role: dict):
     assert has_other_permission is False
 
 
+def test_get_policy_snapshot(db: Session, test_role: dict, monkeypatch):
+    """测试按角色分组的策略快照"""
+    role_name = f"{test_role['name']}_snapshot"
+    permissions = ["ledger:view", "ledger:*", "*:*"]
+    for permission in permissions:
+        resource, action = permission.split(":")
+        add_permission_for_role(role_name, resource, action)
+
+    snapshot = get_policy_snapshot()
+    assert list(snapshot[role_name]) == permissions
+
+    # 策略变更后快照重新生成
+    remove_permission_for_role(role_name, "*", "*")
+    remove_permission_for_role(role_name, "ledger", "*")
+    assert list(get_policy_snapshot()[role_name]) == permissions[:1]
+    remove_permission_for_role(role_name, "ledger", "view")
+    assert role_name not in get_policy_snapshot()
+
+    # 生成快照期间策略发生变更时，生成的旧快照不会被保存
+    enforcer = get_enforcer_instance()
+    get_policy = enforcer.get_policy
+
+    def get_policy_during_change():
+        policy = [list(p) for p in get_policy()]
+        add_permission_for_role(role_name, "ledger", "view")
+        return policy
+
+    invalidate_permission_cache()
+    monkeypatch.setattr(enforcer, "get_policy", get_policy_during_change)
+    assert role_name not in get_role_permission_map()
+    monkeypatch.undo()
+    assert get_role_permission_map()[role_name] == frozenset(permissions[:1])
+    assert list(get_policy_snapshot()[role_name]) == permissions[:1]
+    remove_permission_for_role(role_name, "ledger", "view")
+
+
+def test_check_permission_cache(db: Session, test_role: dict):
+    """测试权限判定缓存在策略变更后失效"""
+    subject = "cache_test_user"
+    resource, action = "ledger", "export"
+
+    assert check_permission(subject, resource, action) is False
+    hits_before = get_permission_cache_stats()["decisions"]["hits"]
+    assert check_permission(subject, resource, action) is False
+    assert get_permission_cache_stats()["decisions"]["hits"] == hits_before + 1
+
+    # 授予权限后缓存失效，重新判定
+    add_permission_for_role(test_role["name"], resource, action)
+    add_role_for_user(subject, test_role["name"])
+    assert check_permission(subject, resource, action) is True
+    assert test_role["name"] in get_roles_for_user(subject)
+    assert f"{resource}:{action}" in get_role_permission_map()[test_role["name"]]
+
+    # 移除角色后不再使用旧的判定结果
+    remove_role_for_user(subject, test_role["name"])
+    remove_permission_for_role(test_role["name"], resource, action)
+    assert check_permission(subject, resource, action) is False
+    assert test_role["name"] not in get_roles_for_user(subject)
+    assert f"{resource}:{action}" not in get_role_permission_map().get(test_role["name"], frozenset())
+
+
+def test_policy_sync_between_workers(db: Session, test_role: dict):
+    """测试其他进程修改策略后，本进程通过版本号检测并重新加载"""
+    subject = "sync_test_user"
+    resource, action = "template", "export"
+    e = get_enforcer_instance()
+    assert check_permission(subject, resource, action) is False
+
+    # 模拟另一个worker中的enforcer修改策略
+    other = get_enforcer()
+    other.add_policy(test_role["name"], resource, action)
+    other.add_grouping_policy(subject, test_role["name"])
+
+    assert e.watcher.poll(force=True) is True
+    assert check_permission(subject, resource, action) is True
+
+    # 本进程自己的修改不会触发重复加载
+    remove_role_for_user(subject, test_role["name"])
+    remove_permission_for_role(test_role["name"], resource, action)
+    assert e.watcher.poll(force=True) is False
+    assert check_permission(subject, resource, action) is False
+
+
+def test_policy_version_first_write_race(db: Session):
+    """测试两个worker同时首次写入策略版本号时，后写入的一方改为递增而不是报错"""
+    watcher = PolicyVersionWatcher(engine, interval=0)
+    with engine.begin() as conn:
+        original = conn.execute(policy_version_table.select()).first()
+        conn.execute(policy_version_table.delete())
+
+    raced = []
+
+    def insert_first(conn, cursor, statement, parameters, context, executemany):
+        # 本worker读到版本行不存在、准备插入时，另一个worker先插入了版本行
+        if statement.startswith("INSERT INTO casbin_policy_version") and not raced:
+            raced.append(statement)
+            with engine.begin() as other:
+                other.execute(policy_version_table.insert().values(id=1, version=1))
+
+    event.listen(engine, "before_cursor_execute", insert_first)
+    try:
+        watcher.update()
+        assert raced
+        assert watcher.version == 2
+        with engine.connect() as conn:
+            assert conn.execute(policy_version_table.select()).first().version == 2
+    finally:
+        event.remove(engine, "before_cursor_execute", insert_first)
+        with engine.begin() as conn:
+            conn.execute(policy_version_table.delete())
+            if original is not None:
+                conn.execute(policy_version_table.insert().values(id=original.id, version=original.version))
+
+
+def test_add_roles_for_users(db: Session, test_role: dict):
+    """测试批量分配角色只递增一次策略版本号"""
+    e = get_enforcer_instance()
+    version = e.watcher.version
+    subjects = [f"batch_role_user_{i}" for i in range(3)]
+    assert add_roles_for_users([(subject, test_role["name"]) for subject in subjects]) is True
+    assert e.watcher.version == version + 1
+    assert all(get_roles_for_user(subject) == [test_role["name"]] for subject in subjects)
+    # 已存在的分配被跳过
+    assert add_roles_for_users([(subjects[0], test_role["name"])]) is False
+    for subject in subjects:
+        remove_role_for_user(subject, test_role["name"])
+
+
+def test_permission_cache_shared_backend(db: Session, test_role: dict):
+    """测试共享缓存后端中的权限判定在策略变更后对所有worker失效"""
+    subject = "shared_cache_user"
+    resource, action = "statistics", "export"
+    server = start_resp_server()
+    worker_a, worker_b = RedisBackend(server.url), RedisBackend(server.url)
+    previous = set_cache_backend(worker_a)
+    try:
+        assert check_permission(subject, resource, action) is False
+        # 键中带策略版本号，条目必须带有效期，旧版本的键才会过期
+        decision_entries = [item for key, item in server._data.items() if b"permissions:decisions:" in key]
+        assert decision_entries and all(expires_at is not None for _, expires_at in decision_entries)
+
+        # 另一个worker命中同一条判定结果
+        set_cache_backend(worker_b)
+        hits_before = get_permission_cache_stats()["decisions"]["hits"]
+        assert check_permission(subject, resource, action) is False
+        assert get_permission_cache_stats()["decisions"]["hits"] == hits_before + 1
+        assert get_permission_cache_stats()["decisions"]["size"] is None
+
+        # 一个worker授予权限后，另一个worker不再使用旧的判定结果
+        add_permission_for_role(test_role["name"], resource, action)
+        add_role_for_user(subject, test_role["name"])
+        set_cache_backend(worker_a)
+        assert check_permission(subject, resource, action) is True
+
+        remove_role_for_user(subject, test_role["name"])
+        remove_permission_for_role(test_role["name"], resource, action)
+        set_cache_backend(worker_b)
+        assert check_permission(subject, resource, action) is False
+    finally:
+        set_cache_backend(previous)
+        worker_a.close()
+        worker_b.close()
+        stop_resp_server(server)
+
+
 def test_superuser_permission(db: Session, test_admin: dict):
     """测试超级用户拥有所有权限"""
     # 创建超级用户
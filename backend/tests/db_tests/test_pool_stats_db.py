@@ -0,0 +1,41 @@
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+
+from app.db import session
+from app.db.pool_stats import InstrumentedQueuePool
+
+
+def test_pool_stats(tmp_path):
+    """测试连接池记录签出等待、占用时长、溢出连接和超时"""
+    uri = f"sqlite:///{tmp_path / 'pool.db'}"
+    engine = session._configure_engine(
+        create_engine(uri, poolclass=InstrumentedQueuePool, pool_size=1, max_overflow=1, pool_timeout=0.05), uri
+    )
+    stats = engine.pool.stats
+    try:
+        first = engine.connect()
+        second = engine.connect()  # 超出pool_size，新建溢出连接
+        with pytest.raises(PoolTimeoutError):
+            engine.connect()
+        second.close()
+        first.close()
+
+        snapshot = stats.snapshot()
+        assert snapshot["checkouts"] == 2
+        assert snapshot["overflow_checkouts"] == 1
+        assert snapshot["max_overflow_in_use"] == 1
+        assert snapshot["timeouts"] == 1
+        # 超时的请求也计入等待时间
+        assert snapshot["wait"]["count"] == 3
+        assert snapshot["wait"]["sum"] >= 0.05
+        assert snapshot["hold"]["count"] == 2
+        assert snapshot["hold"]["buckets"]["+Inf"] == 2
+
+        # dispose重建连接池后沿用同一统计
+        engine.dispose()
+        engine.connect().close()
+        assert engine.pool.stats is stats
+        assert stats.snapshot()["checkouts"] == 3
+    finally:
+        engine.dispose()
@@ -0,0 +1,41 @@
+from sqlalchemy import create_engine, text
+from sqlalchemy.pool import StaticPool
+
+from app.db import session
+from app.db.slow_query import SlowQueryRecorder, endpoint_scope
+
+
+def test_slow_query_recorder():
+    """测试慢查询记录：参数脱敏、请求路由和执行计划"""
+    engine = create_engine("sqlite://", poolclass=StaticPool)
+    session.Base.metadata.create_all(engine)
+    recorder = SlowQueryRecorder(threshold_ms=0, buffer_size=2)
+    recorder.install(engine)
+    try:
+        scope = {"type": "http", "method": "GET", "path": "/api/v1/ledgers/"}
+        with endpoint_scope(scope), engine.connect() as conn:
+            conn.execute(text("SELECT id FROM users WHERE team_id = :team_id"), {"team_id": 42})
+            conn.execute(text("SELECT id FROM ledgers WHERE name = :name"), {"name": "机密台账"})
+            conn.execute(text("SELECT id FROM audit_logs WHERE ledger_id = :ledger_id"), {"ledger_id": 7})
+
+        records = recorder.records()
+        # 环形缓冲区只保留最近两条，按时间倒序
+        assert len(records) == 2
+        latest, previous = records
+        assert "audit_logs" in latest["statement"]
+        assert latest["endpoint"] == "GET /api/v1/ledgers/"
+        assert latest["dialect"] == "sqlite"
+        assert any("ix_audit_logs_ledger_created" in line for line in latest["plan"])
+        # 参数只保留类型
+        assert previous["parameters"] == ["str"]
+        assert "机密台账" not in str(previous)
+
+        # 写语句不抓取执行计划；请求之外的语句没有路由
+        recorder.clear()
+        with engine.connect() as conn:
+            conn.execute(text("UPDATE users SET name = :name WHERE id = :id"), {"name": "x", "id": 1})
+        assert recorder.records()[0]["plan"] is None
+        assert recorder.records()[0]["endpoint"] is None
+    finally:
+        recorder.uninstall(engine)
+        engine.dispose()
@@ -9,6 +9,9 @@ from sqlalchemy.orm import sessionmaker, Session
 from app.main import app
 from app.db.base import Base
 from app.db.session import get_db
+from app.services.reference_cache_service import clear_reference_caches
+from app.services.statistics_service import invalidate_statistics
+from app.services.user_cache_service import clear_user_cache
 from app import crud, models, schemas
 from app.core.config import settings
 
@@ -36,6 +39,10 @@ def db() -> Generator:
         db.close()
         # 清理数据库
         Base.metadata.drop_all(bind=engine)
+        # 用户等实体的ID会在重建的数据库中复用，清空认证用户缓存、引用实体缓存和统计缓存
+        clear_user_cache()
+        clear_reference_caches()
+        invalidate_statistics()
 
 
 @pytest.fixture(scope="function")
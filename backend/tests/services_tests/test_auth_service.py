@@ -1,3 +1,4 @@
+import asyncio
 import pytest
 from sqlalchemy.orm import Session
 from datetime import datetime
@@ -5,7 +6,9 @@ from fastapi import HTTPException
 
 from app import crud, models, schemas
 from app.services.auth_service import AuthService as auth_service
-from app.core.security import verify_password
+from datetime import timedelta
+from jose import JWTError
+from app.core.security import verify_password, create_access_token, decode_access_token
 
 # 测试用户登录
 def test_authenticate_user(db: Session, normal_user: models.User):
@@ -18,6 +21,8 @@ def test_authenticate_user(db: Session, normal_user: models.User):
     assert "access_token" in token
     assert token["user_id"] == normal_user.id
     assert token["username"] == normal_user.username
+    assert token["permissions"] == sorted(token["permissions"])
+    assert token["permissions_etag"]
     
     # 测试错误的密码
     with pytest.raises(HTTPException) as excinfo:
@@ -29,6 +34,17 @@ def test_authenticate_user(db: Session, normal_user: models.User):
         auth_service.authenticate_user(db, ehr_id="9999999", password="password123")
     assert excinfo.value.status_code == 401
 
+
+def test_authenticate_user_async(db: Session, normal_user: models.User):
+    """测试异步登录：密码在哈希线程池中校验，结果与同步登录一致"""
+    token = asyncio.run(auth_service.authenticate_user_async(db, ehr_id=normal_user.ehr_id, password="password123"))
+    assert token["user_id"] == normal_user.id
+    assert token["roles"] == auth_service.authenticate_user(db, ehr_id=normal_user.ehr_id, password="password123")["roles"]
+    
+    with pytest.raises(HTTPException) as excinfo:
+        asyncio.run(auth_service.authenticate_user_async(db, ehr_id=normal_user.ehr_id, password="wrong_password"))
+    assert excinfo.value.status_code == 401
+
 # 测试用户注册
 def test_register_user(db: Session):
     """测试用户注册"""
@@ -86,4 +102,20 @@ def test_change_password(db: Session, normal_user: models.User):
     # 测试不存在的用户
     with pytest.raises(HTTPException) as excinfo:
         auth_service.change_password(db, 999, password_data)
-    assert excinfo.value.status_code == 404
\ No newline at end of file
+    assert excinfo.value.status_code == 404
+
+
+def test_decode_access_token_cache():
+    """测试令牌校验结果缓存"""
+    token = create_access_token({"sub": "42"})
+    token_data = decode_access_token(token)
+    assert token_data.sub == "42"
+    # 同一令牌第二次直接返回缓存的载荷
+    assert decode_access_token(token) is token_data
+
+    # 篡改或过期的令牌仍然校验失败
+    with pytest.raises(JWTError):
+        decode_access_token(token[:-2] + ("AA" if not token.endswith("AA") else "BB"))
+    expired = create_access_token({"sub": "42"}, expires_delta=timedelta(seconds=-1))
+    with pytest.raises(JWTError):
+        decode_access_token(expired)
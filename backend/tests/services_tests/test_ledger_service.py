@@ -1,9 +1,16 @@
+import orjson
 import pytest
 from sqlalchemy.orm import Session
 from io import BytesIO
+from fastapi import HTTPException
 
 from app import models, schemas
+from app.db.monitoring import track_queries
 from app.services.ledger_service import ledger_service
+from app.services.reference_cache_service import template_refs, user_refs
+from app.services.template_service import template_service
+from app.services.user_service import user_service
+from app.utils.serializer import serialize_list
 
 
 def test_get_ledgers(db: Session, ledger: models.Ledger, normal_user: models.User, template: models.Template, team: models.Team):
@@ -214,4 +221,219 @@ def test_export_all_ledgers(db: Session, ledger: models.Ledger, normal_user: mod
     # 验证导出结果
     assert isinstance(file_data, BytesIO)
     assert "xlsx" in filename
-    assert template.name in filename or str(template.id) in filename 
\ No newline at end of file
+    assert template.name in filename or str(template.id) in filename 
+
+def test_ledger_visibility(db: Session, ledger: models.Ledger, superuser: models.User, normal_user: models.User):
+    """测试台账可见性：其他团队用户不可见，成为审批人后可见"""
+    other_user = models.User(
+        username="other",
+        ehr_id="1111111",
+        name="其他用户",
+        hashed_password="x",
+        is_active=True,
+        is_superuser=False,
+    )
+    db.add(other_user)
+    db.commit()
+    db.refresh(other_user)
+
+    # 其他团队的用户看不到该台账
+    assert ledger_service.get_ledgers(db, current_user=other_user) == []
+    with pytest.raises(HTTPException) as excinfo:
+        ledger_service.get_ledger(db, ledger.id, other_user)
+    assert excinfo.value.status_code == 403
+
+    # 创建者和超级管理员可以看到
+    assert [l.id for l in ledger_service.get_ledgers(db, current_user=normal_user)] == [ledger.id]
+    assert [l.id for l in ledger_service.get_ledgers(db, current_user=superuser)] == [ledger.id]
+
+    # 被指定为工作流节点审批人后可以看到
+    workflow = models.Workflow(name="可见性测试工作流", created_by=normal_user.id)
+    db.add(workflow)
+    db.flush()
+    node = models.WorkflowNode(workflow_id=workflow.id, name="审批", node_type="approval", order_index=1)
+    db.add(node)
+    db.flush()
+    instance = models.WorkflowInstance(workflow_id=workflow.id, ledger_id=ledger.id, created_by=normal_user.id)
+    db.add(instance)
+    db.flush()
+    db.add(models.WorkflowInstanceNode(
+        workflow_instance_id=instance.id, workflow_node_id=node.id, approver_id=other_user.id
+    ))
+    db.commit()
+
+    assert [l.id for l in ledger_service.get_ledgers(db, current_user=other_user)] == [ledger.id]
+    assert ledger_service.get_ledger(db, ledger.id, other_user).id == ledger.id
+
+
+def test_visibility_column_compiles_for_oracle(db: Session, normal_user: models.User):
+    """测试可见性查询列在Oracle方言下编译为CASE表达式，而不是SELECT列表中的布尔表达式"""
+    from sqlalchemy.dialects import oracle
+    from app.services.visibility_service import ledger_visibility_filter, visibility_column
+
+    query = db.query(models.Ledger.id, visibility_column(ledger_visibility_filter(normal_user)))
+    sql = str(query.statement.compile(dialect=oracle.dialect()))
+    select_list = sql.split(" FROM ", 1)[0]
+    assert "CASE WHEN" in select_list
+    assert " AS visible" in select_list
+
+
+def test_sync_field_values_with_ledger_data(db: Session, normal_user: models.User, template: models.Template, team: models.Team):
+    """测试台账data同步到字段值：新字段值批量创建，已有字段值原地更新"""
+    ledger_in = schemas.LedgerCreate(
+        name="同步台账",
+        team_id=team.id,
+        template_id=template.id,
+        data={"字段1": "初始值"}
+    )
+    ledger = ledger_service.create_ledger(db, ledger_in, normal_user)
+    assert [(fv.field.name, fv.value) for fv in ledger.field_values] == [("字段1", "初始值")]
+    first_id = ledger.field_values[0].id
+
+    ledger.data = {"字段1": "更新值", "字段2": 300}
+    db.commit()
+    field_values = ledger_service.sync_field_values_with_ledger_data(db, ledger.id)
+
+    # 按模板字段顺序返回，已有字段值不重复创建
+    assert [(fv.field.name, fv.value) for fv in field_values] == [("字段1", "更新值"), ("字段2", "300")]
+    assert field_values[0].id == first_id
+    assert sorted(fv.id for fv in ledger.field_values) == sorted(fv.id for fv in field_values)
+
+
+def test_ledger_reference_names(db: Session, ledger: models.Ledger, normal_user: models.User, template: models.Template, team: models.Team):
+    """测试台账列表的名称来自引用实体缓存，且实体修改后失效"""
+    ledgers = ledger_service.get_ledgers(db, current_user=normal_user)
+    assert ledgers[0].template_name == template.name
+    assert ledgers[0].team_name == team.name
+    assert ledgers[0].created_by_name == normal_user.name
+
+    # 列表已把用到的实体放入缓存，再次获取不执行查询
+    with track_queries() as stats:
+        users = user_refs.get_many(db, [normal_user.id, None])
+        templates = template_refs.get_many(db, [template.id])
+    assert stats.statements == 0
+    assert users[normal_user.id].name == normal_user.name
+    assert templates[template.id].name == template.name
+
+    # 修改模板名称和用户姓名后，列表显示新名称
+    template_service.update_template(db, template.id, schemas.TemplateUpdate(name="改名模板"), normal_user.id)
+    user_service.update_user(db, normal_user.id, schemas.UserUpdate(name="改名用户"))
+    ledgers = ledger_service.get_ledgers(db, current_user=normal_user)
+    assert ledgers[0].template_name == "改名模板"
+    assert ledgers[0].created_by_name == "改名用户"
+
+
+def test_reference_cache_invalidated_while_loading(db: Session, template: models.Template):
+    """测试引用缓存加载期间实体被修改时，加载的旧数据按读取时的版本号写入，后续读取不会采用"""
+    from sqlalchemy import event
+
+    engine = db.get_bind()
+    raced = []
+
+    def rename_during_load(conn, cursor, statement, parameters, context, executemany):
+        # 查询模板之后、写入缓存之前，模板被其他请求修改
+        if not raced and "FROM templates" in statement:
+            raced.append(True)
+            template_refs.invalidate()
+
+    event.listen(engine, "before_cursor_execute", rename_during_load)
+    try:
+        template_refs.get_many(db, [template.id])
+    finally:
+        event.remove(engine, "before_cursor_execute", rename_during_load)
+    assert raced
+
+    with track_queries() as stats:
+        template_refs.get_many(db, [template.id])
+    assert stats.statements == 1
+
+
+def test_serialize_ledgers(db: Session, ledger: models.Ledger, normal_user: models.User, workflow: models.Workflow):
+    """测试台账列表的快速序列化与Pydantic的结果一致，嵌套的工作流实例和审批人也被序列化"""
+    workflow_node = db.query(models.WorkflowNode).filter(models.WorkflowNode.workflow_id == workflow.id).first()
+    instance = models.WorkflowInstance(workflow_id=workflow.id, ledger_id=ledger.id, created_by=normal_user.id)
+    db.add(instance)
+    db.flush()
+    node = models.WorkflowInstanceNode(
+        workflow_instance_id=instance.id, workflow_node_id=workflow_node.id, approver_id=normal_user.id
+    )
+    db.add(node)
+    db.flush()
+    instance.current_node_id = node.id
+    db.commit()
+
+    ledgers = ledger_service.get_ledgers(db, current_user=normal_user)
+    result = serialize_list(schemas.Ledger, ledgers)
+    expected = [schemas.Ledger.model_validate(item, from_attributes=True).model_dump() for item in ledgers]
+    for item, expected_item in zip(result, expected):
+        assert {k: v for k, v in item.items() if k != "active_workflow_instance"} == {
+            k: v for k, v in expected_item.items() if k != "active_workflow_instance"
+        }
+
+    active = result[0]["active_workflow_instance"]
+    assert active["ledger_id"] == ledger.id
+    assert active["current_node"]["id"] == node.id
+    assert active["nodes"][0]["approver"]["username"] == normal_user.username
+    # 带校验器的User仍由Pydantic处理，同一对象只处理一次
+    assert "password_expired" in active["creator"]
+    assert active["creator"] is active["nodes"][0]["approver"]
+    assert orjson.loads(orjson.dumps(result))[0]["data"] == ledger.data
+
+
+def test_serializer_published_when_complete(monkeypatch, db: Session, ledger: models.Ledger, normal_user: models.User):
+    """测试序列化函数（包括嵌套模型的）在字段列表全部生成后才对其他线程可见"""
+    import typing
+    from app.utils import serializer as serializer_module
+
+    monkeypatch.setattr(serializer_module, "_serializers", {})
+    get_type_hints = typing.get_type_hints
+    published_during_build = []
+
+    def checking_get_type_hints(*args, **kwargs):
+        # 每生成一个模型的字段列表前检查：此时不应有已发布的函数
+        published_during_build.append(len(serializer_module._serializers))
+        return get_type_hints(*args, **kwargs)
+
+    monkeypatch.setattr(typing, "get_type_hints", checking_get_type_hints)
+    ledgers = ledger_service.get_ledgers(db, current_user=normal_user)
+    result = serialize_list(schemas.Ledger, ledgers)
+    monkeypatch.undo()
+
+    assert len(published_during_build) > 1
+    assert set(published_during_build) == {0}
+    assert result[0]["id"] == ledger.id
+    assert result[0]["name"] == ledger.name
+
+
+def test_get_ledgers_sparse_fields(db: Session, ledger: models.Ledger, normal_user: models.User):
+    """测试稀疏字段集：未请求的data延迟加载，名称和工作流实例不再查询，序列化只输出请求的字段"""
+    fields = {"id", "name", "status"}
+    db.expire(ledger)
+    # 预先加载当前用户，只统计台账列表本身执行的语句
+    db.refresh(normal_user)
+    with track_queries() as stats:
+        ledgers = ledger_service.get_ledgers(db, current_user=normal_user, fields=fields)
+        result = serialize_list(schemas.Ledger, ledgers, fields)
+    assert stats.statements == 1
+    assert "data" not in ledgers[0].__dict__
+    assert not hasattr(ledgers[0], "active_workflow_instance")
+    assert result[0] == {"id": ledger.id, "name": ledger.name, "status": ledger.status}
+
+    # 请求名称字段时仍然填充
+    ledgers = ledger_service.get_ledgers(db, current_user=normal_user, fields={"id", "team_name", "data"})
+    assert serialize_list(schemas.Ledger, ledgers, {"id", "team_name", "data"})[0]["data"] == ledger.data
+    assert ledgers[0].team_name is not None
+
+
+def test_sparse_fields_do_not_grow_serializer_cache(db: Session, ledger: models.Ledger, normal_user: models.User):
+    """测试不同的稀疏字段组合共用模型的序列化函数，缓存不随客户端请求的组合增长"""
+    from app.utils import serializer as serializer_module
+
+    ledgers = ledger_service.get_ledgers(db, current_user=normal_user)
+    serialize_list(schemas.Ledger, ledgers)
+    size = len(serializer_module._serializers)
+    names = sorted(schemas.Ledger.model_fields)
+    for i in range(1, len(names)):
+        fields = {"id", names[i]}
+        assert set(serialize_list(schemas.Ledger, ledgers, fields)[0]) == fields
+    assert len(serializer_module._serializers) == size
@@ -1,5 +1,10 @@
+import csv
+import gzip
+import io
+import json
+
 import pytest
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, sessionmaker
 from datetime import datetime, timedelta
 
 from app import models, schemas
@@ -338,4 +343,118 @@ def test_get_user_audit_logs(db: Session, normal_user: models.User):
     
     # 测试不存在的用户
     with pytest.raises(Exception):
-        log_service.get_user_audit_logs(db, user_id=999, limit=10) 
\ No newline at end of file
+        log_service.get_user_audit_logs(db, user_id=999, limit=10) 
+
+def test_export_system_logs(db: Session, normal_user: models.User):
+    """测试流式导出系统日志"""
+    # 创建测试日志
+    for i in range(5):
+        db.add(models.SystemLog(
+            module="export_test",
+            action="create",
+            message=f"导出测试日志{i}",
+            level="error" if i % 2 else "info",
+            user_id=normal_user.id,
+            details={"index": i},
+            created_at=datetime.now()
+        ))
+    db.add(models.SystemLog(
+        module="other",
+        action="create",
+        message="其他模块日志",
+        level="info",
+        created_at=datetime.now()
+    ))
+    db.commit()
+    session_factory = sessionmaker(bind=db.get_bind())
+    
+    # NDJSON格式，忽略分页参数
+    params = schemas.LogQueryParams(module="export_test", page=1, page_size=2)
+    content = b"".join(log_service.export_system_logs(params, session_factory=session_factory))
+    records = [json.loads(line) for line in content.decode("utf-8").splitlines()]
+    assert len(records) == 5
+    assert all(record["module"] == "export_test" for record in records)
+    assert records[0]["details"] == {"index": 0}
+    
+    # CSV格式并按级别筛选
+    params = schemas.LogQueryParams(module="export_test", level="error")
+    content = b"".join(log_service.export_system_logs(params, format="csv", session_factory=session_factory))
+    rows = list(csv.reader(io.StringIO(content.decode("utf-8"))))
+    assert rows[0][0] == "id"
+    assert len(rows) == 3
+    
+    # gzip压缩
+    params = schemas.LogQueryParams(module="export_test")
+    content = b"".join(log_service.export_system_logs(params, compress=True, session_factory=session_factory))
+    assert len(gzip.decompress(content).decode("utf-8").splitlines()) == 5
+    
+    # 没有匹配数据时CSV仍输出表头
+    params = schemas.LogQueryParams(module="not_exists")
+    content = b"".join(log_service.export_system_logs(params, format="csv", session_factory=session_factory))
+    assert len(content.decode("utf-8").splitlines()) == 1
+
+
+def test_export_audit_logs(db: Session, normal_user: models.User):
+    """测试流式导出审计日志"""
+    # 创建测试审计日志
+    db.add(models.AuditLog(action="submit", user_id=normal_user.id, created_at=datetime.now()))
+    db.add(models.AuditLog(action="approve", user_id=normal_user.id, created_at=datetime.now()))
+    db.commit()
+    session_factory = sessionmaker(bind=db.get_bind())
+    
+    params = schemas.LogQueryParams(action="approve", user_id=normal_user.id)
+    content = b"".join(log_service.export_audit_logs(params, session_factory=session_factory))
+    records = [json.loads(line) for line in content.decode("utf-8").splitlines()]
+    assert len(records) == 1
+    assert records[0]["action"] == "approve"
+
+
+def test_log_stats_rollup(db: Session, normal_user: models.User):
+    """测试日志写入时维护小时汇总"""
+    # 写入日志时同步累加汇总
+    for _ in range(3):
+        LoggerService.log_info(db, module="stats_test", action="create", message="汇总测试", user_id=normal_user.id)
+    LoggerService.log_error(db, module="stats_test", action="delete", message="汇总测试")
+    
+    params = schemas.LogStatsQueryParams(module="stats_test")
+    timeline = log_service.get_log_stats_timeline(db, params)
+    assert sum(point["count"] for point in timeline) == 4
+    
+    summary = log_service.get_log_stats_summary(db, params, group_by="action")
+    assert {group["key"]: group["count"] for group in summary} == {"create": 3, "delete": 1}
+    
+    summary = log_service.get_log_stats_summary(db, params, group_by="level")
+    assert {group["key"]: group["count"] for group in summary} == {"info": 3, "error": 1}
+    
+    # 按天汇总
+    timeline = log_service.get_log_stats_timeline(db, params, interval="day")
+    assert len(timeline) == 1
+    assert timeline[0]["bucket"].hour == 0
+
+
+def test_rebuild_log_stats(db: Session, normal_user: models.User):
+    """测试根据原始日志重建小时汇总"""
+    base_time = datetime(2025, 1, 1, 8, 30)
+    for i in range(4):
+        db.add(models.SystemLog(
+            module="rebuild_test",
+            action="view",
+            message="重建测试",
+            level="info",
+            user_id=normal_user.id,
+            created_at=base_time + timedelta(hours=i // 2)
+        ))
+    db.commit()
+    
+    groups = log_service.rebuild_log_stats(db)
+    assert groups == 2
+    
+    params = schemas.LogStatsQueryParams(module="rebuild_test", start_date=base_time)
+    timeline = log_service.get_log_stats_timeline(db, params)
+    assert [(point["bucket"].hour, point["count"]) for point in timeline] == [(8, 2), (9, 2)]
+    
+    # 结束时间不在整点时，所在小时不在重建范围内，汇总保持完整
+    groups = log_service.rebuild_log_stats(db, start_date=base_time, end_date=base_time + timedelta(minutes=45))
+    assert groups == 1
+    timeline = log_service.get_log_stats_timeline(db, params)
+    assert [(point["bucket"].hour, point["count"]) for point in timeline] == [(8, 2), (9, 2)]
@@ -2,6 +2,7 @@ import pytest
 from sqlalchemy.orm import Session
 
 from app import models, schemas
+from app.db.monitoring import track_queries
 from app.services.template_service import template_service
 
 
@@ -37,6 +38,13 @@ def test_get_templates(db: Session, normal_user: models.User):
     templates = template_service.get_templates(db, skip=1, limit=1)
     assert len(templates) == 1
     assert templates[0].name == "测试模板2"
+    
+    # 字段数量由一条分组查询填充，未请求时不查询
+    templates = template_service.get_templates(db)
+    assert [template.fields_count for template in templates] == [0, 0]
+    with track_queries() as stats:
+        template_service.get_templates(db, fields={"id", "name"})
+    assert stats.statements == 1
 
 
 def test_create_template(db: Session, normal_user: models.User):
@@ -73,7 +81,7 @@ def test_create_template(db: Session, normal_user: models.User):
     assert template.department == "新部门"
     assert template.created_by_id == normal_user.id
     assert template.updated_by_id == normal_user.id
-    assert template.field_count == 2
+    assert template.fields_count == 2
     
     # 测试重复名称
     with pytest.raises(Exception):
@@ -1,10 +1,18 @@
+import io
+import pickle
 import pytest
+import pandas as pd
 from sqlalchemy.orm import Session
-from fastapi import HTTPException
+from fastapi import HTTPException, UploadFile
 
 from app import models, schemas
 from app.services.user_service import UserService as user_service
 from app.core.security import verify_password
+from app.db.monitoring import track_queries
+from app.services import user_cache_service
+from app.core.cache import RedisBackend, set_cache_backend
+from app.utils.cache import MISSING
+from tests.utils.resp_server import start_resp_server, stop_resp_server
 
 
 # def test_get_users(db: Session, superuser: models.User, normal_user: models.User):
@@ -82,6 +90,67 @@ def test_update_user(db: Session, normal_user: models.User):
         user_service.update_user(db, 999, update_data)
 
 
+def test_user_cache(db: Session, normal_user: models.User):
+    """测试认证用户缓存及更新后的失效"""
+    user_cache_service.get_user(db, normal_user.id)
+    db.expunge_all()
+
+    # 命中缓存时不执行查询，返回的对象属于当前会话
+    with track_queries() as stats:
+        cached_user = user_cache_service.get_user(db, normal_user.id)
+    assert stats.statements == 0
+    assert cached_user.username == normal_user.username
+    assert cached_user in db
+
+    # 停用用户后缓存失效
+    user_service.update_user(db, normal_user.id, schemas.UserUpdate(is_active=False))
+    db.expunge_all()
+    with track_queries() as stats:
+        user = user_cache_service.get_user(db, normal_user.id)
+    assert stats.statements == 1
+    assert user.is_active is False
+
+
+@pytest.mark.parametrize("shared", [False, True])
+def test_user_cache_invalidated_while_loading(db: Session, normal_user: models.User, shared: bool):
+    """测试查询用户之后、写入缓存之前用户被停用时，查到的旧数据不会被后续读取采用"""
+    from sqlalchemy import event
+
+    server = start_resp_server() if shared else None
+    previous = set_cache_backend(RedisBackend(server.url)) if shared else None
+    engine = db.get_bind()
+    raced = []
+
+    def deactivate_during_load(conn, cursor, statement, parameters, context, executemany):
+        # 另一个请求在本次查询之后停用用户并清除缓存
+        if not raced and statement.startswith("SELECT") and "FROM users" in statement:
+            raced.append(True)
+            user_cache_service.invalidate_user(normal_user.id)
+
+    try:
+        event.listen(engine, "before_cursor_execute", deactivate_during_load)
+        try:
+            user_cache_service.get_user(db, normal_user.id)
+        finally:
+            event.remove(engine, "before_cursor_execute", deactivate_during_load)
+        assert raced
+
+        db.expunge_all()
+        with track_queries() as stats:
+            user_cache_service.get_user(db, normal_user.id)
+        assert stats.statements == 1
+
+        # 再次加载的数据正常缓存
+        db.expunge_all()
+        with track_queries() as stats:
+            user_cache_service.get_user(db, normal_user.id)
+        assert stats.statements == 0
+    finally:
+        if shared:
+            set_cache_backend(previous).close()
+            stop_resp_server(server)
+
+
 def test_delete_user(db: Session):
     """测试删除用户"""
     # 创建测试用户
@@ -119,4 +188,109 @@ def test_check_password_expired(db: Session, normal_user: models.User):
     # 验证结果包含正确的键
     assert "password_expired" in result
     assert "days_until_expiry" in result
-    assert "last_password_change" in result 
\ No newline at end of file
+    assert "last_password_change" in result 
+
+
+def test_import_users_from_excel(db: Session):
+    """测试从Excel批量导入用户"""
+    df = pd.DataFrame([
+        {"username": "import1", "ehr_id": "2000001", "password": "pass001", "name": "导入用户1"},
+        {"username": "import2", "ehr_id": "2000002", "password": 123456, "name": "导入用户2"},
+        {"username": "import1", "ehr_id": "2000003", "password": "pass003", "name": "重复用户"},
+    ])
+    buffer = io.BytesIO()
+    df.to_excel(buffer, index=False, engine="openpyxl")
+    buffer.seek(0)
+
+    result = user_service.import_users_from_excel(db, UploadFile(file=buffer, filename="users.xlsx"))
+
+    assert result["success_count"] == 2
+    assert result["failed_count"] == 1
+    user1 = db.query(models.User).filter(models.User.username == "import1").first()
+    user2 = db.query(models.User).filter(models.User.username == "import2").first()
+    assert verify_password("pass001", user1.hashed_password)
+    assert verify_password("123456", user2.hashed_password)
+
+
+def test_user_cache_shared_backend(db: Session, normal_user: models.User):
+    """测试共享缓存后端：一个worker写入的用户缓存其他worker可以命中，清除后所有worker失效"""
+    server = start_resp_server()
+    worker_a, worker_b = RedisBackend(server.url), RedisBackend(server.url)
+    previous = set_cache_backend(worker_a)
+    try:
+        user_cache_service.get_user(db, normal_user.id)
+        db.expunge_all()
+
+        # 另一个worker命中同一份缓存，不执行查询
+        set_cache_backend(worker_b)
+        with track_queries() as stats:
+            cached_user = user_cache_service.get_user(db, normal_user.id)
+        assert stats.statements == 0
+        assert cached_user.username == normal_user.username
+        assert cached_user in db
+
+        # 在另一个worker中修改用户后缓存失效
+        set_cache_backend(worker_a)
+        user_service.update_user(db, normal_user.id, schemas.UserUpdate(is_active=False))
+        db.expunge_all()
+        set_cache_backend(worker_b)
+        with track_queries() as stats:
+            user = user_cache_service.get_user(db, normal_user.id)
+        assert stats.statements == 1
+        assert user.is_active is False
+
+        # 整体清除通过递增标签版本号实现，读取时条目和版本号在一次往返中取回
+        user_cache_service.clear_user_cache()
+        db.expunge_all()
+        set_cache_backend(worker_a)
+        with track_queries() as stats:
+            user_cache_service.get_user(db, normal_user.id)
+        assert stats.statements == 1
+        db.expunge_all()
+        commands = server.commands
+        user_cache_service.get_user(db, normal_user.id)
+        assert server.commands == commands + 1
+    finally:
+        set_cache_backend(previous)
+        worker_a.close()
+        worker_b.close()
+        stop_resp_server(server)
+
+
+def test_shared_backend_signed_values():
+    """测试共享缓存中的值带签名：签名不符或未签名的值不会被反序列化"""
+    server = start_resp_server()
+    worker_a, worker_b = RedisBackend(server.url, secret="secret"), RedisBackend(server.url, secret="secret")
+    forger = RedisBackend(server.url, secret="other")
+    try:
+        worker_a.write("signed", {"key": {"value": 1}})
+        assert worker_b.read("signed", ["key"], [])[0] == [{"value": 1}]
+
+        # 不知道secret的一方写入的值被忽略
+        forger.write("signed", {"key": {"value": 2}})
+        assert worker_b.read("signed", ["key"], [])[0] == [MISSING]
+
+        # 直接写入的未签名pickle数据被忽略
+        worker_a._execute([("SET", worker_a._key("signed", "key"), pickle.dumps({"value": 3}))])
+        assert worker_b.read("signed", ["key"], [])[0] == [MISSING]
+    finally:
+        for backend in (worker_a, worker_b, forger):
+            backend.close()
+        stop_resp_server(server)
+
+
+def test_shared_backend_unavailable(db: Session, normal_user: models.User):
+    """测试共享缓存服务不可用时直接查询数据库"""
+    server = start_resp_server()
+    backend = RedisBackend(server.url, retry_interval=60)
+    stop_resp_server(server)
+    previous = set_cache_backend(backend)
+    try:
+        for _ in range(2):
+            db.expunge_all()
+            with track_queries() as stats:
+                user = user_cache_service.get_user(db, normal_user.id)
+            assert stats.statements == 1
+            assert user.username == normal_user.username
+    finally:
+        set_cache_backend(previous)
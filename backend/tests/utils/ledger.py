@@ -0,0 +1,48 @@
+from typing import List
+
+from sqlalchemy.orm import Session
+
+from app import models
+from .utils import random_lower_string
+
+
+def create_pending_ledgers(db: Session, approver: models.User, count: int) -> List[models.Ledger]:
+    """
+    创建一批待审批的测试台账
+    每条台账属于同一团队和模板，带一个活动的工作流实例，当前节点待approver审批
+    """
+    suffix = random_lower_string(8)
+    team = models.Team(name=f"测试团队_{suffix}", department="测试部门", leader_id=approver.id)
+    workflow = models.Workflow(name=f"测试工作流_{suffix}", created_by=approver.id)
+    db.add_all([team, workflow])
+    db.flush()
+    workflow_node = models.WorkflowNode(workflow_id=workflow.id, name="审批", node_type="approval", order_index=1)
+    template = models.Template(
+        name=f"测试模板_{suffix}", department="测试部门", created_by_id=approver.id, workflow_id=workflow.id
+    )
+    db.add_all([workflow_node, template])
+    db.flush()
+    db.add(models.Field(template_id=template.id, name="字段1", label="测试字段1", type="text", order=1))
+
+    ledgers = []
+    for i in range(count):
+        ledger = models.Ledger(
+            name=f"测试台账_{suffix}_{i}", status="active", approval_status="pending",
+            team_id=team.id, template_id=template.id, created_by_id=approver.id, updated_by_id=approver.id,
+            current_approver_id=approver.id, data={"字段1": f"值{i}"},
+        )
+        db.add(ledger)
+        db.flush()
+        instance = models.WorkflowInstance(workflow_id=workflow.id, ledger_id=ledger.id, created_by=approver.id)
+        db.add(instance)
+        db.flush()
+        node = models.WorkflowInstanceNode(
+            workflow_instance_id=instance.id, workflow_node_id=workflow_node.id,
+            approver_id=approver.id, status="pending",
+        )
+        db.add(node)
+        db.flush()
+        instance.current_node_id = node.id
+        ledgers.append(ledger)
+    db.commit()
+    return ledgers
@@ -0,0 +1,110 @@
+"""
+测试用的Redis协议替身服务
+
+只实现缓存后端用到的命令（PING、AUTH、SELECT、GET、MGET、SET [PX|EX]、DEL、INCR、FLUSHDB），
+数据保存在内存中，监听Unix socket，在后台线程中处理连接
+"""
+import os
+import socketserver
+import tempfile
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def _read_command(self) -> Optional[List[bytes]]:
+        line = self.rfile.readline()
+        if not line:
+            return None
+        count = int(line[1:-2])
+        args = []
+        for _ in range(count):
+            length = int(self.rfile.readline()[1:-2])
+            args.append(self.rfile.read(length + 2)[:-2])
+        return args
+
+    def handle(self):
+        while True:
+            command = self._read_command()
+            if command is None:
+                return
+            self.server.commands += 1
+            self.wfile.write(self.server.execute(command))
+
+
+class RespServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, path: str):
+        super().__init__(path, _Handler)
+        self.path = path
+        self.commands = 0
+        self._data: Dict[bytes, Tuple[bytes, Optional[float]]] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def url(self) -> str:
+        return f"unix://{self.path}"
+
+    def _get(self, key: bytes) -> Optional[bytes]:
+        item = self._data.get(key)
+        if item is None:
+            return None
+        value, expires_at = item
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self._data[key]
+            return None
+        return value
+
+    @staticmethod
+    def _bulk(value: Optional[bytes]) -> bytes:
+        return b"$-1\r\n" if value is None else b"$%d\r\n%s\r\n" % (len(value), value)
+
+    def execute(self, command: List[bytes]) -> bytes:
+        name, args = command[0].upper(), command[1:]
+        with self._lock:
+            if name in (b"PING", b"AUTH", b"SELECT", b"FLUSHDB"):
+                if name == b"FLUSHDB":
+                    self._data.clear()
+                return b"+OK\r\n" if name != b"PING" else b"+PONG\r\n"
+            if name == b"GET":
+                return self._bulk(self._get(args[0]))
+            if name == b"MGET":
+                return b"*%d\r\n" % len(args) + b"".join(self._bulk(self._get(key)) for key in args)
+            if name == b"SET":
+                expires_at = None
+                if len(args) >= 4 and args[2].upper() in (b"PX", b"EX"):
+                    scale = 1000 if args[2].upper() == b"PX" else 1
+                    expires_at = time.monotonic() + int(args[3]) / scale
+                self._data[args[0]] = (args[1], expires_at)
+                return b"+OK\r\n"
+            if name == b"DEL":
+                removed = sum(1 for key in args if self._data.pop(key, None) is not None)
+                return b":%d\r\n" % removed
+            if name == b"PEXPIRE":
+                value = self._get(args[0])
+                if value is None:
+                    return b":0\r\n"
+                self._data[args[0]] = (value, time.monotonic() + int(args[1]) / 1000)
+                return b":1\r\n"
+            if name == b"INCR":
+                value = int(self._get(args[0]) or 0) + 1
+                self._data[args[0]] = (str(value).encode("ascii"), None)
+                return b":%d\r\n" % value
+        return b"-ERR unknown command '%s'\r\n" % name
+
+
+def start_resp_server() -> RespServer:
+    """在临时目录中启动替身服务，用完后调用 stop_resp_server"""
+    path = os.path.join(tempfile.mkdtemp(), "redis.sock")
+    server = RespServer(path)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def stop_resp_server(server: RespServer) -> None:
+    server.shutdown()
+    server.server_close()
+    os.remove(server.path)
+    os.rmdir(os.path.dirname(server.path))